@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark suite for Infrastructure Issue Reporter
+Drives every issue, auth, user, metrics and upload route through the Flask test client against a
+synthetic dataset and reports p50/p95/p99 latency, throughput and peak RSS per endpoint
+"""
+
+import os
+import io
+import sys
+import math
+import hashlib
+import json
+import logging
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLUEPRINTS = ('issue', 'auth', 'user', 'metrics', 'upload')
+ADMIN = {'username': 'admin', 'password': 'admin123'}
+# Interval at which RSS is sampled while an endpoint runs
+RSS_SAMPLE_SECONDS = 0.01
+# Chunk size of the upload scenarios; the appended upload is a photo of this many chunks
+UPLOAD_CHUNK = 64 * 1024
+UPLOAD_CHUNKS = 16
+# Issues per bulk update and bulk delete request
+BULK_SIZE = 20
+# Scenarios measuring a response other than 2xx on purpose; any other status is reported as a failure
+EXPECTED_STATUSES = {
+    'issues not modified': {304},
+    'create admin (rejected)': {400},
+}
+# Generated issues resolved longer ago than this are moved to the archive
+ARCHIVE_AFTER_DAYS = 180
+# Generated datasets are split into this many x this many synthetic wards
+WARDS_PER_SIDE = 7
+
+def percentile(values, fraction):
+    """Return the value at the given fraction of the sorted values"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def current_rss():
+    """Return the resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # No procfs: fall back to the lifetime peak (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class RssSampler:
+    """Records the peak RSS of this process while it is running"""
+
+    def __init__(self):
+        self.start_rss = self.peak = current_rss()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    def _run(self):
+        while not self.stopped.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, current_rss())
+
+def photo_bytes():
+    """Return a small JPEG to upload"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (120, 140, 160)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+def build_scenarios(context):
+    """Return the benchmarked requests: (name, endpoint, iterations factor, request function).
+
+    A request function takes the test client and a random generator and returns
+    the response. Names distinguish several scenarios of the same endpoint.
+    """
+    rng_id = lambda rng: rng.choice(context['issue_ids'])
+    south, west, north, east = context['bounds']
+
+    def form_issue(rng):
+        return {
+            'title': f'Benchmark pothole {rng.random()}',
+            'description': 'Deep pothole in the right lane, reported by the benchmark.',
+            'category': rng.choice(['road', 'water', 'power', 'other']),
+            'severity': rng.choice(['low', 'medium', 'high', 'critical']),
+            'latitude': str(rng.uniform(south, north)),
+            'longitude': str(rng.uniform(west, east)),
+        }
+
+    def bulk_body(rng):
+        lines = []
+        for _ in range(100):
+            record = form_issue(rng)
+            record.update(latitude=float(record['latitude']), longitude=float(record['longitude']))
+            lines.append(json.dumps(record))
+        return '\n'.join(lines)
+
+    def read_first_event(client, url):
+        response = client.get(url, buffered=False)
+        next(iter(response.response))
+        response.close()
+        return response
+
+    def pop(name):
+        return context[name].pop() if context[name] else 0
+
+    def start_upload(client, data):
+        return client.post('/api/uploads', json={
+            'filename': 'photo.jpg', 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()
+        }).get_json()['id']
+
+    chunked = threading.local()
+
+    def append_chunk(client):
+        # Each client thread fills its own upload, starting another once it is full
+        if getattr(chunked, 'offset', None) in (None, UPLOAD_CHUNK * UPLOAD_CHUNKS):
+            chunked.upload_id = start_upload(client, bytes(UPLOAD_CHUNK * UPLOAD_CHUNKS))
+            chunked.offset = 0
+        response = client.patch(f'/api/uploads/{chunked.upload_id}', data=context['chunk'],
+                                headers={'Upload-Offset': str(chunked.offset)})
+        chunked.offset += UPLOAD_CHUNK
+        return response
+
+    def chunked_photo(client):
+        upload_id = start_upload(client, context['photo'])
+        client.patch(f'/api/uploads/{upload_id}', data=context['photo'], headers={'Upload-Offset': '0'})
+        return client.post(f'/api/uploads/{upload_id}/finalize')
+
+    def heatmap_tile(zoom, latitude, longitude, query=''):
+        scale = 2 ** zoom
+        radians = math.radians(latitude)
+        x = int((longitude + 180) / 360 * scale)
+        y = int((1 - math.log(math.tan(radians) + 1 / math.cos(radians)) / math.pi) / 2 * scale)
+        return f'/api/issues/heatmap/{zoom}/{x}/{y}{query}'
+
+    viewport = f'{west},{south},{east},{north}'
+    center_lat, center_lng = (south + north) / 2, (west + east) / 2
+    street = f'{center_lng - 0.005},{center_lat - 0.005},{center_lng + 0.005},{center_lat + 0.005}'
+
+    return [
+        ('issues page', 'issue.get_issues', 1, lambda c, rng: c.get('/api/issues?limit=50')),
+        ('issues page filtered', 'issue.get_issues', 1,
+         lambda c, rng: c.get('/api/issues?limit=50&category=water&status=reported&severity=high')),
+        ('issues card fields', 'issue.get_issues', 1,
+         lambda c, rng: c.get('/api/issues?limit=100&fields=title,summary,category,severity,status,created_at')),
+        ('issues page with archived', 'issue.get_issues', 1,
+         lambda c, rng: c.get('/api/issues?limit=50&status=resolved&include_archived=1')),
+        ('issues page by district', 'issue.get_issues', 1,
+         lambda c, rng: c.get(f'/api/issues?limit=50&district=Ward%20{rng.randint(1, WARDS_PER_SIDE ** 2)}')),
+        ('issues search', 'issue.get_issues', 1, lambda c, rng: c.get('/api/issues?q=pothole&limit=50')),
+        ('issues not modified', 'issue.get_issues', 1,
+         lambda c, rng: c.get('/api/issues?limit=50', headers={'If-None-Match': context['list_etag']})),
+        ('create issue', 'issue.create_issue', 1, lambda c, rng: c.post('/api/issues', data=form_issue(rng))),
+        ('create issue with photo', 'issue.create_issue', 0.2, lambda c, rng: c.post(
+            '/api/issues', data={**form_issue(rng), 'photo': (io.BytesIO(context['photo']), 'photo.jpg')},
+            content_type='multipart/form-data')),
+        ('get issue', 'issue.get_issue', 1, lambda c, rng: c.get(f'/api/issues/{rng_id(rng)}')),
+        ('get archived issue', 'issue.get_issue', 1,
+         lambda c, rng: c.get(f"/api/issues/{rng.choice(context['archived_ids'] or context['issue_ids'])}")),
+        ('update issue', 'issue.update_issue', 1,
+         lambda c, rng: c.put(f'/api/issues/{rng_id(rng)}', json={'status': rng.choice(['verified', 'in_progress'])})),
+        ('delete issue', 'issue.delete_issue', 1, lambda c, rng: c.delete(f"/api/issues/{pop('deletable_issue_ids')}")),
+        ('bulk update 20', 'issue.bulk_update_issues', 1, lambda c, rng: c.patch('/api/issues/bulk', json={
+            'ids': rng.sample(context['issue_ids'], BULK_SIZE), 'status': rng.choice(['verified', 'in_progress'])})),
+        ('bulk delete 20', 'issue.bulk_delete_issues', 0.2, lambda c, rng: c.delete(
+            '/api/issues/bulk', json={'ids': [pop('bulk_deletable_ids') for _ in range(BULK_SIZE)]})),
+        ('issue photo', 'issue.get_issue_photo', 1,
+         lambda c, rng: c.get(f"/api/issues/{context['photo_issue_id']}/photo")),
+        ('issue photo thumb', 'issue.get_issue_photo', 1,
+         lambda c, rng: c.get(f"/api/issues/{context['photo_issue_id']}/photo?size=thumb")),
+        ('bulk import 100', 'issue.bulk_create_issues', 0.2,
+         lambda c, rng: c.post('/api/issues/bulk', data=bulk_body(rng), content_type='application/x-ndjson')),
+        ('categories', 'issue.get_categories', 1, lambda c, rng: c.get('/api/issues/categories')),
+        ('severities', 'issue.get_severities', 1, lambda c, rng: c.get('/api/issues/severities')),
+        ('statuses', 'issue.get_statuses', 1, lambda c, rng: c.get('/api/issues/statuses')),
+        ('stats', 'issue.get_issue_stats', 1, lambda c, rng: c.get('/api/issues/stats')),
+        ('districts list', 'issue.get_districts', 1, lambda c, rng: c.get('/api/issues/districts')),
+        ('trends weekly', 'issue.get_issue_trends', 1,
+         lambda c, rng: c.get('/api/issues/trends?interval=week&start=' + context['trend_start'])),
+        ('changes since', 'issue.get_issue_changes', 1,
+         lambda c, rng: c.get(f"/api/issues/changes?since={context['sync_cursor']}")),
+        ('events first byte', 'issue.stream_issue_events', 1,
+         lambda c, rng: read_first_event(c, '/api/issues/events')),
+        ('map city clustered', 'issue.get_issues_map', 1, lambda c, rng: c.get(f'/api/issues/map?bbox={viewport}&zoom=12')),
+        ('map street', 'issue.get_issues_map', 1, lambda c, rng: c.get(f'/api/issues/map?bbox={street}&zoom=17')),
+        ('heatmap city tile', 'issue.get_heatmap_tile', 1,
+         lambda c, rng: c.get(heatmap_tile(12, center_lat, center_lng))),
+        ('heatmap street tiles by severity', 'issue.get_heatmap_tile', 1, lambda c, rng: c.get(heatmap_tile(
+            15, rng.uniform(south, north), rng.uniform(west, east), '?weight=severity&status=reported,verified'))),
+        ('export csv filtered', 'issue.export_issues_csv', 0.1,
+         lambda c, rng: c.get('/api/issues/export/csv?category=power&severity=critical')),
+        ('export ndjson filtered', 'issue.export_issues_ndjson', 0.1,
+         lambda c, rng: c.get('/api/issues/export/ndjson?category=power&severity=critical')),
+        ('login', 'auth.login', 0.2, lambda c, rng: c.post('/api/auth/login', json=ADMIN)),
+        ('check auth', 'auth.check_auth', 1, lambda c, rng: c.get('/api/auth/check-auth')),
+        ('logout', 'auth.logout', 1, lambda c, rng: c.post('/api/auth/logout')),
+        ('create admin (rejected)', 'auth.create_admin', 1, lambda c, rng: c.post('/api/auth/create-admin', json={
+            'username': 'second', 'email': 'second@example.com', 'password': 'secret'})),
+        ('list users', 'user.get_users', 1, lambda c, rng: c.get('/api/users')),
+        ('create user', 'user.create_user', 1, lambda c, rng: c.post('/api/users', json={
+            'username': f'bench-{rng.random()}', 'email': f'{rng.random()}@example.com', 'password': 'secret'})),
+        ('get user', 'user.get_user', 1, lambda c, rng: c.get(f"/api/users/{context['admin_id']}")),
+        ('update user', 'user.update_user', 1,
+         lambda c, rng: c.put(f"/api/users/{rng.choice(context['user_ids'])}", json={'email': f'{rng.random()}@example.com'})),
+        ('delete user', 'user.delete_user', 1, lambda c, rng: c.delete(f"/api/users/{pop('deletable_user_ids')}")),
+        ('metrics', 'metrics.get_metrics', 1, lambda c, rng: c.get('/api/metrics')),
+        ('start upload', 'upload.create_upload', 1, lambda c, rng: c.post('/api/uploads', json={
+            'filename': 'photo.jpg', 'size': len(context['photo'])})),
+        ('upload offset', 'upload.get_upload', 1, lambda c, rng: c.get(f"/api/uploads/{context['upload_id']}")),
+        ('append upload chunk 64k', 'upload.append_upload_chunk', 1, lambda c, rng: append_chunk(c)),
+        ('chunked photo upload', 'upload.finalize_upload', 0.2, lambda c, rng: chunked_photo(c)),
+        ('cancel upload', 'upload.cancel_upload', 1, lambda c, rng: c.delete(f"/api/uploads/{pop('upload_ids')}")),
+    ]
+
+def prepare(app, args):
+    """Load the dataset and the fixtures the scenarios draw from, returning the context"""
+    from create_demo_data import CITY_BOUNDS, load_synthetic_issues, synthetic_districts
+    from src.models.districts import load_districts, build_district_index, reassign_districts
+    from src.models.user import db, User
+    from src.models.issue import Issue
+    from src.models.archive import ArchivedIssue, archive_resolved_issues
+
+    rng = random.Random(args.seed)
+    context = {'bounds': CITY_BOUNDS, 'photo': photo_bytes()}
+    fixtures = args.iterations * args.clients * 2
+    # The bulk delete scenario runs a fifth of the iterations, plus a warm-up request per client
+    bulk_fixtures = (args.iterations // 5 + 1) * args.clients * BULK_SIZE
+
+    with app.app_context():
+        if args.database is None:
+            load_districts(synthetic_districts(WARDS_PER_SIDE))
+            db.session.commit()
+            print(f"Loading {args.issues} synthetic issues (seed {args.seed})...", flush=True)
+            load_synthetic_issues(args.issues, args.seed)
+            moved = archive_resolved_issues(ARCHIVE_AFTER_DAYS, pause=0)
+            print(f"Archived {moved} issues resolved over {ARCHIVE_AFTER_DAYS} days ago", flush=True)
+            # Time reassignment after a boundary change, then switch back to the scenario wards
+            for wards in (WARDS_PER_SIDE + 1, WARDS_PER_SIDE):
+                load_districts(synthetic_districts(wards))
+                db.session.commit()
+                began = time.perf_counter()
+                checked, changed = reassign_districts(build_district_index())
+                print(f"Reassigned {changed} of {checked} issues to {wards ** 2} wards "
+                      f"in {time.perf_counter() - began:.2f}s", flush=True)
+            # Rows the delete scenarios remove
+            load_synthetic_issues(fixtures + bulk_fixtures, args.seed + 1)
+
+        admin = User.query.filter_by(username=ADMIN['username']).first()
+        if admin is None:
+            admin = User.create_admin_user(username=ADMIN['username'], email='admin@example.com',
+                                           password=ADMIN['password'])
+            db.session.add(admin)
+        # Accounts the user scenarios read, update and delete; '!' matches no password
+        users = [User(username=f'bench-user-{i}', email=f'bench-user-{i}@example.com', password_hash='!')
+                 for i in range(fixtures + 10)]
+        db.session.add_all(users)
+        db.session.commit()
+        context['admin_id'] = admin.id
+        context['user_ids'] = [user.id for user in users[:10]]
+        context['deletable_user_ids'] = [user.id for user in users[10:]]
+
+        max_id = db.session.query(db.func.max(Issue.id)).scalar() or 0
+        ids = [row[0] for row in db.session.query(Issue.id).order_by(Issue.id.desc()).limit(fixtures + bulk_fixtures)]
+        context['deletable_issue_ids'] = ids[:fixtures]
+        context['bulk_deletable_ids'] = ids[fixtures:]
+        # Live issues only: the update scenario cannot change archived ones
+        live_ids = db.session.query(Issue.id).filter(Issue.id <= max_id - fixtures - bulk_fixtures) \
+            .order_by(db.func.random()).limit(10000).all()
+        context['issue_ids'] = [row[0] for row in live_ids] or ids
+        context['archived_ids'] = [row[0] for row in db.session.query(ArchivedIssue.id)
+                                   .order_by(db.func.random()).limit(1000)]
+        db.session.remove()
+
+    client = app.test_client()
+    response = client.post('/api/issues', data={
+        'title': 'Benchmark photo issue', 'description': 'Carries the photo served by the photo scenarios',
+        'category': 'road', 'severity': 'low', 'photo': (io.BytesIO(context['photo']), 'photo.jpg')
+    }, content_type='multipart/form-data')
+    context['photo_issue_id'] = response.get_json()['id']
+    context['chunk'] = bytes(UPLOAD_CHUNK)
+    # Uploads the cancel scenario removes, and one the offset scenario reads
+    context['upload_ids'] = [
+        client.post('/api/uploads', json={'filename': 'photo.jpg', 'size': UPLOAD_CHUNK}).get_json()['id']
+        for _ in range(fixtures + 1)
+    ]
+    context['upload_id'] = context['upload_ids'].pop(0)
+    context['trend_start'] = (datetime.utcnow() - timedelta(days=365)).date().isoformat()
+    context['list_etag'] = client.get('/api/issues?limit=50').headers['ETag']
+    context['sync_cursor'] = client.get('/api/issues?limit=1').headers['X-Sync-Cursor']
+    return context
+
+def run_scenario(app, request_function, iterations, clients, seed):
+    """Issue iterations requests from each of clients threads, returning the measurements"""
+    latencies = []
+    statuses = {}
+    # When each client sent its first measured request and received its last response
+    starts, finishes = [], []
+    lock = threading.Lock()
+    start = threading.Barrier(clients + 1)
+
+    def client(number):
+        test_client = app.test_client()
+        test_client.post('/api/auth/login', json=ADMIN)
+        rng = random.Random(seed * 1000 + number)
+        request_function(test_client, rng).close()  # Warm-up
+        start.wait()
+        first = time.perf_counter()
+        for _ in range(iterations):
+            began = time.perf_counter()
+            response = request_function(test_client, rng)
+            response.get_data()
+            elapsed = time.perf_counter() - began
+            response.close()
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        with lock:
+            starts.append(first)
+            finishes.append(time.perf_counter())
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    # The sampler runs before the barrier releases the clients, and the wall time
+    # is taken from the clients' own timestamps, not from when the main thread woke up
+    with RssSampler() as rss:
+        start.wait()
+        for thread in threads:
+            thread.join()
+    elapsed = max(finishes) - min(starts)
+
+    return {
+        'requests': len(latencies),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        'peak_rss_mb': round(rss.peak / 2 ** 20, 1),
+        'rss_growth_mb': round((rss.peak - rss.start_rss) / 2 ** 20, 1),
+    }
+
+def compare(results, baseline_path, threshold):
+    """Print the change against a previous run, returning the names of regressed scenarios"""
+    with open(baseline_path) as baseline_file:
+        baseline = {result['name']: result for result in json.load(baseline_file)['results']}
+
+    regressions = []
+    print(f"\n{'scenario':<28} {'p95 before':>11} {'p95 now':>9} {'change':>8}")
+    for result in results:
+        before = baseline.get(result['name'])
+        if before is None:
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        marker = ' ✗' if change > threshold else ''
+        if marker:
+            regressions.append(result['name'])
+        print(f"{result['name']:<28} {before['p95_ms']:>11} {result['p95_ms']:>9} {change:>+7.1f}%{marker}")
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--issues', type=int, default=10000, help='Synthetic issues to load (10000 to 5000000)')
+    parser.add_argument('--database', help='Benchmark a copy of this SQLite database instead of generating one')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the dataset and the request mix')
+    parser.add_argument('--iterations', type=int, default=200, help='Requests per client and scenario')
+    parser.add_argument('--clients', type=int, default=1, help='Concurrent test clients per scenario')
+    parser.add_argument('--only', help='Comma separated scenario names or endpoints to run')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', help='Results JSON of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='p95 increase (percent) reported as a regression by --compare')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    database_path = os.path.join(temp_dir, 'bench.db')
+    if args.database:
+        # The write scenarios modify the data, so they run against a copy
+        for suffix in ('', '-wal'):
+            if os.path.exists(args.database + suffix):
+                shutil.copy(args.database + suffix, database_path + suffix)
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    sys.path.insert(0, ROOT)
+    from src.main import app
+
+    # Failing requests are counted in the statuses; their tracebacks would drown the table
+    app.logger.setLevel(logging.CRITICAL)
+    app.config['UPLOAD_FOLDER'] = os.path.join(temp_dir, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+    context = prepare(app, args)
+
+    scenarios = build_scenarios(context)
+    covered = {endpoint for _, endpoint, _, _ in scenarios}
+    uncovered = sorted(
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint.split('.')[0] in BLUEPRINTS and rule.endpoint not in covered
+    )
+    if args.only:
+        selected = set(args.only.split(','))
+        scenarios = [s for s in scenarios if s[0] in selected or s[1] in selected]
+
+    results = []
+    print(f"{'scenario':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'RSS MB':>8}  statuses")
+    failed = []
+    for name, endpoint, factor, request_function in scenarios:
+        iterations = max(1, int(args.iterations * factor))
+        result = {'name': name, 'endpoint': endpoint,
+                  **run_scenario(app, request_function, iterations, args.clients, args.seed)}
+        expected = EXPECTED_STATUSES.get(name)
+        result['failed'] = any(
+            int(code) not in expected if expected else not 200 <= int(code) < 300 for code in result['statuses']
+        )
+        results.append(result)
+        if result['failed']:
+            failed.append(name)
+        print(f"{name:<28} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+              f"{result['throughput_rps']:>8} {result['peak_rss_mb']:>8}  {result['statuses']}"
+              f"{'  ✗ unexpected status' if result['failed'] else ''}", flush=True)
+
+    if uncovered:
+        print(f"\n✗ Routes without a scenario: {', '.join(uncovered)}")
+    if failed:
+        print(f"\n✗ Scenarios with unexpected statuses (their timings measure an error path): {', '.join(failed)}")
+
+    report = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'issues': args.issues if args.database is None else None,
+            'database': args.database,
+            'seed': args.seed,
+            'iterations': args.iterations,
+            'clients': args.clients,
+        },
+        'results': results,
+        'uncovered': uncovered,
+    }
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    regressions = []
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} scenario(s) regressed more than {args.threshold}%")
+    if regressions or failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Read/write concurrency benchmark for Infrastructure Issue Reporter
+Measures GET throughput and latency while concurrent clients submit issues, with reads
+on the shared writer engine and on the separate read-only pool
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN = {'username': 'admin', 'password': 'admin123'}
+
+# 'shared' sends every request to the writer engine, 'split' serves GETs from read-only connections
+PROFILES = ('shared', 'split')
+
+# The read mix: the admin dashboard's heavy reads next to the public list
+READ_REQUESTS = (
+    '/api/issues?limit=50',
+    '/api/issues?limit=50&category=water&status=reported',
+    '/api/issues/stats',
+    '/api/issues/trends?interval=week',
+    '/api/issues/export/csv?category=power&severity=critical',
+)
+
+def percentile(values, fraction):
+    """Return the value at the given fraction of the sorted values"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+def run_profile(profile, issues, readers, writers, duration):
+    """Run one measurement in this process against the database in DATABASE_URL"""
+    sys.path.insert(0, ROOT)
+    from src.main import app
+    from src.models.user import db, User
+    from create_demo_data import load_synthetic_issues
+
+    with app.app_context():
+        load_synthetic_issues(issues, 42)
+        db.session.add(User.create_admin_user(username=ADMIN['username'], email='admin@example.com',
+                                              password=ADMIN['password']))
+        db.session.commit()
+    if profile == 'shared':
+        app.extensions.pop('read_engine').dispose()
+
+    reads, writes = [], []
+    statuses = {}
+    lock = threading.Lock()
+    stopped = threading.Event()
+    start = threading.Barrier(readers + writers + 1)
+
+    def record(kind, elapsed, status):
+        with lock:
+            kind.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    def reader(number):
+        client = app.test_client()
+        client.post('/api/auth/login', json=ADMIN)
+        rng = random.Random(number)
+        start.wait()
+        while not stopped.is_set():
+            began = time.perf_counter()
+            response = client.get(rng.choice(READ_REQUESTS))
+            response.get_data()
+            record(reads, time.perf_counter() - began, response.status_code)
+
+    def writer(number):
+        client = app.test_client()
+        start.wait()
+        i = 0
+        while not stopped.is_set():
+            began = time.perf_counter()
+            response = client.post('/api/issues', data={
+                'title': f'Benchmark issue {number}-{i}',
+                'description': f'Pothole reported by writer {number}, request {i}',
+                'category': 'road',
+                'severity': 'medium',
+                'latitude': str(40.7 + number * 0.001 + i * 0.00001),
+                'longitude': str(-73.9 - i * 0.00001),
+            })
+            record(writes, time.perf_counter() - began, response.status_code)
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    time.sleep(duration)
+    stopped.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'profile': profile,
+        'readers': readers,
+        'writers': writers,
+        'reads_per_second': round(len(reads) / duration, 1),
+        'read_p50_ms': round(percentile(reads, 0.50) * 1000, 2),
+        'read_p95_ms': round(percentile(reads, 0.95) * 1000, 2),
+        'writes_per_second': round(len(writes) / duration, 1),
+        'write_p95_ms': round(percentile(writes, 0.95) * 1000, 2),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--issues', type=int, default=20000, help='Synthetic issues to load')
+    parser.add_argument('--readers', type=int, default=8, help='Concurrent GET clients')
+    parser.add_argument('--writers', default='0,4,16', help='Comma separated counts of concurrent submitters')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of each measurement')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma separated profiles')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args.child, args.issues, args.readers, int(args.writers), args.seconds)))
+        return
+
+    results = []
+    for writers in [int(n) for n in args.writers.split(',')]:
+        for profile in args.profiles.split(','):
+            # Each run gets a fresh database and process, so pools and caches start cold
+            with tempfile.TemporaryDirectory() as temp_dir:
+                env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--child', profile, '--issues', str(args.issues),
+                     '--readers', str(args.readers), '--writers', str(writers), '--seconds', str(args.seconds)],
+                    env=env, cwd=ROOT, capture_output=True, text=True, check=True
+                ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            if not args.json:
+                print(f"{profile:>6} {writers:>3} writers: {result['reads_per_second']:>8} reads/s  "
+                      f"read p50 {result['read_p50_ms']:>7} ms  p95 {result['read_p95_ms']:>7} ms  "
+                      f"{result['writes_per_second']:>7} writes/s  {result['statuses']}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
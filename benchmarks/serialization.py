@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Serialization micro-benchmark for Infrastructure Issue Reporter
+Compares building the /api/issues JSON body through ORM objects and Issue.to_dict()
+with the Core select() path of plain row tuples, using json and (if installed) orjson
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def create_rows(count, seed=42):
+    """Return count issue rows with realistic text lengths and timestamps"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        created_at = start + timedelta(seconds=rng.randrange(0, 365 * 86400), microseconds=rng.randrange(0, 10 ** 6))
+        rows.append({
+            'title': f'Issue {i} on {rng.choice(["Main", "Oak", "Elm", "Pine"])} Street',
+            'description': ' '.join(rng.choice(['pothole', 'flooding', 'broken', 'light', 'drain', 'road', 'near', 'the'])
+                                    for _ in range(rng.randrange(20, 80))),
+            'category': rng.choice(['road', 'water', 'power', 'other']),
+            'severity': rng.choice(['low', 'medium', 'high', 'critical']),
+            'status': rng.choice(['reported', 'verified', 'in_progress', 'resolved']),
+            'latitude': 40.5 + rng.random() * 0.5,
+            'longitude': -74.2 + rng.random() * 0.5,
+            'address': f'{rng.randrange(1, 999)} Main Street, New York, NY',
+            'created_at': created_at,
+            'updated_at': created_at + timedelta(hours=rng.randrange(0, 100)),
+            'reporter_name': 'Benchmark Reporter',
+            'reporter_email': 'reporter@example.com',
+        })
+    return rows
+
+def timed(function, repeat):
+    """Return the best wall time of repeat runs and the last result"""
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', default='10000,100000', help='Comma separated row counts')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import insert
+    from src.main import app
+    from src.models.user import db
+    from src.models.issue import Issue
+    from src.models.serialization import orjson
+
+    fields = Issue.get_list_fields()
+    fields.remove('summary')
+    dumpers = {'json': lambda obj: json.dumps(obj, separators=(',', ':'), sort_keys=True).encode()}
+    if orjson is not None:
+        dumpers['orjson'] = lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+
+    order = (Issue.created_at.desc(), Issue.id.desc())
+
+    def orm_to_dict():
+        return [issue.to_dict() for issue in Issue.query.order_by(*order)]
+
+    def projected_row_to_dict():
+        rows = db.session.query(*[Issue.list_column(field) for field in fields]).order_by(*order).all()
+        return [Issue.row_to_dict(row, fields) for row in rows]
+
+    def core_tuples():
+        query = db.select(*[Issue.json_column(field) for field in fields]).order_by(*order)
+        return [dict(zip(fields, row)) for row in db.session.connection().execute(query)]
+
+    paths = {
+        'orm to_dict': orm_to_dict,
+        'projected row_to_dict': projected_row_to_dict,
+        'core tuples': core_tuples,
+    }
+
+    results = []
+    loaded = 0
+    with app.app_context():
+        for count in [int(n) for n in args.rows.split(',')]:
+            # Grow the table to the next size
+            db.session.execute(insert(Issue.__table__), create_rows(count - loaded, seed=count))
+            db.session.commit()
+            loaded = count
+
+            for path_name, build in paths.items():
+                for dumper_name, dumps in dumpers.items():
+                    def run():
+                        body = dumps(build())
+                        db.session.rollback()
+                        return body
+                    elapsed, body = timed(run, args.repeat)
+                    result = {
+                        'rows': count,
+                        'path': path_name,
+                        'json': dumper_name,
+                        'ms': round(elapsed * 1000, 1),
+                        'rows_per_second': round(count / elapsed),
+                        'bytes': len(body),
+                    }
+                    results.append(result)
+                    if not args.json:
+                        print(f"{count:>7} rows  {path_name:<22} {dumper_name:<7} {result['ms']:>9} ms  "
+                              f"{result['rows_per_second']:>9} rows/s")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
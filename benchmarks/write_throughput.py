@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Write throughput benchmark for Infrastructure Issue Reporter
+Measures sustained POST /api/issues inserts per second under N concurrent clients
+for the rollback-journal default, the WAL profile, and WAL with group commit
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Connection pragmas of each profile; 'group' also routes writes through the group-commit writer
+PROFILES = {
+    'rollback': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 5000},
+    'wal': None,  # The application's SQLITE_PRAGMAS
+    'group': None,
+}
+
+def percentile(values, fraction):
+    """Return the value at the given fraction of the sorted values"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_profile(profile, clients, requests_per_client):
+    """Run one measurement in this process against the database in DATABASE_URL"""
+    sys.path.insert(0, ROOT)
+    from src.main import app
+    from src.models.user import db
+
+    if PROFILES[profile] is not None:
+        app.config['SQLITE_PRAGMAS'].clear()
+        app.config['SQLITE_PRAGMAS'].update(PROFILES[profile])
+    app.config['GROUP_COMMIT'] = profile == 'group'
+    with app.app_context():
+        # Reconnect so every connection uses the profile's pragmas
+        db.engine.dispose()
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(clients + 1)
+
+    def client(number):
+        test_client = app.test_client()
+        start.wait()
+        for i in range(requests_per_client):
+            data = {
+                'title': f'Benchmark issue {number}-{i}',
+                'description': f'Pothole reported by client {number}, request {i}',
+                'category': 'road',
+                'severity': 'medium',
+                'latitude': str(40.0 + number * 0.01 + i * 0.0001),
+                'longitude': str(-74.0 - i * 0.0001),
+            }
+            began = time.perf_counter()
+            response = test_client.post('/api/issues', data=data)
+            elapsed = time.perf_counter() - began
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 201:
+                    errors.append(response.get_json().get('error'))
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - began
+
+    inserted = len(latencies) - len(errors)
+    return {
+        'profile': profile,
+        'clients': clients,
+        'requests': len(latencies),
+        'inserted': inserted,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'inserts_per_second': round(inserted / duration, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', default='1,8,32', help='Comma separated client counts')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per client')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma separated profiles')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args.child, int(args.clients), args.requests)))
+        return
+
+    results = []
+    for profile in args.profiles.split(','):
+        for clients in [int(n) for n in args.clients.split(',')]:
+            # Each run gets a fresh database and process, as pragmas apply per connection
+            with tempfile.TemporaryDirectory() as temp_dir:
+                env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--child', profile,
+                     '--clients', str(clients), '--requests', str(args.requests)],
+                    env=env, cwd=ROOT, capture_output=True, text=True, check=True
+                ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            if not args.json:
+                print(f"{profile:>9} {clients:>3} clients: {result['inserts_per_second']:>8} inserts/s  "
+                      f"p50 {result['p50_ms']:>7} ms  p95 {result['p95_ms']:>7} ms  "
+                      f"p99 {result['p99_ms']:>7} ms  errors {result['errors']}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
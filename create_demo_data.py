@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 """
 Demo data creation script for Infrastructure Issue Reporter
-Creates sample issues and admin user for testing
+Creates sample issues and admin user for testing, and optionally bulk-loads
+a seeded synthetic dataset (10k to millions of issues) for capacity planning
 """
 
 import os
 import sys
+import time
 import hashlib
+import argparse
+import math
 import uuid
 from datetime import datetime, timedelta
 import random
@@ -16,8 +20,52 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from src.models.user import User, db
 from src.models.issue import Issue
+from src.models.districts import load_districts, get_district_index, assign_row_districts
+from src.models.duplicates import insert_signed_issues
 from src.main import app
 
+# Synthetic issues fall inside this box (south, west, north, east)
+CITY_BOUNDS = (40.70, -74.02, 40.80, -73.93)
+# Share of issues placed around hotspots (busy junctions, old water mains); the rest are scattered
+HOTSPOT_SHARE = 0.8
+HOTSPOT_COUNT = 60
+CATEGORY_WEIGHTS = {'road': 45, 'water': 20, 'power': 15, 'other': 20}
+SEVERITY_WEIGHTS = {'low': 35, 'medium': 40, 'high': 18, 'critical': 7}
+# Mean days an issue spends in each status before moving on, by severity
+STAGE_MEAN_DAYS = {'critical': 0.5, 'high': 2, 'medium': 6, 'low': 15}
+# Share of reports that are never picked up
+STALLED_SHARE = 0.1
+SYNTHETIC_BATCH_SIZE = 10000
+# Synthetic ward boundaries: points per ward edge and how far the wavy edges swing, as a share of a ward's width
+WARD_EDGE_VERTICES = 40
+WARD_EDGE_AMPLITUDE = 0.15
+WARD_OUTER_MARGIN = 0.0001
+
+SYNTHETIC_TITLES = {
+    'road': ['Pothole on {street}', 'Cracked pavement on {street}', 'Faded crosswalk at {street}',
+             'Sinkhole forming on {street}', 'Missing road sign on {street}'],
+    'water': ['Water main leak on {street}', 'Blocked storm drain on {street}', 'Flooding near {street}',
+              'Low water pressure on {street}', 'Open hydrant on {street}'],
+    'power': ['Streetlight out on {street}', 'Flickering streetlight on {street}', 'Downed cable on {street}',
+              'Traffic signal dark at {street}', 'Sparking transformer on {street}'],
+    'other': ['Damaged bench on {street}', 'Graffiti on {street}', 'Broken drain cover on {street}',
+              'Fallen tree blocking {street}', 'Overflowing bins on {street}'],
+}
+SYNTHETIC_DETAILS = [
+    'It has been getting worse over the past few days.',
+    'Cars are swerving to avoid it, especially at night.',
+    'Pedestrians have to step into the street to get around it.',
+    'Several neighbours have noticed the same problem.',
+    'It is close to a school entrance and busy in the mornings.',
+    'The problem is worse after rain.',
+    'A temporary cone was placed but has since been knocked over.',
+    'It is right next to the bus stop.',
+]
+STREETS = ['Main Street', 'Oak Avenue', 'Elm Street', 'Pine Street', 'Broadway', 'Maple Drive',
+           'Cedar Lane', 'Park Avenue', 'Lexington Avenue', 'River Road', 'Hill Street', '2nd Avenue']
+FIRST_NAMES = ['John', 'Sarah', 'Mike', 'Lisa', 'Robert', 'Ana', 'Wei', 'Fatima', 'Carlos', 'Priya']
+LAST_NAMES = ['Smith', 'Johnson', 'Davis', 'Chen', 'Wilson', 'Garcia', 'Okafor', 'Khan', 'Novak', 'Patel']
+
 def generate_demo_filename(original_name):
     """Generate a demo filename for testing"""
     timestamp = str(datetime.utcnow().timestamp())
@@ -27,10 +75,135 @@ def generate_demo_filename(original_name):
     ext = original_name.rsplit('.', 1)[1].lower() if '.' in original_name else 'jpg'
     return f"{file_hash}.{ext}"
 
-def create_demo_data():
+def generate_synthetic_issues(count, seed=42, days=365, until=None):
+    """Yield count issue rows; the same seed and until give the same rows.
+
+    Locations cluster around hotspots, categories and severities are skewed, and
+    each issue has moved through the status lifecycle as far as its age allows.
+    """
+    rng = random.Random(seed)
+    until = until or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    south, west, north, east = CITY_BOUNDS
+    hotspots = [
+        (rng.uniform(south, north), rng.uniform(west, east), rng.uniform(0.0005, 0.004), rng.paretovariate(1.2))
+        for _ in range(HOTSPOT_COUNT)
+    ]
+    hotspot_weights = [weight for *_, weight in hotspots]
+    categories, category_weights = list(CATEGORY_WEIGHTS), list(CATEGORY_WEIGHTS.values())
+    severities, severity_weights = list(SEVERITY_WEIGHTS), list(SEVERITY_WEIGHTS.values())
+    lifecycle = ['reported', 'verified', 'in_progress', 'resolved']
+
+    for _ in range(count):
+        if rng.random() < HOTSPOT_SHARE:
+            center_lat, center_lng, spread, _ = rng.choices(hotspots, hotspot_weights)[0]
+            latitude = min(max(rng.gauss(center_lat, spread), south), north)
+            longitude = min(max(rng.gauss(center_lng, spread), west), east)
+        else:
+            latitude, longitude = rng.uniform(south, north), rng.uniform(west, east)
+
+        category = rng.choices(categories, category_weights)[0]
+        severity = rng.choices(severities, severity_weights)[0]
+        street = rng.choice(STREETS)
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+        # Report volume grows over the period: more recent days see more issues
+        created_at = until - timedelta(seconds=days * 86400 * (1 - rng.random() ** 0.5))
+
+        status, updated_at, resolved_at = 'reported', created_at, None
+        if rng.random() >= STALLED_SHARE:
+            moment = created_at
+            for next_status in lifecycle[1:]:
+                moment += timedelta(days=rng.expovariate(1 / STAGE_MEAN_DAYS[severity]))
+                if moment > until:
+                    break
+                status, updated_at = next_status, moment
+            if status == 'resolved':
+                resolved_at = updated_at
+
+        yield {
+            'title': rng.choice(SYNTHETIC_TITLES[category]).format(street=street),
+            'description': ' '.join(rng.sample(SYNTHETIC_DETAILS, rng.randint(2, 4))),
+            'category': category,
+            'severity': severity,
+            'status': status,
+            'latitude': round(latitude, 6),
+            'longitude': round(longitude, 6),
+            'address': f'{rng.randint(1, 999)} {street}, New York, NY',
+            'reporter_name': f'{first_name} {last_name}',
+            'reporter_email': f'{first_name}.{last_name}{rng.randint(1, 99)}@email.com'.lower(),
+            'reporter_phone': f'(555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}' if rng.random() < 0.4 else None,
+            'photo_filename': None,
+            'photo_original_name': None,
+            'admin_notes': 'Repair completed by the city crew.' if resolved_at and rng.random() < 0.5 else None,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'resolved_at': resolved_at,
+        }
+
+def synthetic_districts(per_side, vertices_per_edge=WARD_EDGE_VERTICES):
+    """Return {name: polygons} for per_side x per_side wards tiling CITY_BOUNDS.
+
+    The boundaries between ward columns are wavy, so the wards are not their
+    bounding boxes; neighbouring wards share the exact same edge vertices.
+    """
+    south, west, north, east = CITY_BOUNDS
+    width, height = (east - west) / per_side, (north - south) / per_side
+
+    def boundary_x(column, latitude):
+        # The city's outer edges are straight, just outside CITY_BOUNDS: the
+        # generator clamps issues onto the bounds, and points on the north and
+        # east edges of a polygon count as outside it
+        if column == 0:
+            return west - WARD_OUTER_MARGIN
+        if column == per_side:
+            return east + WARD_OUTER_MARGIN
+        phase = (latitude - south) / (north - south) * 2 * math.pi * per_side
+        return west + column * width + WARD_EDGE_AMPLITUDE * width * math.sin(phase + column)
+
+    districts = {}
+    for row in range(per_side):
+        bottom = south + row * height if row else south - WARD_OUTER_MARGIN
+        top = south + (row + 1) * height if row < per_side - 1 else north + WARD_OUTER_MARGIN
+        latitudes = [bottom + (top - bottom) * step / vertices_per_edge for step in range(vertices_per_edge + 1)]
+        for column in range(per_side):
+            right = [[boundary_x(column + 1, latitude), latitude] for latitude in latitudes]
+            left = [[boundary_x(column, latitude), latitude] for latitude in reversed(latitudes)]
+            ring = right + left
+            districts[f'Ward {row * per_side + column + 1}'] = [[ring + [ring[0]]]]
+    return districts
+
+def load_synthetic_issues(count, seed=42, days=365, batch_size=SYNTHETIC_BATCH_SIZE, until=None):
+    """Bulk-insert count synthetic issues and their signatures, one executemany and commit per batch"""
+    started = time.perf_counter()
+    district_index = get_district_index(app)
+    batch = []
+    inserted = 0
+    for row in generate_synthetic_issues(count, seed, days, until):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            assign_row_districts(batch, district_index)
+            insert_signed_issues(batch)
+            db.session.commit()
+            inserted += len(batch)
+            batch = []
+            print(f"  {inserted}/{count} issues ({inserted / (time.perf_counter() - started):.0f}/s)", flush=True)
+    if batch:
+        assign_row_districts(batch, district_index)
+        insert_signed_issues(batch)
+        db.session.commit()
+        inserted += len(batch)
+    return inserted
+
+def create_demo_data(synthetic_issues=0, seed=42, days=365, batch_size=SYNTHETIC_BATCH_SIZE, districts=0):
     """Create demo data for testing"""
     
     with app.app_context():
+        if districts:
+            loaded = load_districts(synthetic_districts(districts))
+            db.session.commit()
+            print(f"✓ Loaded {loaded} synthetic ward boundaries")
+        district_index = get_district_index(app)
+
         # Create admin user if it doesn't exist
         admin = User.query.filter_by(username='admin').first()
         if not admin:
@@ -134,6 +307,7 @@ def create_demo_data():
                     latitude=issue_data.get('latitude'),
                     longitude=issue_data.get('longitude'),
                     address=issue_data.get('address'),
+                    district=district_index.lookup(issue_data.get('latitude'), issue_data.get('longitude')),
                     reporter_name=issue_data.get('reporter_name'),
                     reporter_email=issue_data.get('reporter_email'),
                     reporter_phone=issue_data.get('reporter_phone'),
@@ -151,6 +325,10 @@ def create_demo_data():
         db.session.commit()
         
         print(f"✓ Created {created_count} demo issues")
+
+        if synthetic_issues:
+            inserted = load_synthetic_issues(synthetic_issues, seed, days, batch_size)
+            print(f"✓ Loaded {inserted} synthetic issues (seed {seed})")
         print(f"✓ Total issues in database: {Issue.query.count()}")
         
         print("\n" + "="*50)
@@ -164,5 +342,14 @@ def create_demo_data():
         print("="*50)
 
 if __name__ == '__main__':
-    create_demo_data()
+    parser = argparse.ArgumentParser(description='Create demo data for Infrastructure Issue Reporter')
+    parser.add_argument('--issues', type=int, default=0,
+                        help='Also bulk-load this many synthetic issues (e.g. 10000 to 5000000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the synthetic issues')
+    parser.add_argument('--days', type=int, default=365, help='Days of history the synthetic issues span')
+    parser.add_argument('--batch-size', type=int, default=SYNTHETIC_BATCH_SIZE, help='Rows per insert transaction')
+    parser.add_argument('--districts', type=int, default=0,
+                        help='Replace the district boundaries with an N x N grid of synthetic wards')
+    args = parser.parse_args()
+    create_demo_data(args.issues, args.seed, args.days, args.batch_size, args.districts)
 
@@ -0,0 +1,237 @@
+import os
+import io
+import gzip
+import json
+import click
+from concurrent.futures import as_completed
+from sqlalchemy import event
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.migrations import get_schema_version, run_migrations
+from src.models.spatial import rebuild_spatial_index
+from src.models.stats import rebuild_issue_counters, rebuild_district_counters
+from src.models.trends import rebuild_trend_rollups
+from src.models.archive import archive_resolved_issues, get_archive_count, DEFAULT_ARCHIVE_BATCH_SIZE
+from src.models.events import publish_issue_event
+from src.models.search import rebuild_search_index
+from src.models.ingest import ingest_issues, read_csv_records, read_ndjson_records
+from src.models.duplicates import dedup_backlog, rebuild_candidate_index
+from src.models.photo import collect_garbage, get_missing_variants, get_variant_executor, render_variants
+from src.models.upload import expire_uploads, active_upload_files, DEFAULT_UPLOAD_EXPIRY_HOURS
+from src.models.districts import (
+    read_district_features, load_districts, build_district_index, reassign_districts, DEFAULT_REASSIGN_BATCH_SIZE
+)
+
+# Representative requests for each read route, covering the filter combinations
+# the frontends use. The cursor placeholder is replaced with a real cursor.
+EXPLAIN_REQUESTS = [
+    '/api/issues',
+    '/api/issues?limit=100&fields=id,title,summary,category,severity,status,created_at',
+    '/api/issues?limit=100&cursor={cursor}',
+    '/api/issues?limit=100&include_archived=1',
+    '/api/issues?limit=100&status=reported',
+    '/api/issues?limit=100&category=road',
+    '/api/issues?limit=100&category=road&severity=high',
+    '/api/issues?limit=100&category=road&status=reported',
+    '/api/issues?limit=100&district=Ward%203',
+    '/api/issues?limit=100&created_from=2025-01-01&created_to=2025-12-31',
+    '/api/issues?limit=20&q=pothole main',
+    '/api/issues/map?bbox=-74.1,40.6,-73.7,40.9&zoom=11',
+    '/api/issues/map?bbox=-74.0,40.75,-73.98,40.77&zoom=16',
+    '/api/issues/{issue_id}',
+    '/api/issues/stats',
+    '/api/issues/trends?interval=week&category=road',
+    '/api/issues/heatmap/12/1206/1539?weight=severity&status=reported',
+    '/api/issues/export/csv?status=resolved',
+]
+
+def register_commands(app):
+    """Register the maintenance commands available through `flask --app src.main`"""
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats_command():
+        """Recompute the issue statistics counters from the issue table"""
+        rebuild_issue_counters()
+        rebuild_district_counters()
+        click.echo("✓ Rebuilt issue statistics counters")
+
+    @app.cli.command('rebuild-trends')
+    def rebuild_trends_command():
+        """Backfill the daily trend rollups from the issue table"""
+        rebuild_trend_rollups()
+        click.echo("✓ Rebuilt daily trend rollups")
+
+    @app.cli.command('rebuild-spatial-index')
+    def rebuild_spatial_index_command():
+        """Recompute the map and duplicate candidate R*Tree indexes from the issue table"""
+        rebuild_spatial_index()
+        rebuild_candidate_index()
+        click.echo("✓ Rebuilt spatial indexes")
+
+    @app.cli.command('import-issues')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'import_format', type=click.Choice(['csv', 'ndjson']),
+                  help='Input format (default: from the file extension)')
+    def import_issues_command(path, import_format):
+        """Bulk-import issues from a CSV or NDJSON export (optionally .gz)"""
+        name = path[:-3] if path.endswith('.gz') else path
+        import_format = import_format or name.rsplit('.', 1)[-1].lower()
+        if import_format not in ('csv', 'ndjson'):
+            raise click.UsageError('Cannot tell the format from the extension; pass --format')
+
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as raw:
+            text_stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+            reader = read_csv_records if import_format == 'csv' else read_ndjson_records
+            result = ingest_issues(reader(text_stream))
+
+        for error in result['errors']:
+            click.echo(f"✗ line {error['line']}: {error['error']}")
+        click.echo(f"✓ Imported {result['inserted']} issues ({result['failed']} rejected)")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Re-index all issues in the FTS5 full-text index"""
+        rebuild_search_index()
+        click.echo("✓ Rebuilt full-text search index")
+
+    @app.cli.command('gc-photos')
+    @click.option('--dry-run', is_flag=True, help='Only report what would be removed')
+    def gc_photos_command(dry_run):
+        """Remove photo blobs and upload files no issue references, and expired chunked uploads"""
+        upload_folder = app.config['UPLOAD_FOLDER']
+        expired = expire_uploads(
+            upload_folder, app.config.get('UPLOAD_EXPIRY_HOURS', DEFAULT_UPLOAD_EXPIRY_HOURS), dry_run=dry_run
+        )
+        released, removed = collect_garbage(upload_folder, dry_run=dry_run, keep=active_upload_files())
+        prefix = "Would remove" if dry_run else "✓ Removed"
+        click.echo(f"{prefix} {released} unreferenced blobs and {removed} orphaned files")
+        click.echo(f"{prefix} {expired} chunked uploads untouched for over "
+                   f"{app.config.get('UPLOAD_EXPIRY_HOURS', DEFAULT_UPLOAD_EXPIRY_HOURS)} hours")
+
+    @app.cli.command('backfill-photo-variants')
+    @click.option('--workers', default=4, show_default=True, help='Rendering processes')
+    def backfill_photo_variants_command(workers):
+        """Render missing thumbnail and medium variants for existing photos"""
+        upload_folder = app.config['UPLOAD_FOLDER']
+        executor = get_variant_executor(workers)
+        futures = {}
+        for filename in db.session.execute(db.text("SELECT filename FROM photo_blob")).scalars():
+            targets = get_missing_variants(filename, upload_folder)
+            source_path = os.path.join(upload_folder, filename)
+            if targets and os.path.exists(source_path):
+                futures[executor.submit(render_variants, source_path, targets)] = filename
+
+        rendered = failed = 0
+        for future in as_completed(futures):
+            if future.exception():
+                failed += 1
+                click.echo(f"✗ {futures[future]}: {future.exception()}")
+            else:
+                rendered += future.result()
+        click.echo(f"✓ Rendered {rendered} variants for {len(futures) - failed} photos ({failed} failed)")
+
+    @app.cli.command('dedup-issues')
+    @click.option('--dry-run', is_flag=True, help='Only report what would be linked')
+    def dedup_issues_command(dry_run):
+        """Sign existing issues and link near-duplicate reports to the first report"""
+        signed, linked = dedup_backlog(app.config, dry_run=dry_run)
+        prefix = "Would link" if dry_run else "✓ Linked"
+        click.echo(f"{prefix} {linked} duplicate issues ({signed} issues signed)")
+
+    @app.cli.command('load-districts')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--name-property', default='name', show_default=True,
+                  help='Feature property holding the district name')
+    @click.option('--reassign', is_flag=True, help='Reassign existing issues to the new boundaries')
+    def load_districts_command(path, name_property, reassign):
+        """Replace the district boundaries with the Polygon/MultiPolygon features of a GeoJSON file"""
+        try:
+            with open(path, encoding='utf-8') as geojson_file:
+                districts = read_district_features(json.load(geojson_file), name_property)
+        except ValueError as e:
+            raise click.ClickException(f"Invalid GeoJSON: {e}")
+
+        loaded = load_districts(districts)
+        db.session.commit()
+        click.echo(f"✓ Loaded {loaded} districts")
+        if reassign:
+            checked, changed = reassign_districts(build_district_index())
+            click.echo(f"✓ Reassigned {changed} of {checked} issues")
+        else:
+            click.echo("Existing issues keep their district until reassign-districts runs")
+
+    @app.cli.command('reassign-districts')
+    @click.option('--batch-size', type=click.IntRange(min=1), default=DEFAULT_REASSIGN_BATCH_SIZE, show_default=True,
+                  help='Issues looked up and updated per transaction')
+    @click.option('--dry-run', is_flag=True, help='Only report how many issues would change district')
+    def reassign_districts_command(batch_size, dry_run):
+        """Recompute the district of every live and archived issue from the loaded boundaries"""
+        checked, changed = reassign_districts(build_district_index(), batch_size, dry_run)
+        prefix = "Would reassign" if dry_run else "✓ Reassigned"
+        click.echo(f"{prefix} {changed} of {checked} issues")
+
+    @app.cli.command('archive-issues')
+    @click.option('--days', type=click.IntRange(min=1), default=lambda: app.config.get('ARCHIVE_AFTER_DAYS') or 365,
+                  show_default='ARCHIVE_AFTER_DAYS or 365', help='Archive issues resolved more than this many days ago')
+    @click.option('--batch-size', type=click.IntRange(min=1), default=DEFAULT_ARCHIVE_BATCH_SIZE, show_default=True,
+                  help='Issues moved per transaction')
+    def archive_issues_command(days, batch_size):
+        """Move old resolved issues from the live table to the archive"""
+        moved = archive_resolved_issues(days, batch_size)
+        if moved:
+            publish_issue_event('archived', {'archived': moved})
+        click.echo(f"✓ Archived {moved} issues resolved over {days} days ago ({get_archive_count()} in the archive)")
+
+    @app.cli.command('migrate')
+    def migrate_command():
+        """Apply pending schema migrations to the database"""
+        applied = run_migrations()
+        for version, description in applied:
+            click.echo(f"✓ Applied migration {version}: {description}")
+        click.echo(f"Schema version: {get_schema_version()}")
+
+    @app.cli.command('explain-queries')
+    def explain_queries_command():
+        """Print EXPLAIN QUERY PLAN for the SQL issued by each read route"""
+        latest = db.session.query(Issue.id, Issue.created_at) \
+            .order_by(Issue.created_at.desc(), Issue.id.desc()).first()
+        if latest is None:
+            click.echo("The issue table is empty; create some issues first")
+            return
+
+        from src.routes.issue import encode_cursor
+        placeholders = {'cursor': encode_cursor(latest.created_at, latest.id), 'issue_id': latest.id}
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        client = app.test_client()
+        # GET requests run on the read-only engine when there is one
+        engines = [engine for engine in (db.engine, app.extensions.get('read_engine')) if engine is not None]
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            for url in EXPLAIN_REQUESTS:
+                url = url.format(**placeholders)
+                statements.clear()
+                response = client.get(url)
+                # Consume streamed bodies so their queries run
+                response.get_data()
+
+                click.echo("=" * 70)
+                click.echo(f"GET {url} -> {response.status_code}")
+                for statement, parameters in statements:
+                    click.echo("-" * 70)
+                    click.echo(statement.strip())
+                    plan = db.session.connection().exec_driver_sql(
+                        f"EXPLAIN QUERY PLAN {statement}", tuple(parameters or ())
+                    )
+                    for row in plan:
+                        click.echo(f"  {row.detail}")
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', capture)
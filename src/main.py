@@ -3,13 +3,34 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from src.models.user import db
 from src.models.issue import Issue  # Import Issue model
+from src.models.stats import IssueCounter, IssueDistrictCounter  # Import so create_all() creates the counters tables
+from src.models.photo import PhotoBlob
+from src.models.duplicates import IssueSignature
+from src.models.changes import IssueTombstone
+from src.models.events import IssueEvent
+from src.models.trends import IssueDailyRollup, IssueResolutionRollup
+from src.models.heatmap import IssueHeatmapRegion
+from src.models.archive import ArchivedIssue, start_archiver
+from src.models.upload import PhotoUpload
+from src.models.districts import District
+from src.models.migrations import run_migrations
+from src.models.engine import (
+    SQLITE_PRAGMAS, SQLITE_ENGINE_OPTIONS, SQLITE_READ_ENGINE_OPTIONS, configure_sqlite, install_read_engine
+)
+from src.models.serialization import install_json_provider
+from src.models.compression import install_compression
+from src.models.assets import get_static_assets
+from src.models.metrics import install_metrics
 from src.routes.user import user_bp
 from src.routes.issue import issue_bp
 from src.routes.auth import auth_bp
+from src.routes.metrics import metrics_bp
+from src.routes.upload import upload_bp
+from src.commands import register_commands
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -25,37 +46,91 @@ os.makedirs(uploads_dir, exist_ok=True)
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(issue_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
+app.register_blueprint(metrics_bp, url_prefix='/api')
+app.register_blueprint(upload_bp, url_prefix='/api')
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(SQLITE_ENGINE_OPTIONS)  # Writer engine pool
+app.config['READ_ENGINE'] = True  # Serve GET requests of READ_BLUEPRINTS from read-only connections
+app.config['READ_ENGINE_OPTIONS'] = dict(SQLITE_READ_ENGINE_OPTIONS)  # Read-only pool sizing
+app.config['READ_BLUEPRINTS'] = ('issue', 'user')
+app.config['SQLITE_PRAGMAS'] = dict(SQLITE_PRAGMAS)  # WAL, busy_timeout, synchronous=NORMAL
+app.config['GROUP_COMMIT'] = False  # Batch concurrent submissions into shared transactions
+app.config['GROUP_COMMIT_MAX_BATCH'] = 100
+app.config['EVENT_BACKEND'] = 'memory'  # 'database' when running several worker processes
+app.config['EVENT_HISTORY'] = 1000  # Events kept for Last-Event-ID resumption
+app.config['FAST_JSON'] = True  # Serialize responses with orjson when it is installed
+app.config['COMPRESS_MIN_SIZE'] = 1024  # Gzip JSON and CSV responses from this many bytes
+app.config['COMPRESS_LEVEL'] = 6
+app.config['STATIC_ASSET_CACHE'] = True  # Preload and gzip static assets; restart to pick up edits
+app.config['SLOW_QUERY_SECONDS'] = 0.25  # Statements taking longer are logged as slow queries
+app.config['SLOW_QUERY_LOG'] = None  # Optional file receiving the slow query log
+app.config['N_PLUS_ONE_THRESHOLD'] = 10  # Repeats of one statement per request that trigger a warning
 app.config['UPLOAD_FOLDER'] = uploads_dir
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_PHOTO_SIZE'] = 16 * 1024 * 1024  # Largest photo accepted by chunked uploads
+app.config['UPLOAD_CHUNK_SIZE'] = 1024 * 1024  # Chunk size suggested to chunked upload clients
+app.config['UPLOAD_EXPIRY_HOURS'] = 24  # gc-photos removes chunked uploads untouched this long
+app.config['PHOTO_VARIANT_WORKERS'] = 2  # Processes rendering photo thumbnails
+app.config['DUPLICATE_RADIUS_METERS'] = 75  # Reports this close with similar text are linked
+app.config['DUPLICATE_SIMILARITY_THRESHOLD'] = 0.4
+app.config['DUPLICATE_WINDOW_DAYS'] = 30
+app.config['ARCHIVE_AFTER_DAYS'] = None  # Move issues resolved this many days ago to issue_archive
+app.config['ARCHIVE_INTERVAL_SECONDS'] = 3600  # Time between background archive passes
+app.config['ARCHIVE_BATCH_SIZE'] = 500  # Issues moved per transaction
+app.config['DISTRICT_REFRESH_SECONDS'] = 60  # How often a process checks for reloaded district boundaries
 
 # Session configuration
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+app.config['PRINCIPAL_CACHE_TTL'] = 10  # Seconds a signed session claim or cached user is trusted; bounds how long other workers miss a user change
+app.config['HEATMAP_CACHE_SIZE'] = 2048  # Heatmap tiles kept in memory per process
+app.config['MAP_DEFAULT_CENTER'] = (6.5244, 3.3792)  # Lagos; the map opens here until issues are geotagged
+app.config['MAP_DEFAULT_ZOOM'] = 11
 
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+def initialize_app(app):
+    """Connect the database, apply pending migrations and start the background services"""
+    install_json_provider(app)
+    install_compression(app)
+    db.init_app(app)
+    with app.app_context():
+        configure_sqlite(db.engine, app.config['SQLITE_PRAGMAS'])
+        db.create_all()
+        run_migrations()
+        read_engine = install_read_engine(app)
+        install_metrics(app, *filter(None, (db.engine, read_engine)))
+
+    register_commands(app)
+    start_archiver(app)
+    get_static_assets(app)  # Read and gzip the static assets now rather than on the first request
+
+# The photo variant workers are spawned processes, which import the main script
+# again as __mp_main__. Under `python src/main.py` that is this file, and the
+# workers must not migrate the database, start archivers or preload assets.
+if __name__ != '__mp_main__':
+    initialize_app(app)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    assets = get_static_assets(app)
+    if assets is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    if path != "":
+        response = assets.respond(path)
+        if response is not None:
+            return response
+
+    response = assets.respond('index.html')
+    if response is None:
+        return "index.html not found", 404
+    return response
 
 
 if __name__ == '__main__':
@@ -0,0 +1,154 @@
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.events import publish_issue_event
+
+logger = logging.getLogger(__name__)
+
+ISSUE_COLUMNS = [column.name for column in Issue.__table__.columns]
+
+class ArchivedIssue(db.Model):
+    """A resolved issue moved out of the live issue table by archive_resolved_issues().
+
+    The table mirrors the issue columns, so archived rows serialize, filter and
+    export exactly like live ones. Ids are kept, and issue lookups fall back to
+    the archive.
+    """
+    __table__ = db.Table(
+        'issue_archive',
+        *[db.Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable,
+                    autoincrement=False) for column in Issue.__table__.columns],
+        db.Column('archived_at', db.DateTime, nullable=False),
+        db.Index('ix_issue_archive_created_at_id', 'created_at', 'id'),
+    )
+
+    to_csv_dict = Issue.to_csv_dict
+
+    def __repr__(self):
+        return f'<ArchivedIssue {self.id}: {self.title}>'
+
+    def to_dict(self):
+        return {**Issue.to_dict(self), 'archived_at': self.archived_at.isoformat()}
+
+# The archive row is written before the live row is deleted, so delete triggers
+# use this condition to tell a move to the archive from a real deletion. It relies
+# on ids never being reused, which AUTOINCREMENT on the issue table guarantees.
+# Counters, trend rollups, photo references and duplicate links keep archived issues.
+NOT_ARCHIVED = "NOT EXISTS (SELECT 1 FROM issue_archive WHERE id = old.id)"
+
+DEFAULT_ARCHIVE_BATCH_SIZE = 500
+# Pause between batches so request writes get the database lock in between
+ARCHIVE_BATCH_PAUSE_SECONDS = 0.05
+DEFAULT_ARCHIVE_INTERVAL = 3600
+
+def all_issues_sql(*columns):
+    """SQL selecting columns from live and archived issues, for rebuilding derived tables"""
+    names = ', '.join(columns)
+    return f"SELECT {names} FROM issue UNION ALL SELECT {names} FROM issue_archive"
+
+def archive_resolved_issues(older_than_days, batch_size=DEFAULT_ARCHIVE_BATCH_SIZE,
+                            pause=ARCHIVE_BATCH_PAUSE_SECONDS):
+    """Move issues resolved more than older_than_days ago to the archive, returning the number moved.
+
+    Each batch is copied and deleted in its own short transaction, so the pass
+    can run next to live traffic and be interrupted at any point.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    issue, archive = Issue.__table__, ArchivedIssue.__table__
+    eligible = db.and_(
+        issue.c.status == 'resolved',
+        issue.c.resolved_at < cutoff
+    )
+
+    moved = 0
+    while True:
+        ids = db.session.execute(
+            db.select(issue.c.id).where(eligible).order_by(issue.c.resolved_at).limit(batch_size)
+        ).scalars().all()
+        # End the read transaction, so the move below starts with its write
+        db.session.commit()
+        if not ids:
+            return moved
+
+        try:
+            # The conditions are checked again: the rows may have changed since the read
+            db.session.execute(insert(archive).from_select(
+                ISSUE_COLUMNS + ['archived_at'],
+                db.select(*issue.c, db.literal(datetime.utcnow(), db.DateTime)).where(issue.c.id.in_(ids), eligible)
+            ))
+            deleted = db.session.execute(db.delete(issue).where(
+                issue.c.id.in_(db.select(archive.c.id).where(archive.c.id.in_(ids))), eligible
+            )).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        moved += deleted
+        if pause:
+            time.sleep(pause)
+
+def get_archive_count():
+    """Return the number of archived issues"""
+    return db.session.query(db.func.count(ArchivedIssue.id)).scalar()
+
+class IssueArchiver:
+    """Runs archive passes from a background thread every interval seconds.
+
+    With several worker processes each runs its own passes; a batch moves its
+    rows in one transaction, so concurrent passes never move an issue twice.
+    """
+
+    def __init__(self, app, older_than_days, interval=DEFAULT_ARCHIVE_INTERVAL,
+                 batch_size=DEFAULT_ARCHIVE_BATCH_SIZE):
+        self.app = app
+        self.older_than_days = older_than_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='issue-archiver', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def run_pass(self):
+        """Archive the eligible issues now, returning the number moved"""
+        with self.app.app_context():
+            try:
+                moved = archive_resolved_issues(self.older_than_days, self.batch_size)
+            finally:
+                db.session.remove()
+            if moved:
+                logger.info("Archived %d issues resolved over %d days ago", moved, self.older_than_days)
+                publish_issue_event('archived', {'archived': moved})
+            return moved
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.run_pass()
+            except Exception as e:
+                logger.warning("Archiving resolved issues failed: %s", e)
+
+def start_archiver(app):
+    """Start the background archiver when ARCHIVE_AFTER_DAYS is set, returning it (or None)"""
+    older_than_days = app.config.get('ARCHIVE_AFTER_DAYS')
+    if not older_than_days:
+        return None
+    archiver = app.extensions.get('issue_archiver')
+    if archiver is None:
+        archiver = IssueArchiver(
+            app, older_than_days,
+            app.config.get('ARCHIVE_INTERVAL_SECONDS', DEFAULT_ARCHIVE_INTERVAL),
+            app.config.get('ARCHIVE_BATCH_SIZE', DEFAULT_ARCHIVE_BATCH_SIZE)
+        )
+        app.extensions['issue_archiver'] = archiver.start()
+    return archiver
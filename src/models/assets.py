@@ -0,0 +1,174 @@
+import os
+import re
+import gzip
+import hashlib
+import threading
+import mimetypes
+from collections import OrderedDict
+from flask import current_app, request, send_file
+from werkzeug.security import safe_join
+from src.models.compression import accepts_gzip, DEFAULT_COMPRESS_LEVEL
+
+# Text assets read into memory and gzipped once at startup
+PRELOAD_MIMETYPES = {
+    'text/html', 'text/css', 'text/javascript', 'application/javascript', 'application/json',
+    'image/svg+xml', 'image/vnd.microsoft.icon', 'image/x-icon', 'text/plain'
+}
+MAX_PRELOAD_SIZE = 1024 * 1024
+# Other paths (photos, SPA routes) are looked up on first request; this many are remembered
+DEFAULT_LOOKUP_CACHE_SIZE = 4096
+# A name carrying a content hash (photo blobs, hashed bundles) never changes content
+FINGERPRINT_PATTERN = re.compile(r'(?:^|[.\-_])([0-9a-f]{16,})(?:\.|$)')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+_assets_lock = threading.Lock()
+
+class StaticAsset:
+    """A servable file below the static folder, with its body when preloaded"""
+
+    def __init__(self, full_path, mimetype, etag=None, fingerprinted=False, data=None, gzip_data=None):
+        self.full_path = full_path
+        self.mimetype = mimetype
+        self.etag = etag
+        self.fingerprinted = fingerprinted
+        self.data = data
+        self.gzip_data = gzip_data
+
+    @property
+    def cache_control(self):
+        return IMMUTABLE_CACHE_CONTROL if self.fingerprinted else REVALIDATE_CACHE_CONTROL
+
+class StaticAssetCache:
+    """Resolves request paths to static files without touching the filesystem each time.
+
+    Small text assets are read, hashed (strong ETag) and gzipped once when the
+    cache is built. Other paths are checked on first request and the outcome is
+    kept in a bounded LRU map. Misses below the dynamic directories (uploads)
+    are not remembered, since files appear there while the app runs.
+    """
+
+    def __init__(self, folder, dynamic_dirs=(), max_entries=DEFAULT_LOOKUP_CACHE_SIZE,
+                 compress_level=DEFAULT_COMPRESS_LEVEL, enabled=True):
+        self.folder = folder
+        self.dynamic_dirs = tuple(d.strip('/') + '/' for d in dynamic_dirs)
+        self.max_entries = max_entries
+        self.compress_level = compress_level
+        self.enabled = enabled
+        self.preloaded = {}
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if enabled:
+            self.preload()
+
+    def preload(self):
+        """Load and pre-compress the text assets outside the dynamic directories"""
+        for root, dirs, files in os.walk(self.folder):
+            relative_root = os.path.relpath(root, self.folder).replace(os.sep, '/')
+            prefix = '' if relative_root == '.' else relative_root + '/'
+            dirs[:] = [d for d in dirs if not (prefix + d + '/').startswith(self.dynamic_dirs)]
+            for name in files:
+                asset = self.load(prefix + name, preload=True)
+                if asset is not None and asset.data is not None:
+                    self.preloaded[prefix + name] = asset
+
+    def load(self, path, preload=False):
+        """Build the StaticAsset for a relative path, or return None if no such file exists"""
+        full_path = safe_join(self.folder, path)
+        if full_path is None or not os.path.isfile(full_path):
+            return None
+
+        mimetype = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        fingerprint = FINGERPRINT_PATTERN.search(os.path.basename(path))
+        if not preload or mimetype not in PRELOAD_MIMETYPES or os.path.getsize(full_path) > MAX_PRELOAD_SIZE:
+            # Served from disk; a content hash in the name is already a strong validator
+            return StaticAsset(full_path, mimetype, fingerprint.group(1) if fingerprint else None, bool(fingerprint))
+
+        with open(full_path, 'rb') as asset_file:
+            data = asset_file.read()
+        compressed = gzip.compress(data, compresslevel=self.compress_level, mtime=0)
+        return StaticAsset(
+            full_path, mimetype,
+            etag=hashlib.sha256(data).hexdigest()[:32],
+            fingerprinted=bool(fingerprint),
+            data=data,
+            gzip_data=compressed if len(compressed) < len(data) else None
+        )
+
+    def lookup(self, path):
+        """Return the StaticAsset for a relative path, or None if there is no such file"""
+        if not self.enabled:
+            return self.load(path)
+        asset = self.preloaded.get(path)
+        if asset is not None:
+            return asset
+
+        with self.lock:
+            if path in self.entries:
+                self.entries.move_to_end(path)
+                return self.entries[path]
+
+        asset = self.load(path)
+        if asset is not None or not path.startswith(self.dynamic_dirs):
+            with self.lock:
+                self.entries[path] = asset
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return asset
+
+    def forget(self, path):
+        with self.lock:
+            self.entries.pop(path, None)
+
+    def respond(self, path):
+        """Return the response serving a static path, or None if there is no such file"""
+        asset = self.lookup(path)
+        if asset is None:
+            return None
+
+        if asset.data is None:
+            try:
+                response = send_file(asset.full_path, mimetype=asset.mimetype, etag=asset.etag or True, conditional=True)
+            except FileNotFoundError:
+                # Removed since it was cached (e.g. an orphaned photo blob)
+                self.forget(path)
+                return None
+            response.headers['Cache-Control'] = asset.cache_control
+            return response
+
+        use_gzip = asset.gzip_data is not None and accepts_gzip()
+        etag = f"{asset.etag}-gzip" if use_gzip else asset.etag
+        response = current_app.response_class(mimetype=asset.mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = asset.cache_control
+        if asset.gzip_data is not None:
+            response.vary.add('Accept-Encoding')
+
+        if request.if_none_match.contains_weak(etag):
+            response.status_code = 304
+            return response
+
+        if use_gzip:
+            response.set_data(asset.gzip_data)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response.set_data(asset.data)
+        return response
+
+def get_static_assets(app):
+    """Return the application's static asset cache, building it on first use"""
+    if app.static_folder is None:
+        return None
+    with _assets_lock:
+        assets = app.extensions.get('static_assets')
+        if assets is None:
+            upload_folder = os.path.relpath(app.config['UPLOAD_FOLDER'], app.static_folder).replace(os.sep, '/')
+            assets = StaticAssetCache(
+                app.static_folder,
+                dynamic_dirs=[] if upload_folder.startswith('..') else [upload_folder],
+                max_entries=app.config.get('STATIC_LOOKUP_CACHE_SIZE', DEFAULT_LOOKUP_CACHE_SIZE),
+                compress_level=app.config.get('COMPRESS_LEVEL', DEFAULT_COMPRESS_LEVEL),
+                enabled=app.config.get('STATIC_ASSET_CACHE', True)
+            )
+            app.extensions['static_assets'] = assets
+    return assets
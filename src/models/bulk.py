@@ -0,0 +1,71 @@
+from datetime import datetime
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.archive import ArchivedIssue
+from src.models.events import EVENT_FIELDS
+
+# Issues one bulk request may select, by ids or by filter
+MAX_BULK_ISSUES = 1000
+BULK_FIELDS = ('status', 'severity', 'admin_notes')
+
+def event_columns():
+    return [Issue.__table__.c[field] for field in EVENT_FIELDS]
+
+def returned_event_data(row):
+    """Event data from a RETURNING row, in the same form as issue_event_data()"""
+    return {
+        field: value.isoformat() if isinstance(value, datetime) else value
+        for field, value in zip(EVENT_FIELDS, row)
+    }
+
+def bulk_results(requested, changed, outcome):
+    """Return per-id results: outcome for the changed ids, archived or not_found for the other requested ids.
+
+    With a filter (requested is None) only the changed ids are listed.
+    """
+    if requested is None:
+        return [{'id': issue_id, 'result': outcome} for issue_id in sorted(changed)]
+
+    missing = [issue_id for issue_id in requested if issue_id not in changed]
+    archived = set(db.session.execute(
+        db.select(ArchivedIssue.id).where(ArchivedIssue.id.in_(missing))
+    ).scalars()) if missing else set()
+    return [
+        {'id': issue_id,
+         'result': outcome if issue_id in changed else 'archived' if issue_id in archived else 'not_found'}
+        for issue_id in requested
+    ]
+
+def apply_bulk_update(ids, selection, changes):
+    """Apply changes to the selected issues with one UPDATE, returning (results, event data).
+
+    selection is the id list itself or a SELECT of ids, and ids the requested
+    list (None for a filter). Issues becoming resolved get resolved_at; issues
+    that already were keep theirs.
+    """
+    now = datetime.utcnow()
+    values = dict(changes, updated_at=now)
+    if changes.get('status') == 'resolved':
+        # SET expressions see the row as it was before the UPDATE
+        values['resolved_at'] = db.case((Issue.status != 'resolved', now), else_=Issue.resolved_at)
+
+    rows = db.session.execute(
+        db.update(Issue).where(Issue.id.in_(selection)).values(**values).returning(*event_columns()),
+        execution_options={'synchronize_session': False}
+    ).all()
+    events = [returned_event_data(row) for row in rows]
+    return bulk_results(ids, {event['id'] for event in events}, 'updated'), events
+
+def apply_bulk_delete(ids, selection):
+    """Delete the selected issues with one DELETE, returning (results, event data, photo filenames).
+
+    The photo files are left to release_photos(): triggers have already
+    dropped the blob references by the time the DELETE returns.
+    """
+    rows = db.session.execute(
+        db.delete(Issue).where(Issue.id.in_(selection)).returning(*event_columns(), Issue.photo_filename),
+        execution_options={'synchronize_session': False}
+    ).all()
+    events = [returned_event_data(row) for row in rows]
+    photos = {row.photo_filename for row in rows if row.photo_filename}
+    return bulk_results(ids, {event['id'] for event in events}, 'deleted'), events, photos
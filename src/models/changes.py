@@ -0,0 +1,67 @@
+from src.models.user import db
+from src.models.duplicates import DUPLICATE_DDL
+
+class IssueTombstone(db.Model):
+    """Marks a deleted issue so polling clients can drop it from their copy"""
+    __tablename__ = 'issue_tombstone'
+
+    issue_id = db.Column(db.Integer, primary_key=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IssueTombstone {self.issue_id}>'
+
+# SQLite timestamp in the format SQLAlchemy stores DateTime columns in, so
+# trigger-written values compare correctly with those written by the application
+SQL_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'"
+
+# issue_version counts every write to the issue table. It versions the list and
+# stats responses (ETag) without scanning the table.
+CHANGES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS issue_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO issue_version (id, version) VALUES (1, 0)",
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_changes_insert AFTER INSERT ON issue
+    BEGIN
+        DELETE FROM issue_tombstone WHERE issue_id = new.id;
+        UPDATE issue_version SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_changes_update AFTER UPDATE ON issue
+    BEGIN
+        UPDATE issue_version SET version = version + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_changes_delete AFTER DELETE ON issue
+    BEGIN
+        INSERT OR REPLACE INTO issue_tombstone (issue_id, deleted_at) VALUES (old.id, {SQL_NOW});
+        UPDATE issue_version SET version = version + 1;
+    END
+    """
+]
+
+def install_change_tracking():
+    """Create the tombstone and version tables and the triggers maintaining them"""
+    IssueTombstone.__table__.create(bind=db.session.connection(), checkfirst=True)
+    for statement in CHANGES_DDL:
+        db.session.execute(db.text(statement))
+
+    # Issues whose duplicate link is cleared by a delete must show up as changed
+    db.session.execute(db.text("DROP TRIGGER IF EXISTS issue_duplicate_delete"))
+    for statement in DUPLICATE_DDL:
+        db.session.execute(db.text(statement))
+
+def get_issue_version():
+    """Return the number of writes made to the issue table so far"""
+    return db.session.execute(db.text("SELECT version FROM issue_version")).scalar() or 0
+
+def bump_issue_version():
+    """Invalidate the versioned responses after a write the issue triggers do not see (the archive)"""
+    db.session.execute(db.text("UPDATE issue_version SET version = version + 1"))
@@ -0,0 +1,74 @@
+import gzip
+import zlib
+from flask import request
+
+# Response types compressed by default; everything else is sent as is.
+# The event stream (text/event-stream) is not listed: gzip would hold events back.
+DEFAULT_COMPRESS_MIMETYPES = ('application/json', 'text/csv', 'application/x-ndjson')
+# Smaller bodies gain little and cost a compression call each
+DEFAULT_COMPRESS_MIN_SIZE = 1024
+DEFAULT_COMPRESS_LEVEL = 6
+
+def accepts_gzip():
+    """Return True if the request's Accept-Encoding allows a gzip-encoded response"""
+    return request.accept_encodings['gzip'] > 0
+
+def gzip_stream(chunks, level=DEFAULT_COMPRESS_LEVEL):
+    """Compress a stream of text or bytes chunks into a single gzip member on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def compress_response(response, mimetypes, min_size, level):
+    """Gzip a response body when the client accepts it and it is worth it.
+
+    Buffered bodies are compressed in place. Streamed bodies (unpaged lists,
+    exports) are compressed chunk by chunk as they are generated, without a
+    Content-Length. Responses that already carry a Content-Encoding are left alone.
+    """
+    if response.mimetype not in mimetypes or response.direct_passthrough:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if response.status_code < 200 or response.status_code in (204, 304) or \
+            'Content-Encoding' in response.headers or 'no-transform' in response.headers.get('Cache-Control', ''):
+        return response
+    if not response.is_streamed and response.content_length is not None and response.content_length < min_size:
+        return response
+    if not accepts_gzip():
+        return response
+
+    if response.is_streamed:
+        body = response.response
+        response.response = gzip_stream(body, level)
+        # The wrapped iterator must still be closed, e.g. to end a stream_with_context
+        if hasattr(body, 'close'):
+            response.call_on_close(body.close)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        compressed = gzip.compress(data, compresslevel=level, mtime=0)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = 'gzip'
+    # The compressed body is a different representation, so a strong validator becomes weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def install_compression(app):
+    """Compress JSON and CSV responses above COMPRESS_MIN_SIZE bytes for clients accepting gzip"""
+    @app.after_request
+    def compress(response):
+        return compress_response(
+            response,
+            app.config.get('COMPRESS_MIMETYPES', DEFAULT_COMPRESS_MIMETYPES),
+            app.config.get('COMPRESS_MIN_SIZE', DEFAULT_COMPRESS_MIN_SIZE),
+            app.config.get('COMPRESS_LEVEL', DEFAULT_COMPRESS_LEVEL)
+        )
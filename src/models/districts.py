@@ -0,0 +1,295 @@
+import json
+import math
+import time
+import threading
+from datetime import datetime
+import numpy as np
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.archive import ArchivedIssue
+from src.models.changes import bump_issue_version
+from src.models.stats import rebuild_district_counters
+
+class District(db.Model):
+    """A ward or council district boundary loaded from GeoJSON.
+
+    geometry holds a GeoJSON MultiPolygon; the bounding box columns feed the
+    grid of DistrictIndex. Issues store the district name they fall in.
+    """
+    __tablename__ = 'district'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    geometry = db.Column(db.Text, nullable=False)
+    min_lat = db.Column(db.Float, nullable=False)
+    min_lng = db.Column(db.Float, nullable=False)
+    max_lat = db.Column(db.Float, nullable=False)
+    max_lng = db.Column(db.Float, nullable=False)
+    loaded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<District {self.name}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'bbox': [self.min_lng, self.min_lat, self.max_lng, self.max_lat],
+        }
+
+# Grid cells per side for each square root of the district count; a city of
+# 50 wards gets a 15x15 grid, so a cell overlaps only a handful of bounding boxes
+GRID_CELLS_PER_DISTRICT = 2
+MAX_GRID_CELLS = 256
+# Point x edge comparisons per NumPy step of the point-in-polygon test
+POINT_EDGE_BUDGET = 1_000_000
+DEFAULT_REASSIGN_BATCH_SIZE = 5000
+# How often a process checks whether the boundaries were reloaded
+DEFAULT_DISTRICT_REFRESH_SECONDS = 60
+
+def read_district_features(geojson, name_property='name'):
+    """Return {name: [polygon coordinates, ...]} from a GeoJSON FeatureCollection, raising ValueError if invalid.
+
+    Features sharing a name are merged into one district.
+    """
+    kind = geojson.get('type') if isinstance(geojson, dict) else None
+    if kind == 'FeatureCollection':
+        features = geojson.get('features') or []
+    elif kind == 'Feature':
+        features = [geojson]
+    else:
+        raise ValueError('expected a GeoJSON FeatureCollection')
+
+    districts = {}
+    for number, feature in enumerate(features, 1):
+        if not isinstance(feature, dict):
+            raise ValueError(f'feature {number} is not an object')
+        name = str((feature.get('properties') or {}).get(name_property) or '').strip()
+        if not name:
+            raise ValueError(f'feature {number} has no {name_property!r} property')
+        if len(name) > District.name.type.length:
+            raise ValueError(f'feature {number}: name longer than {District.name.type.length} characters')
+
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry.get('coordinates')]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry.get('coordinates')
+        else:
+            raise ValueError(f'feature {number} ({name}): geometry must be a Polygon or MultiPolygon')
+        if not isinstance(polygons, list) or not polygons:
+            raise ValueError(f'feature {number} ({name}): geometry has no coordinates')
+        for polygon in polygons:
+            if not isinstance(polygon, list) or not polygon or not all(valid_ring(ring) for ring in polygon):
+                raise ValueError(f'feature {number} ({name}): every ring needs at least 4 [longitude, latitude] positions')
+        districts.setdefault(name, []).extend(polygons)
+    return districts
+
+def valid_ring(ring):
+    """Whether a GeoJSON linear ring has at least 4 finite [longitude, latitude] positions"""
+    try:
+        points = np.asarray(ring, dtype=float)
+    except (TypeError, ValueError):
+        return False
+    return points.ndim == 2 and points.shape[0] >= 4 and points.shape[1] >= 2 and bool(np.isfinite(points).all())
+
+def polygon_edges(polygons):
+    """Return the (x1, y1, x2, y2) edge arrays of every ring of the polygons"""
+    starts, ends = [], []
+    for polygon in polygons:
+        for ring in polygon:
+            points = np.asarray(ring, dtype=float)[:, :2]
+            starts.append(points)
+            ends.append(np.roll(points, -1, axis=0))
+    starts, ends = np.concatenate(starts), np.concatenate(ends)
+    return starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+
+def points_in_rings(xs, ys, edges):
+    """Even-odd point-in-polygon test of many points against all rings of a district.
+
+    Counting crossings over every ring handles holes and multi-part districts.
+    """
+    x1, y1, x2, y2 = edges
+    inside = np.zeros(len(xs), dtype=bool)
+    step = max(1, POINT_EDGE_BUDGET // len(x1))
+    for start in range(0, len(xs), step):
+        px = xs[start:start + step, None]
+        py = ys[start:start + step, None]
+        straddles = (y1 > py) != (y2 > py)
+        # Horizontal edges divide by zero, but never straddle
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing_x = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+        inside[start:start + step] = np.count_nonzero(straddles & (px < crossing_x), axis=1) % 2 == 1
+    return inside
+
+class DistrictIndex:
+    """Uniform grid over district bounding boxes, with exact point-in-polygon tests.
+
+    Every cell lists the districts whose bounding box overlaps it, so a point is
+    tested only against the polygons near it. Points are grouped by cell and
+    each group is tested in one vectorized call.
+    """
+
+    def __init__(self, districts):
+        self.names = [name for name, _ in districts]
+        self.edges = [polygon_edges(polygons) for _, polygons in districts]
+        self.boxes = np.array([[x1.min(), y1.min(), x1.max(), y1.max()] for x1, y1, _, _ in self.edges]).reshape(-1, 4)
+        if not self.names:
+            self.cells = []
+            return
+
+        self.min_x, self.min_y = self.boxes[:, 0].min(), self.boxes[:, 1].min()
+        self.size = max(1, min(MAX_GRID_CELLS, math.ceil(math.sqrt(len(self.names)) * GRID_CELLS_PER_DISTRICT)))
+        self.cell_width = max(self.boxes[:, 2].max() - self.min_x, 1e-9) / self.size
+        self.cell_height = max(self.boxes[:, 3].max() - self.min_y, 1e-9) / self.size
+
+        self.cells = [[] for _ in range(self.size * self.size)]
+        columns = self._grid(self.boxes[:, [0, 2]], self.min_x, self.cell_width)
+        rows = self._grid(self.boxes[:, [1, 3]], self.min_y, self.cell_height)
+        for district, ((first_column, last_column), (first_row, last_row)) in enumerate(zip(columns, rows)):
+            for row in range(first_row, last_row + 1):
+                for column in range(first_column, last_column + 1):
+                    self.cells[row * self.size + column].append(district)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _grid(self, values, origin, cell_size):
+        return np.clip(np.floor((values - origin) / cell_size), 0, self.size - 1).astype(int)
+
+    def assign_many(self, latitudes, longitudes):
+        """Return the district name of each point, or None outside every district"""
+        xs = np.asarray(longitudes, dtype=float).reshape(-1)
+        ys = np.asarray(latitudes, dtype=float).reshape(-1)
+        result = np.full(len(xs), -1)
+        if not self.names or not len(xs):
+            return [None] * len(xs)
+
+        # Points outside the grid (or without coordinates) get no cell
+        valid = np.isfinite(xs) & np.isfinite(ys) & \
+            (xs >= self.min_x) & (xs <= self.min_x + self.cell_width * self.size) & \
+            (ys >= self.min_y) & (ys <= self.min_y + self.cell_height * self.size)
+        points = np.nonzero(valid)[0]
+        cells = self._grid(ys[points], self.min_y, self.cell_height) * self.size + \
+            self._grid(xs[points], self.min_x, self.cell_width)
+        order = np.argsort(cells, kind='stable')
+        cell_ids, starts = np.unique(cells[order], return_index=True)
+
+        for cell, group in zip(cell_ids, np.split(points[order], starts[1:])):
+            for district in self.cells[cell]:
+                pending = group[result[group] < 0]
+                min_x, min_y, max_x, max_y = self.boxes[district]
+                pending = pending[(xs[pending] >= min_x) & (xs[pending] <= max_x) &
+                                  (ys[pending] >= min_y) & (ys[pending] <= max_y)]
+                if pending.size:
+                    inside = points_in_rings(xs[pending], ys[pending], self.edges[district])
+                    result[pending[inside]] = district
+
+        return [self.names[district] if district >= 0 else None for district in result]
+
+    def lookup(self, latitude, longitude):
+        """Return the district name of one point, or None"""
+        if latitude is None or longitude is None:
+            return None
+        return self.assign_many([latitude], [longitude])[0]
+
+def load_districts(districts):
+    """Replace the stored boundaries with {name: polygons}, returning the number of districts; the caller commits"""
+    now = datetime.utcnow()
+    db.session.execute(db.delete(District))
+    for name, polygons in sorted(districts.items()):
+        x1, y1, _, _ = polygon_edges(polygons)
+        db.session.add(District(
+            name=name, geometry=json.dumps({'type': 'MultiPolygon', 'coordinates': polygons}),
+            min_lat=float(y1.min()), min_lng=float(x1.min()), max_lat=float(y1.max()), max_lng=float(x1.max()),
+            loaded_at=now
+        ))
+    return len(districts)
+
+def build_district_index():
+    """Build a DistrictIndex from the stored boundaries"""
+    rows = db.session.execute(db.select(District.name, District.geometry).order_by(District.id)).all()
+    return DistrictIndex([(name, json.loads(geometry)['coordinates']) for name, geometry in rows])
+
+class DistrictIndexCache:
+    """The process's DistrictIndex, rebuilt when another process reloads the boundaries.
+
+    Whether they changed is checked at most every refresh_seconds, with one
+    aggregate over the small district table.
+    """
+
+    def __init__(self, refresh_seconds=DEFAULT_DISTRICT_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.index = None
+        self.fingerprint = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.index is not None and time.monotonic() - self.checked < self.refresh_seconds:
+            return self.index
+        with self.lock:
+            fingerprint = tuple(db.session.execute(
+                db.select(db.func.count(District.id), db.func.max(District.loaded_at))
+            ).one())
+            if self.index is None or fingerprint != self.fingerprint:
+                self.index = build_district_index()
+                self.fingerprint = fingerprint
+            self.checked = time.monotonic()
+            return self.index
+
+def get_district_index(app):
+    """Return the application's current DistrictIndex"""
+    cache = app.extensions.get('district_index')
+    if cache is None:
+        cache = app.extensions.setdefault('district_index', DistrictIndexCache(
+            app.config.get('DISTRICT_REFRESH_SECONDS', DEFAULT_DISTRICT_REFRESH_SECONDS)
+        ))
+    return cache.get()
+
+def assign_row_districts(rows, index):
+    """Set 'district' on insert rows from their coordinates with one vectorized lookup"""
+    names = index.assign_many([row.get('latitude') for row in rows], [row.get('longitude') for row in rows])
+    for row, name in zip(rows, names):
+        row['district'] = name
+    return rows
+
+def reassign_districts(index, batch_size=DEFAULT_REASSIGN_BATCH_SIZE, dry_run=False):
+    """Recompute the district of every live and archived issue, returning (checked, changed).
+
+    Issues are read in id order, assigned in one vectorized lookup per batch
+    and only the changed rows are written, one transaction per batch. Live
+    issues whose district changes get a new updated_at, so polling clients
+    pick them up. The archive has no counter triggers, so the district
+    counters are recomputed at the end.
+    """
+    checked = changed = 0
+    for table in (Issue.__table__, ArchivedIssue.__table__):
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                db.select(table.c.id, table.c.latitude, table.c.longitude, table.c.district)
+                .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            names = index.assign_many([row.latitude for row in rows], [row.longitude for row in rows])
+            updates = [{'issue_id': row.id, 'district': name} for row, name in zip(rows, names) if name != row.district]
+            checked += len(rows)
+            changed += len(updates)
+
+            if updates and not dry_run:
+                values = {'district': db.bindparam('district')}
+                if table is Issue.__table__:
+                    values['updated_at'] = datetime.utcnow()
+                db.session.execute(
+                    db.update(table).where(table.c.id == db.bindparam('issue_id')).values(**values), updates
+                )
+            db.session.commit()
+
+    if changed and not dry_run:
+        rebuild_district_counters(commit=False)
+        bump_issue_version()
+        db.session.commit()
+    return checked, changed
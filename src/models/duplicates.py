@@ -0,0 +1,312 @@
+import re
+import math
+import zlib
+import random
+import numpy as np
+from sqlalchemy import column, insert, table
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.archive import NOT_ARCHIVED
+
+class IssueSignature(db.Model):
+    """MinHash signature of an issue's title and description, used to spot re-reports"""
+    __tablename__ = 'issue_signature'
+
+    issue_id = db.Column(db.Integer, db.ForeignKey('issue.id'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return f'<IssueSignature {self.issue_id}>'
+
+DUPLICATE_DDL = [
+    # Duplicates of an archived issue keep pointing at it; issue lookups find it in the archive
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_duplicate_delete AFTER DELETE ON issue
+    BEGIN
+        DELETE FROM issue_signature WHERE issue_id = old.id;
+        UPDATE issue SET duplicate_of_id = NULL, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'
+        WHERE duplicate_of_id = old.id AND {NOT_ARCHIVED};
+    END
+    """
+]
+
+# R*Tree over (latitude, longitude, day of creation) holding only the open
+# geotagged issues, with the category as an auxiliary column: the candidates of
+# the duplicate check. The map's issue_rtree has no time dimension, so in a
+# hotspot it returns every report of the past years for the check to discard.
+issue_candidate_rtree = table(
+    'issue_candidate_rtree',
+    column('id'),
+    column('min_lat'),
+    column('max_lat'),
+    column('min_lng'),
+    column('max_lng'),
+    column('min_day'),
+    column('max_day'),
+    column('category')
+)
+
+# Days since J2000; small enough for the R*Tree's 32-bit floats to keep ~1.5 minute steps
+_EPOCH = datetime(2000, 1, 1, 12)
+_CANDIDATE_ROW = """
+    SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude,
+           julianday(new.created_at) - 2451545.0, julianday(new.created_at) - 2451545.0, new.category
+    WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL AND new.status != 'resolved'
+"""
+
+CANDIDATE_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS issue_candidate_rtree
+    USING rtree(id, min_lat, max_lat, min_lng, max_lng, min_day, max_day, +category)
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_candidate_insert AFTER INSERT ON issue
+    BEGIN
+        INSERT INTO issue_candidate_rtree {_CANDIDATE_ROW};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_candidate_update
+    AFTER UPDATE OF latitude, longitude, category, status, created_at ON issue
+    BEGIN
+        DELETE FROM issue_candidate_rtree WHERE id = old.id;
+        INSERT INTO issue_candidate_rtree {_CANDIDATE_ROW};
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_candidate_delete AFTER DELETE ON issue
+    BEGIN
+        DELETE FROM issue_candidate_rtree WHERE id = old.id;
+    END
+    """
+]
+
+# Defaults, overridable through the DUPLICATE_* app config keys
+DEFAULT_RADIUS_METERS = 75
+DEFAULT_SIMILARITY_THRESHOLD = 0.4
+DEFAULT_WINDOW_DAYS = 30
+# Caps the work per submission so the check stays in the low milliseconds
+MAX_CANDIDATES = 200
+
+SHINGLE_SIZE = 4
+MAX_TEXT_LENGTH = 1000
+NUM_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20250701)
+# Fixed seed: signatures stored in the database must stay comparable across restarts
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+# The permutations as uint64 columns, with a split at bit 29 so every product fits in 64 bits
+_P = np.uint64(_MERSENNE_PRIME)
+_A = np.array([a for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+_B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+_A_HIGH, _A_LOW = _A >> np.uint64(29), _A & np.uint64((1 << 29) - 1)
+EARTH_RADIUS_METERS = 6371000
+
+def install_duplicate_detection():
+    """Create the signature table, the candidate index and their triggers, populating the index on first install"""
+    IssueSignature.__table__.create(bind=db.session.connection(), checkfirst=True)
+    existing = db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'issue_candidate_rtree'"
+    )).first()
+
+    for statement in DUPLICATE_DDL + CANDIDATE_INDEX_DDL:
+        db.session.execute(db.text(statement))
+
+    if not existing:
+        rebuild_candidate_index(commit=False)
+
+def rebuild_candidate_index(commit=True):
+    """Recompute the duplicate candidate index from the issue table"""
+    db.session.execute(db.text("DELETE FROM issue_candidate_rtree"))
+    db.session.execute(db.text("""
+        INSERT INTO issue_candidate_rtree
+        SELECT id, latitude, latitude, longitude, longitude,
+               julianday(created_at) - 2451545.0, julianday(created_at) - 2451545.0, category
+        FROM issue
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL AND status != 'resolved'
+    """))
+    if commit:
+        db.session.commit()
+
+def day_number(moment):
+    """Days since J2000, as stored in the candidate index"""
+    return (moment - _EPOCH).total_seconds() / 86400
+
+def shingles(title, description):
+    """Return the hashed character shingles of the normalised issue text"""
+    text = ' '.join(re.findall(r'\w+', f'{title} {description}'.lower()))[:MAX_TEXT_LENGTH]
+    if len(text) < SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())}
+    return {zlib.crc32(text[i:i + SHINGLE_SIZE].encode()) for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def _mod_mersenne(x):
+    """Reduce values below 2**63 modulo 2**61 - 1 (with 2**61 = 1, the high bits fold back in)"""
+    x = (x & _P) + (x >> np.uint64(61))
+    return np.where(x >= _P, x - _P, x)
+
+def minhash(title, description):
+    """Return the MinHash signature of the issue text as bytes.
+
+    Computes min((a * h + b) % p) & 0xFFFFFFFF for every permutation over all
+    shingles at once. a * h overflows 64 bits, so a is split into a_high * 2**29
+    + a_low and a_high * h * 2**29 reduced first; the result is bit-identical to
+    the plain integer arithmetic, so stored signatures stay comparable.
+    """
+    hashes = np.fromiter(shingles(title, description), dtype=np.uint64)[None, :]
+    high = _A_HIGH * hashes
+    x = (high >> np.uint64(32)) + ((high & np.uint64(0xFFFFFFFF)) << np.uint64(29)) + _A_LOW * hashes + _B
+    signature = _mod_mersenne(_mod_mersenne(x)).min(axis=1) & np.uint64(0xFFFFFFFF)
+    return signature.astype(np.uint32).tobytes()
+
+def similarities(signature, others):
+    """Estimate the Jaccard similarity of a text with each of several others from their signatures"""
+    if not others:
+        return np.zeros(0)
+    first = np.frombuffer(signature, dtype=np.uint32)
+    rest = np.frombuffer(b''.join(others), dtype=np.uint32).reshape(len(others), NUM_PERMUTATIONS)
+    return (rest == first).mean(axis=1)
+
+def insert_signed_issues(rows):
+    """Insert issue rows with one executemany, storing their signatures in the same transaction.
+
+    Bulk-loaded issues are signed up front so the submission-time check never
+    has to hash candidates itself. Returns the new issue ids.
+    """
+    issue_ids = db.session.execute(
+        insert(Issue.__table__).returning(Issue.__table__.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    db.session.execute(insert(IssueSignature), [
+        {'issue_id': issue_id, 'signature': minhash(values['title'], values['description'])}
+        for issue_id, values in zip(issue_ids, rows)
+    ])
+    return issue_ids
+
+def distance_meters(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points (haversine)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+def find_duplicate(latitude, longitude, category, signature, config, created_before=None, exclude_id=None,
+                   sign_missing=False):
+    """Return (issue_id, score) of the best earlier report of the same problem, or None.
+
+    Candidates are the open issues of the same category within the configured
+    radius and time window, looked up in issue_candidate_rtree, the most recent
+    MAX_CANDIDATES first. Issues without a stored signature are skipped unless
+    sign_missing is set; dedup-issues signs them.
+    """
+    if latitude is None or longitude is None:
+        return None
+
+    radius = config.get('DUPLICATE_RADIUS_METERS', DEFAULT_RADIUS_METERS)
+    threshold = config.get('DUPLICATE_SIMILARITY_THRESHOLD', DEFAULT_SIMILARITY_THRESHOLD)
+    window = timedelta(days=config.get('DUPLICATE_WINDOW_DAYS', DEFAULT_WINDOW_DAYS))
+    created_before = created_before or datetime.utcnow()
+
+    d_lat = math.degrees(radius / EARTH_RADIUS_METERS)
+    d_lng = d_lat / max(math.cos(math.radians(latitude)), 0.01)
+
+    columns = [Issue.id, Issue.latitude, Issue.longitude, Issue.duplicate_of_id, IssueSignature.signature]
+    if sign_missing:
+        columns += [Issue.title, Issue.description]
+    candidate_index = issue_candidate_rtree.c
+    query = db.session.query(*columns).select_from(issue_candidate_rtree) \
+        .join(Issue, Issue.id == candidate_index.id) \
+        .join(IssueSignature, IssueSignature.issue_id == Issue.id, isouter=sign_missing) \
+        .filter(
+            candidate_index.min_lat <= latitude + d_lat, candidate_index.max_lat >= latitude - d_lat,
+            candidate_index.min_lng <= longitude + d_lng, candidate_index.max_lng >= longitude - d_lng,
+            candidate_index.min_day <= day_number(created_before),
+            candidate_index.max_day >= day_number(created_before - window),
+            candidate_index.category == category,
+            # The index holds 32-bit floats, so re-check the exact creation times
+            Issue.created_at >= created_before - window,
+            Issue.created_at < created_before
+        )
+    if exclude_id is not None:
+        query = query.filter(Issue.id != exclude_id)
+
+    # Newest first, so a dense area cannot push the recent re-reports past the limit
+    candidates = [
+        candidate for candidate in query.order_by(Issue.created_at.desc()).limit(MAX_CANDIDATES)
+        if distance_meters(latitude, longitude, candidate.latitude, candidate.longitude) <= radius
+    ]
+    scores = similarities(signature, [
+        candidate.signature or minhash(candidate.title, candidate.description) for candidate in candidates
+    ])
+    if not len(scores) or scores.max() < threshold:
+        return None
+    # argmax takes the first, i.e. most recent, of equally good candidates
+    best = int(scores.argmax())
+    return candidates[best].duplicate_of_id or candidates[best].id, float(scores[best])
+
+def dedup_backlog(config, batch_size=1000, dry_run=False):
+    """Sign every unsigned issue and link near-duplicates in creation order.
+
+    Returns (signed, linked). Each issue is only compared with earlier reports,
+    so the first report of a problem stays the canonical one.
+    """
+    signed = linked = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(Issue.id, Issue.title, Issue.description) \
+            .outerjoin(IssueSignature, IssueSignature.issue_id == Issue.id) \
+            .filter(IssueSignature.issue_id.is_(None), Issue.id > last_id) \
+            .order_by(Issue.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        if not dry_run:
+            db.session.execute(insert(IssueSignature), [
+                {'issue_id': row.id, 'signature': minhash(row.title, row.description)} for row in rows
+            ])
+            db.session.commit()
+        signed += len(rows)
+
+    last_created = None
+    last_id = 0
+    now = datetime.utcnow()
+    while True:
+        query = db.session.query(
+            Issue.id, Issue.latitude, Issue.longitude, Issue.category, Issue.created_at,
+            Issue.title, Issue.description, IssueSignature.signature
+        ).outerjoin(IssueSignature, IssueSignature.issue_id == Issue.id) \
+            .filter(Issue.duplicate_of_id.is_(None), Issue.latitude.isnot(None))
+        if last_created is not None:
+            query = query.filter(db.or_(
+                Issue.created_at > last_created,
+                db.and_(Issue.created_at == last_created, Issue.id > last_id)
+            ))
+        rows = query.order_by(Issue.created_at, Issue.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_created, last_id = rows[-1].created_at, rows[-1].id
+
+        links = []
+        canonical = {}
+        for row in rows:
+            signature = row.signature or minhash(row.title, row.description)
+            # A dry run has stored no signatures, so candidates are hashed as they come
+            match = find_duplicate(
+                row.latitude, row.longitude, row.category, signature, config,
+                created_before=row.created_at, exclude_id=row.id, sign_missing=dry_run
+            )
+            if match:
+                # Links made earlier in this batch are not committed yet
+                duplicate_of_id = canonical.get(match[0], match[0])
+                canonical[row.id] = duplicate_of_id
+                links.append({'id': row.id, 'duplicate_of_id': duplicate_of_id, 'updated_at': now})
+
+        if links and not dry_run:
+            db.session.execute(db.update(Issue), links)
+            db.session.commit()
+        linked += len(links)
+
+    return signed, linked
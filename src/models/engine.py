@@ -0,0 +1,137 @@
+import os
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+# Connection settings for serving concurrent submissions from one SQLite file.
+# WAL lets readers continue while a write commits, busy_timeout makes a writer
+# wait for the lock instead of failing with "database is locked", and
+# synchronous=NORMAL only fsyncs at WAL checkpoints (a power loss can lose the
+# last transactions, but never corrupts the database).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -16000,  # KiB, i.e. 16MB page cache per connection
+    'temp_store': 'MEMORY',
+}
+
+# Passed to create_engine() through SQLALCHEMY_ENGINE_OPTIONS
+SQLITE_ENGINE_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+}
+
+# Read-only connections for GET requests; SQLite serializes writers anyway, so
+# these let reads scale without queueing behind submissions for a pooled connection
+SQLITE_READ_ENGINE_OPTIONS = {
+    'pool_size': 20,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+}
+
+# GET and HEAD requests to these blueprints are served from the read-only pool
+DEFAULT_READ_BLUEPRINTS = ('issue', 'user')
+READ_METHODS = frozenset({'GET', 'HEAD'})
+
+def configure_sqlite(engine, pragmas, read_only=False):
+    """Apply the pragmas to every new connection of an SQLite engine.
+
+    pragmas is read when each connection opens, so changing it and calling
+    engine.dispose() switches the profile of a running application. A read-only
+    engine skips journal_mode (the writer sets it on the file) and turns on query_only.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if read_only and name == 'journal_mode':
+                continue
+            # PRAGMA does not accept bound parameters; names and values come from config
+            cursor.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = 1")
+        cursor.close()
+
+def read_only(view):
+    """Serve a view from the read-only pool whatever its HTTP method"""
+    view.db_read_only = True
+    return view
+
+def read_write(view):
+    """Keep a view on the writer engine even for GET requests"""
+    view.db_read_only = False
+    return view
+
+class RoutingSession(Session):
+    """Session that sends the statements of read-only requests to the read engine.
+
+    Everything outside a request (CLI commands, the group-commit writer and the
+    archiver threads) uses the writer engine.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get('db_read_only'):
+            engine = current_app.extensions.get('read_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@contextmanager
+def read_snapshot(session):
+    """Run the session's queries inside the block on one SQLite snapshot.
+
+    pysqlite only opens a transaction before writes, so consecutive SELECTs are
+    separate autocommit statements and a commit can land between them. An
+    explicit BEGIN makes SQLite keep the snapshot of the first read (WAL) until
+    the block ends. Inside a transaction already, the block just joins it.
+    """
+    connection = session.connection()
+    dbapi_connection = connection.connection.dbapi_connection
+    if connection.dialect.name != 'sqlite' or dbapi_connection.in_transaction:
+        yield
+        return
+
+    connection.exec_driver_sql('BEGIN')
+    try:
+        yield
+    finally:
+        # Only reads ran; a failed statement may have ended the transaction already
+        if dbapi_connection.in_transaction:
+            connection.exec_driver_sql('ROLLBACK')
+
+def read_only_url(database_uri):
+    """Return a mode=ro URI for an SQLite database file, or None when there is no file to share"""
+    url = make_url(database_uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:') or 'uri' in url.query:
+        return None
+    return url.set(database=f'file:{os.path.abspath(url.database)}', query={'mode': 'ro', 'uri': 'true'})
+
+def install_read_engine(app):
+    """Create the read-only engine and route GET requests to it, returning the engine (or None).
+
+    Views marked with read_only() or read_write() override the routing by method.
+    """
+    url = read_only_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url is None or not app.config.get('READ_ENGINE', True):
+        return None
+
+    engine = create_engine(url, **app.config.get('READ_ENGINE_OPTIONS', SQLITE_READ_ENGINE_OPTIONS))
+    configure_sqlite(engine, app.config['SQLITE_PRAGMAS'], read_only=True)
+    app.extensions['read_engine'] = engine
+    blueprints = frozenset(app.config.get('READ_BLUEPRINTS', DEFAULT_READ_BLUEPRINTS))
+
+    @app.before_request
+    def route_database_reads():
+        routed = getattr(app.view_functions.get(request.endpoint), 'db_read_only', None)
+        if routed is None:
+            routed = request.method in READ_METHODS and request.blueprint in blueprints
+        g.db_read_only = routed
+
+    return engine
@@ -0,0 +1,254 @@
+import json
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+# Issue fields carried by events; enough for a dashboard row, no reporter details
+EVENT_FIELDS = [
+    'id', 'title', 'category', 'severity', 'status', 'latitude', 'longitude',
+    'created_at', 'updated_at', 'duplicate_of_id'
+]
+DEFAULT_EVENT_HISTORY = 1000
+DEFAULT_EVENT_POLL_INTERVAL = 1.0
+# The database backend prunes events beyond the replay history every this many polls
+EVENT_PRUNE_POLLS = 60
+# A connection this far behind is dropped with a reset event instead of buffering more
+MAX_QUEUED_EVENTS = 1000
+
+_broadcaster_lock = threading.Lock()
+
+class IssueEvent(db.Model):
+    """An issue event published by one worker, read by the others (database event backend)"""
+    __tablename__ = 'issue_event'
+    # AUTOINCREMENT: ids of pruned events are never reused, so Last-Event-ID stays meaningful
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<IssueEvent {self.id}: {self.type}>'
+
+class MemoryEventBackend:
+    """Numbers events and keeps the recent ones in memory; for a single worker process"""
+
+    def __init__(self, history=DEFAULT_EVENT_HISTORY):
+        self.history = deque(maxlen=history)
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.deliver = None
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, event):
+        self.publish_many([event])
+
+    def publish_many(self, events):
+        with self.lock:
+            for event in events:
+                event_id = self.next_id
+                self.next_id += 1
+                self.history.append((event_id, event))
+                self.deliver(event_id, event)
+
+    def replay(self, last_event_id):
+        """Return the events after last_event_id, or None if some are no longer kept"""
+        with self.lock:
+            if last_event_id >= self.next_id:
+                # An id from before a restart
+                return None
+            oldest = self.history[0][0] if self.history else self.next_id
+            if last_event_id < oldest - 1:
+                return None
+            return [(event_id, event) for event_id, event in self.history if event_id > last_event_id]
+
+class DatabaseEventBackend:
+    """Passes events between worker processes through the issue_event table.
+
+    Each worker polls the table from one background thread and fans the new
+    rows out to its own connections, so every worker sees every event and
+    event ids are shared across workers and restarts.
+    """
+
+    def __init__(self, app, history=DEFAULT_EVENT_HISTORY, poll_interval=DEFAULT_EVENT_POLL_INTERVAL):
+        self.app = app
+        self.history = history
+        self.poll_interval = poll_interval
+        self.deliver = None
+        self.last_id = 0
+
+    def start(self, deliver):
+        self.deliver = deliver
+        with self.app.app_context():
+            self.last_id = db.session.query(db.func.max(IssueEvent.id)).scalar() or 0
+            db.session.remove()
+        threading.Thread(target=self._poll, name='issue-event-poller', daemon=True).start()
+
+    def publish(self, event):
+        self.publish_many([event])
+
+    def publish_many(self, events):
+        # One executemany INSERT and one commit for the whole batch
+        now = datetime.utcnow()
+        db.session.execute(insert(IssueEvent), [{
+            'type': event['type'],
+            'payload': json.dumps(event['data']),
+            'created_at': now
+        } for event in events])
+        db.session.commit()
+
+    def replay(self, last_event_id):
+        """Return the events after last_event_id, or None if some were pruned"""
+        rows = db.session.query(IssueEvent.id, IssueEvent.type, IssueEvent.payload) \
+            .filter(IssueEvent.id > last_event_id) \
+            .order_by(IssueEvent.id).limit(self.history + 1).all()
+        oldest, newest = db.session.query(db.func.min(IssueEvent.id), db.func.max(IssueEvent.id)).one()
+        if len(rows) > self.history or last_event_id > (newest or 0) or \
+                (oldest is not None and oldest > last_event_id + 1):
+            return None
+        return [(row.id, {'type': row.type, 'data': json.loads(row.payload)}) for row in rows]
+
+    def _poll(self):
+        with self.app.app_context():
+            polls = 0
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    rows = db.session.query(IssueEvent.id, IssueEvent.type, IssueEvent.payload) \
+                        .filter(IssueEvent.id > self.last_id).order_by(IssueEvent.id).all()
+                    for row in rows:
+                        self.deliver(row.id, {'type': row.type, 'data': json.loads(row.payload)})
+                        self.last_id = row.id
+
+                    polls += 1
+                    if polls % EVENT_PRUNE_POLLS == 0:
+                        # Keep only the replay history
+                        db.session.execute(
+                            db.delete(IssueEvent).where(IssueEvent.id <= self.last_id - self.history)
+                        )
+                        db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning("Polling issue events failed: %s", e)
+                finally:
+                    db.session.remove()
+
+class Subscriber:
+    """One event stream connection and the events waiting to be sent to it"""
+
+    def __init__(self, categories=None, severities=None):
+        self.categories = categories
+        self.severities = severities
+        self.events = deque()
+        self.ready = threading.Event()
+        self.overflowed = False
+
+    def matches(self, event):
+        # Events without a category or severity (bulk imports) concern every filter
+        data = event['data']
+        return (not self.categories or data.get('category') in self.categories | {None}) and \
+               (not self.severities or data.get('severity') in self.severities | {None})
+
+    def push(self, event_id, event):
+        if len(self.events) >= MAX_QUEUED_EVENTS:
+            self.overflowed = True
+        else:
+            self.events.append((event_id, event))
+        self.ready.set()
+
+    def wait(self, timeout):
+        """Block until events arrive or the timeout passes, returning the queued events"""
+        self.ready.wait(timeout)
+        self.ready.clear()
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+class IssueEventBroadcaster:
+    """Fans issue events out to the open event stream connections of this process.
+
+    Connections do not get a thread of their own from the broadcaster: each one
+    waits on its Subscriber, so under a gevent worker thousands of idle streams
+    are thousands of greenlets.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        backend.start(self.deliver)
+
+    def publish(self, event_type, data):
+        """Publish an event ('created', 'updated', 'deleted') about an issue"""
+        self.backend.publish({'type': event_type, 'data': data})
+
+    def publish_many(self, event_type, items):
+        """Publish one event of the same type per item, in a single backend write"""
+        self.backend.publish_many([{'type': event_type, 'data': data} for data in items])
+
+    def subscribe(self, categories=None, severities=None):
+        subscriber = Subscriber(categories, severities)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def replay(self, last_event_id):
+        return self.backend.replay(last_event_id)
+
+    def deliver(self, event_id, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            if subscriber.matches(event):
+                subscriber.push(event_id, event)
+
+def get_broadcaster(app):
+    """Return the application's event broadcaster, creating it with the EVENT_BACKEND on first use"""
+    with _broadcaster_lock:
+        broadcaster = app.extensions.get('issue_events')
+        if broadcaster is None:
+            history = app.config.get('EVENT_HISTORY', DEFAULT_EVENT_HISTORY)
+            if app.config.get('EVENT_BACKEND', 'memory') == 'database':
+                backend = DatabaseEventBackend(
+                    app, history, app.config.get('EVENT_POLL_INTERVAL', DEFAULT_EVENT_POLL_INTERVAL)
+                )
+            else:
+                backend = MemoryEventBackend(history)
+            broadcaster = IssueEventBroadcaster(backend)
+            app.extensions['issue_events'] = broadcaster
+    return broadcaster
+
+def publish_issue_event(event_type, data):
+    """Publish an event about a committed change; failures are logged, never raised"""
+    try:
+        get_broadcaster(current_app._get_current_object()).publish(event_type, data)
+    except Exception as e:
+        logger.warning("Publishing %s event failed: %s", event_type, e)
+
+def publish_issue_events(event_type, items):
+    """Publish an event per item of a committed bulk change; failures are logged, never raised"""
+    if not items:
+        return
+    try:
+        get_broadcaster(current_app._get_current_object()).publish_many(event_type, items)
+    except Exception as e:
+        logger.warning("Publishing %d %s events failed: %s", len(items), event_type, e)
+
+def issue_event_data(issue_data):
+    """Reduce an issue's to_dict() to the fields sent with events"""
+    return {field: issue_data.get(field) for field in EVENT_FIELDS}
@@ -0,0 +1,176 @@
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.spatial import issue_rtree
+
+class IssueHeatmapRegion(db.Model):
+    """Last issue version that changed anything inside a REGION_DEGREES square.
+
+    Triggers record every insert, delete and relevant update here, so a cached
+    heatmap tile stays valid for as long as none of the regions it covers changed.
+    """
+    __tablename__ = 'issue_heatmap_region'
+
+    rx = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ry = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<IssueHeatmapRegion {self.rx},{self.ry}: {self.version}>'
+
+# Roughly 1 km squares; coarse enough for a cheap check, fine enough that a
+# write only invalidates the tiles around it
+REGION_DEGREES = 0.01
+# Cells per tile side; a 256px tile gets 4px cells
+HEATMAP_GRID = 64
+# Rows are pre-aggregated in SQL on a grid this many times finer, then projected
+# and binned with NumPy, so dense tiles never load one row per issue
+PREBIN_FACTOR = 4
+MAX_HEATMAP_ZOOM = 22
+SEVERITY_WEIGHTS = {'low': 1, 'medium': 2, 'high': 3, 'critical': 5}
+DEFAULT_HEATMAP_CACHE_SIZE = 2048
+
+def _region_upsert(ref):
+    # lng + 180 and lat + 90 are never negative, so CAST truncation is floor().
+    # Whether this runs before or after the issue_version bump, + 1 keeps every
+    # recorded version increasing and above the 0 of a tile nothing was written to.
+    return f"""
+        INSERT INTO issue_heatmap_region (rx, ry, version)
+        SELECT CAST(({ref}.longitude + 180) / {REGION_DEGREES} AS INTEGER),
+               CAST(({ref}.latitude + 90) / {REGION_DEGREES} AS INTEGER),
+               (SELECT version FROM issue_version) + 1
+        WHERE {ref}.latitude IS NOT NULL AND {ref}.longitude IS NOT NULL
+        ON CONFLICT (rx, ry) DO UPDATE SET version = excluded.version;"""
+
+HEATMAP_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_heatmap_insert AFTER INSERT ON issue
+    BEGIN
+        {_region_upsert('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_heatmap_update
+    AFTER UPDATE OF latitude, longitude, category, severity, status ON issue
+    BEGIN
+        {_region_upsert('old')}
+        {_region_upsert('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_heatmap_delete AFTER DELETE ON issue
+    BEGIN
+        {_region_upsert('old')}
+    END
+    """
+]
+
+def install_heatmap_regions():
+    """Create the region version table and the triggers recording changes in it"""
+    IssueHeatmapRegion.__table__.create(bind=db.session.connection(), checkfirst=True)
+    for statement in HEATMAP_DDL:
+        db.session.execute(db.text(statement))
+
+def tile_bounds(z, x, y):
+    """Return (west, south, east, north) of a Web Mercator (slippy map) tile"""
+    scale = 2 ** z
+
+    def latitude(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / scale))))
+
+    return x / scale * 360 - 180, latitude(y + 1), (x + 1) / scale * 360 - 180, latitude(y)
+
+def tile_fingerprint(west, south, east, north):
+    """Return the last issue version that changed a region overlapping the box"""
+    def region(value, offset):
+        return int((value + offset) // REGION_DEGREES)
+
+    # One region of slack on each side absorbs float differences with the triggers
+    return db.session.query(db.func.coalesce(db.func.max(IssueHeatmapRegion.version), 0)).filter(
+        IssueHeatmapRegion.rx.between(region(west, 180) - 1, region(east, 180) + 1),
+        IssueHeatmapRegion.ry.between(region(south, 90) - 1, region(north, 90) + 1)
+    ).scalar()
+
+def compute_tile(z, x, y, weight='count', categories=None, statuses=None):
+    """Bin the issues inside a tile into a HEATMAP_GRID x HEATMAP_GRID array (rows north to south)"""
+    west, south, east, north = tile_bounds(z, x, y)
+    fine = HEATMAP_GRID * PREBIN_FACTOR
+
+    if weight == 'severity':
+        value = db.case(*[(Issue.severity == severity, w) for severity, w in SEVERITY_WEIGHTS.items()], else_=1)
+    else:
+        value = db.literal(1)
+    cell_x = db.func.min(db.cast((Issue.longitude - west) / (east - west) * fine, db.Integer), fine - 1)
+    cell_y = db.func.min(db.cast((Issue.latitude - south) / (north - south) * fine, db.Integer), fine - 1)
+
+    query = db.session.query(cell_x, cell_y, db.func.sum(value)).select_from(Issue) \
+        .join(issue_rtree, issue_rtree.c.id == Issue.id) \
+        .filter(
+            issue_rtree.c.min_lat <= north, issue_rtree.c.max_lat >= south,
+            issue_rtree.c.min_lng <= east, issue_rtree.c.max_lng >= west,
+            # The R*Tree stores 32-bit floats, so re-check the exact coordinates
+            Issue.latitude.between(south, north), Issue.longitude.between(west, east)
+        )
+    if categories:
+        query = query.filter(Issue.category.in_(categories))
+    if statuses:
+        query = query.filter(Issue.status.in_(statuses))
+    rows = np.array(query.group_by(cell_x, cell_y).all(), dtype=float).reshape(-1, 3)
+
+    # Project the centres of the fine cells to Web Mercator tile coordinates
+    longitudes = west + (rows[:, 0] + 0.5) * (east - west) / fine
+    latitudes = np.radians(south + (rows[:, 1] + 0.5) * (north - south) / fine)
+    scale = 2 ** z
+    tile_x = (longitudes + 180) / 360 * scale - x
+    tile_y = (1 - np.log(np.tan(latitudes) + 1 / np.cos(latitudes)) / np.pi) / 2 * scale - y
+
+    grid, _, _ = np.histogram2d(tile_y, tile_x, bins=HEATMAP_GRID, range=[[0, 1], [0, 1]], weights=rows[:, 2])
+    return grid
+
+def tile_payload(z, x, y, weight, grid):
+    """Sparse JSON form of a tile grid: [row, column, value] for each non-empty cell"""
+    rows, columns = np.nonzero(grid)
+    values = grid[rows, columns]
+    return {
+        'z': z, 'x': x, 'y': y,
+        'grid': HEATMAP_GRID,
+        'weight': weight,
+        'max': int(values.max()) if values.size else 0,
+        'total': int(values.sum()),
+        'cells': np.column_stack((rows, columns, values)).astype(int).tolist(),
+    }
+
+class HeatmapTileCache:
+    """LRU cache of tile payloads, each valid while its tile fingerprint is unchanged"""
+
+    def __init__(self, max_entries=DEFAULT_HEATMAP_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, fingerprint):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, fingerprint, payload):
+        with self.lock:
+            self.entries[key] = (fingerprint, payload)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+def get_heatmap_cache(app):
+    """Return the application's heatmap tile cache"""
+    cache = app.extensions.get('heatmap_tiles')
+    if cache is None:
+        cache = app.extensions.setdefault(
+            'heatmap_tiles', HeatmapTileCache(app.config.get('HEATMAP_CACHE_SIZE', DEFAULT_HEATMAP_CACHE_SIZE))
+        )
+    return cache
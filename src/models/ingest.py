@@ -0,0 +1,132 @@
+import csv
+import json
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.districts import get_district_index, assign_row_districts
+from src.models.duplicates import insert_signed_issues
+
+# Rows are inserted with one executemany per chunk, each chunk in its own transaction
+INGEST_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Columns taken over from an import. IDs are reassigned and photo files are not
+# part of an export, so id and the photo columns are ignored.
+TEXT_FIELDS = [
+    'title', 'description', 'category', 'severity', 'status', 'address',
+    'reporter_name', 'reporter_email', 'reporter_phone', 'admin_notes'
+]
+DATE_FIELDS = ['created_at', 'updated_at', 'resolved_at']
+
+def read_csv_records(text_stream):
+    """Yield (line_number, record, error) from CSV with the export's column headers"""
+    reader = csv.DictReader(text_stream)
+    columns = Issue.get_csv_columns()
+    for row in reader:
+        record = {key: row[header] for header, key in columns if header in row}
+        yield reader.line_num, record, None
+
+def read_ndjson_records(text_stream):
+    """Yield (line_number, record, error) from newline-delimited to_dict() objects"""
+    for line_number, line in enumerate(text_stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {str(e)}'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Expected a JSON object'
+            continue
+        yield line_number, record, None
+
+def prepare_issue_row(record):
+    """Validate an imported record like create_issue does, returning (values, error)"""
+    # Exports write missing values as empty strings
+    data = {key: value for key, value in record.items() if value not in ('', None)}
+    data = {key: value.strip() if isinstance(value, str) else value for key, value in data.items()}
+
+    error = Issue.validate_submission(data)
+    if error:
+        return None, error
+
+    status = data.get('status', 'reported')
+    if status not in Issue.get_statuses():
+        return None, 'Invalid status'
+
+    values = {field: data.get(field) for field in TEXT_FIELDS}
+    values['status'] = status
+    try:
+        values['latitude'] = float(data['latitude']) if 'latitude' in data else None
+        values['longitude'] = float(data['longitude']) if 'longitude' in data else None
+        for field in DATE_FIELDS:
+            values[field] = datetime.fromisoformat(data[field]) if field in data else None
+    except (TypeError, ValueError) as e:
+        return None, f'Invalid data format: {str(e)}'
+
+    now = datetime.utcnow()
+    values['created_at'] = values['created_at'] or now
+    if status == 'resolved' and not values['resolved_at']:
+        values['resolved_at'] = values['updated_at'] or values['created_at']
+    # Stamped with the import time so delta-sync clients (/issues/changes) pick the rows up
+    values['updated_at'] = now
+    values['photo_filename'] = None
+    values['photo_original_name'] = None
+    return values, None
+
+def ingest_issues(records, chunk_size=INGEST_CHUNK_SIZE):
+    """Insert validated records in chunked executemany batches, collecting per-row errors.
+
+    records yields (line_number, record, error) tuples as produced by the readers.
+    Invalid rows are reported and skipped; they never abort the rest of the batch.
+    Districts are assigned per chunk, with one vectorized lookup, and MinHash
+    signatures are stored with the rows for duplicate detection.
+    """
+    result = {'inserted': 0, 'failed': 0, 'errors': []}
+    district_index = get_district_index(current_app)
+
+    def fail(line_number, error):
+        result['failed'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append({'line': line_number, 'error': error})
+
+    chunk = []
+    for line_number, record, error in records:
+        if error is None:
+            values, error = prepare_issue_row(record)
+        if error:
+            fail(line_number, error)
+            continue
+        chunk.append((line_number, values))
+        if len(chunk) >= chunk_size:
+            _insert_chunk(chunk, result, fail, district_index)
+            chunk = []
+
+    if chunk:
+        _insert_chunk(chunk, result, fail, district_index)
+    return result
+
+def _insert_chunk(chunk, result, fail, district_index):
+    """Insert one chunk in a single transaction, retrying row by row if it is rejected"""
+    assign_row_districts([values for _, values in chunk], district_index)
+    try:
+        insert_signed_issues([values for _, values in chunk])
+        db.session.commit()
+        result['inserted'] += len(chunk)
+        return
+    except IntegrityError:
+        db.session.rollback()
+
+    # Isolate the offending rows so the valid ones still go in
+    for line_number, values in chunk:
+        try:
+            insert_signed_issues([values])
+            db.session.commit()
+            result['inserted'] += 1
+        except IntegrityError as e:
+            db.session.rollback()
+            fail(line_number, str(e.orig))
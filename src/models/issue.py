@@ -2,6 +2,24 @@ from datetime import datetime
 from src.models.user import db
 
 class Issue(db.Model):
+    SUMMARY_LENGTH = 120
+
+    # Indexes match the list query shapes: optional equality filters followed by
+    # ORDER BY created_at DESC, id DESC (the rowid is implicitly the last index column).
+    # Existing databases receive new indexes through src/models/migrations.py.
+    __table_args__ = (
+        db.Index('ix_issue_created_at_id', 'created_at', 'id'),
+        db.Index('ix_issue_status_created_at', 'status', 'created_at'),
+        db.Index('ix_issue_category_created_at', 'category', 'created_at'),
+        db.Index('ix_issue_category_severity_created_at', 'category', 'severity', 'created_at'),
+        # Delta sync: ORDER BY updated_at, id from a cursor
+        db.Index('ix_issue_updated_at_id', 'updated_at', 'id'),
+        # Ward council views: WHERE district = ? ORDER BY created_at DESC
+        db.Index('ix_issue_district_created_at', 'district', 'created_at'),
+        # Ids are never handed out twice, not even those of deleted or archived issues
+        {'sqlite_autoincrement': True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     
     # Basic issue information
@@ -15,6 +33,8 @@ class Issue(db.Model):
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
     address = db.Column(db.String(500), nullable=True)
+    # Name of the loaded district boundary containing the point (src/models/districts.py)
+    district = db.Column(db.String(100), nullable=True)
     
     # Photo information
     photo_filename = db.Column(db.String(255), nullable=True)
@@ -31,6 +51,9 @@ class Issue(db.Model):
     admin_notes = db.Column(db.Text, nullable=True)
     resolved_at = db.Column(db.DateTime, nullable=True)
 
+    # Near-duplicate reports link to the first report of the same problem
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('issue.id'), nullable=True, index=True)
+
     def __repr__(self):
         return f'<Issue {self.id}: {self.title}>'
 
@@ -45,6 +68,7 @@ class Issue(db.Model):
             'latitude': self.latitude,
             'longitude': self.longitude,
             'address': self.address,
+            'district': self.district,
             'photo_filename': self.photo_filename,
             'photo_original_name': self.photo_original_name,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -53,7 +77,8 @@ class Issue(db.Model):
             'reporter_email': self.reporter_email,
             'reporter_phone': self.reporter_phone,
             'admin_notes': self.admin_notes,
-            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'duplicate_of_id': self.duplicate_of_id
         }
 
     def to_csv_dict(self):
@@ -68,6 +93,7 @@ class Issue(db.Model):
             'Latitude': self.latitude,
             'Longitude': self.longitude,
             'Address': self.address,
+            'District': self.district,
             'Photo': self.photo_original_name,
             'Created Date': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else '',
             'Updated Date': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else '',
@@ -78,6 +104,84 @@ class Issue(db.Model):
             'Resolved Date': self.resolved_at.strftime('%Y-%m-%d %H:%M:%S') if self.resolved_at else ''
         }
 
+    @staticmethod
+    def get_csv_columns():
+        """Return (CSV header, to_dict key) pairs in the order of to_csv_dict()"""
+        return [
+            ('ID', 'id'), ('Title', 'title'), ('Description', 'description'),
+            ('Category', 'category'), ('Severity', 'severity'), ('Status', 'status'),
+            ('Latitude', 'latitude'), ('Longitude', 'longitude'), ('Address', 'address'),
+            ('District', 'district'), ('Photo', 'photo_original_name'), ('Created Date', 'created_at'),
+            ('Updated Date', 'updated_at'), ('Reporter Name', 'reporter_name'),
+            ('Reporter Email', 'reporter_email'), ('Reporter Phone', 'reporter_phone'),
+            ('Admin Notes', 'admin_notes'), ('Resolved Date', 'resolved_at')
+        ]
+
+    @staticmethod
+    def validate_submission(data):
+        """Check a submitted issue against the reporting rules, returning an error message or None"""
+        required_fields = ['title', 'description', 'category', 'severity']
+        for field in required_fields:
+            if not data.get(field):
+                return f'Missing required field: {field}'
+
+        if data['category'] not in Issue.get_categories():
+            return 'Invalid category'
+
+        if data['severity'] not in Issue.get_severities():
+            return 'Invalid severity'
+
+        return None
+
+    @staticmethod
+    def get_list_fields():
+        """Return the fields that can be requested through ?fields= on list endpoints"""
+        return [
+            'id', 'title', 'summary', 'description', 'category', 'severity', 'status',
+            'latitude', 'longitude', 'address', 'district', 'photo_filename', 'photo_original_name',
+            'created_at', 'updated_at', 'reporter_name', 'reporter_email', 'reporter_phone',
+            'admin_notes', 'resolved_at', 'duplicate_of_id'
+        ]
+
+    @staticmethod
+    def list_column(field):
+        """Return the SQL expression selected for a list field"""
+        if field == 'summary':
+            # Card views only need the start of the description
+            return db.func.substr(Issue.description, 1, Issue.SUMMARY_LENGTH).label('summary')
+        return getattr(Issue, field)
+
+    @staticmethod
+    def json_column(field, table=None):
+        """Return a Core column for a list field that yields the value as to_dict() would.
+
+        SQLite turns stored datetimes ('YYYY-MM-DD HH:MM:SS.ffffff') into the
+        isoformat() text, so the rows can be serialized without any conversion.
+        table selects from a table with the issue columns (the archive) instead.
+        """
+        table = Issue.__table__ if table is None else table
+        if field == 'summary':
+            return db.func.substr(table.c.description, 1, Issue.SUMMARY_LENGTH).label('summary')
+        column = table.c[field]
+        if not isinstance(column.type, db.DateTime):
+            return column.label(field)
+        text = db.type_coerce(column, db.String)
+        # isoformat() leaves out a zero microsecond part
+        return db.func.replace(
+            db.case((text.like('%.000000'), db.func.substr(text, 1, 19)), else_=text), ' ', 'T'
+        ).label(field)
+
+    @staticmethod
+    def row_to_dict(row, fields):
+        """Serialize a projected result row the same way as to_dict()"""
+        result = {}
+        for field in fields:
+            value = getattr(row, field)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            result[field] = value
+        return result
+
     @staticmethod
     def get_categories():
         return ['road', 'water', 'power', 'other']
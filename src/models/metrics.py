@@ -0,0 +1,200 @@
+import time
+import logging
+import threading
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger(__name__ + '.slow_queries')
+
+# Upper bounds (seconds) of the request and SQL latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the statements-per-request histogram buckets
+STATEMENT_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+DEFAULT_SLOW_QUERY_SECONDS = 0.25
+# The same statement this many times in one request is reported as a likely N+1 query
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+# Statement text in log lines is cut to this many characters
+MAX_LOGGED_STATEMENT = 500
+
+class Histogram:
+    """Prometheus-style histogram: counts per bucket, sum and count"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        """Yield the exposition lines of this histogram"""
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {cumulative}'
+        yield f'{name}_sum{format_labels(labels)} {self.sum}'
+        yield f'{name}_count{format_labels(labels)} {self.count}'
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+class RequestStats:
+    """SQL issued while handling one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.seconds = 0.0
+        self.repeats = Counter()
+        self.reported = set()
+
+class MetricsRegistry:
+    """Collects request and SQL metrics in process and renders them for Prometheus"""
+
+    def __init__(self, slow_query_seconds=DEFAULT_SLOW_QUERY_SECONDS, n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD):
+        self.slow_query_seconds = slow_query_seconds
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.lock = threading.Lock()
+        self.request_latency = {}  # (method, route, status) -> Histogram
+        self.request_statements = {}  # route -> Histogram
+        self.request_sql_seconds = {}  # route -> Histogram
+        self.statements = Counter()  # route or '' outside requests -> count
+        self.sql_seconds = Counter()
+        self.slow_queries = Counter()
+        self.n_plus_one = Counter()
+
+    def observe_statement(self, statement, parameters, elapsed):
+        """Record one executed statement, logging it if slow or repeated within the request"""
+        stats = g.get('request_stats') if has_request_context() else None
+        route = current_route() if stats is not None else ''
+
+        with self.lock:
+            self.statements[route] += 1
+            self.sql_seconds[route] += elapsed
+            if elapsed >= self.slow_query_seconds:
+                self.slow_queries[route] += 1
+
+        if elapsed >= self.slow_query_seconds:
+            slow_query_logger.warning(
+                "Slow query (%.3fs) in %s: %s; parameters: %.200r",
+                elapsed, route or 'background', statement.strip()[:MAX_LOGGED_STATEMENT], parameters
+            )
+
+        if stats is None:
+            return
+        stats.statements += 1
+        stats.seconds += elapsed
+        stats.repeats[statement] += 1
+        if stats.repeats[statement] >= self.n_plus_one_threshold and statement not in stats.reported:
+            stats.reported.add(statement)
+            with self.lock:
+                self.n_plus_one[route] += 1
+            logger.warning(
+                "Possible N+1 query in %s %s: statement ran %d times: %s",
+                request.method, route, stats.repeats[statement], statement.strip()[:MAX_LOGGED_STATEMENT]
+            )
+
+    def observe_request(self, method, route, status, stats):
+        elapsed = time.perf_counter() - stats.started
+        with self.lock:
+            key = (method, route, str(status))
+            if key not in self.request_latency:
+                self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+                self.request_statements.setdefault(route, Histogram(STATEMENT_COUNT_BUCKETS))
+                self.request_sql_seconds.setdefault(route, Histogram(LATENCY_BUCKETS))
+            self.request_latency[key].observe(elapsed)
+            self.request_statements[route].observe(stats.statements)
+            self.request_sql_seconds[route].observe(stats.seconds)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self.lock:
+            family('http_request_duration_seconds', 'histogram', 'Time to build the response, by route and status')
+            for (method, route, status), histogram in sorted(self.request_latency.items()):
+                lines.extend(histogram.render('http_request_duration_seconds',
+                                              (('method', method), ('route', route), ('status', status))))
+
+            family('http_request_db_statements', 'histogram', 'SQL statements executed per request')
+            for route, histogram in sorted(self.request_statements.items()):
+                lines.extend(histogram.render('http_request_db_statements', (('route', route),)))
+
+            family('http_request_db_seconds', 'histogram', 'Time spent in SQL per request')
+            for route, histogram in sorted(self.request_sql_seconds.items()):
+                lines.extend(histogram.render('http_request_db_seconds', (('route', route),)))
+
+            # route="" is SQL run outside requests (writer thread, event poller, CLI)
+            for name, kind, help_text, counter in (
+                ('db_statements_total', 'counter', 'SQL statements executed', self.statements),
+                ('db_statement_seconds_total', 'counter', 'Time spent executing SQL', self.sql_seconds),
+                ('db_slow_queries_total', 'counter', 'Statements slower than the slow query threshold', self.slow_queries),
+                ('db_n_plus_one_warnings_total', 'counter', 'Requests repeating one statement past the N+1 threshold',
+                 self.n_plus_one),
+            ):
+                family(name, kind, help_text)
+                for route, value in sorted(counter.items()):
+                    lines.append(f'{name}{format_labels((("route", route),))} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+def current_route():
+    """Return the URL rule of the request, so /issues/<int:issue_id> is one series and not one per id"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def install_metrics(app, *engines):
+    """Time requests and the SQL they issue on the engines, returning the app's MetricsRegistry"""
+    registry = MetricsRegistry(
+        app.config.get('SLOW_QUERY_SECONDS', DEFAULT_SLOW_QUERY_SECONDS),
+        app.config.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+    )
+    app.extensions['metrics'] = registry
+
+    if app.config.get('SLOW_QUERY_LOG'):
+        handler = logging.FileHandler(app.config['SLOW_QUERY_LOG'])
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    def end_statement(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started', None)
+        if started is not None:
+            registry.observe_statement(statement, parameters, time.perf_counter() - started)
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', start_statement)
+        event.listen(engine, 'after_cursor_execute', end_statement)
+
+    @app.before_request
+    def start_request():
+        g.request_stats = RequestStats()
+
+    @app.after_request
+    def end_request(response):
+        # Streamed bodies are timed up to their first byte
+        stats = g.get('request_stats')
+        if stats is not None:
+            registry.observe_request(request.method, current_route(), response.status_code, stats)
+        return response
+
+    return registry
@@ -0,0 +1,154 @@
+from sqlalchemy.schema import CreateTable
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.archive import ArchivedIssue
+from src.models.spatial import install_spatial_index
+from src.models.stats import install_issue_counters, install_district_counters, ISSUE_COUNTER_DDL
+from src.models.photo import install_photo_blobs, PHOTO_BLOB_DDL
+from src.models.search import install_search_index
+from src.models.duplicates import install_duplicate_detection, DUPLICATE_DDL
+from src.models.changes import install_change_tracking
+from src.models.trends import install_trend_rollups, TRENDS_DDL
+from src.models.heatmap import install_heatmap_regions
+from src.models.upload import PhotoUpload, backfill_upload_extensions
+
+# db.create_all() only creates missing tables, so every change to an existing
+# table (indexes, columns, triggers) is shipped as a numbered migration.
+# The applied version is tracked in SQLite's PRAGMA user_version. Migrations
+# must be idempotent because a fresh database already has the latest models.
+
+def create_issue_indexes(*names):
+    """Create indexes declared on the Issue model, by name, on existing databases"""
+    connection = db.session.connection()
+    for index in Issue.__table__.indexes:
+        if index.name in names:
+            index.create(bind=connection, checkfirst=True)
+
+def add_column(table, name):
+    """Add a column declared on a model table to the existing table"""
+    columns = [row.name for row in db.session.execute(db.text(f"PRAGMA table_info({table.name})"))]
+    if name in columns:
+        return
+
+    column = table.c[name]
+    column_type = column.type.compile(dialect=db.engine.dialect)
+    references = ''
+    for foreign_key in column.foreign_keys:
+        references = f' REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name})'
+    # ALTER TABLE cannot be parameterised; the names and type come from the model
+    db.session.execute(db.text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}{references}"))
+
+def add_issue_column(name, table='issue'):
+    """Add a column declared on the Issue model to an existing issue table (or the archive, which mirrors it)"""
+    add_column(ArchivedIssue.__table__ if table == 'issue_archive' else Issue.__table__, name)
+
+def add_duplicate_links():
+    """Link near-duplicate reports: duplicate_of_id column, its index and signatures"""
+    add_issue_column('duplicate_of_id')
+    create_issue_indexes('ix_issue_duplicate_of_id')
+    install_duplicate_detection()
+
+def add_change_tracking():
+    """Delta sync: updated_at index, tombstones and the issue version counter"""
+    create_issue_indexes('ix_issue_updated_at_id')
+    install_change_tracking()
+
+def add_issue_archive():
+    """Archive table; delete triggers leave the counts, rollups and photos of archived issues alone"""
+    ArchivedIssue.__table__.create(bind=db.session.connection(), checkfirst=True)
+    for trigger in ('issue_counter_delete', 'issue_rollup_delete', 'photo_blob_delete', 'issue_duplicate_delete'):
+        db.session.execute(db.text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for statement in ISSUE_COUNTER_DDL + TRENDS_DDL + PHOTO_BLOB_DDL + DUPLICATE_DDL:
+        db.session.execute(db.text(statement))
+
+def add_issue_districts():
+    """District column on live and archived issues, its index and the per-district counters"""
+    for table in ('issue', 'issue_archive'):
+        add_issue_column('district', table)
+    create_issue_indexes('ix_issue_district_created_at')
+    install_district_counters()
+
+def add_upload_locks():
+    """Stored extension and chunk write lock of chunked photo uploads"""
+    for name in ('extension', 'lock_token', 'locked_at'):
+        add_column(PhotoUpload.__table__, name)
+    backfill_upload_extensions()
+
+def add_issue_autoincrement():
+    """Rebuild the issue table with AUTOINCREMENT, so ids of deleted and archived issues are never reused.
+
+    SQLite cannot alter a primary key, so the table is copied into a new one
+    following its documented procedure: the indexes and triggers are recreated
+    from their stored SQL, and the id sequence starts past every live and
+    archived id.
+    """
+    table_sql = db.session.execute(db.text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'issue'"
+    )).scalar()
+    if 'AUTOINCREMENT' not in table_sql.upper():
+        schema_sql = db.session.execute(db.text(
+            "SELECT sql FROM sqlite_master WHERE tbl_name = 'issue' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+        )).scalars().all()
+        create_sql = str(CreateTable(Issue.__table__).compile(dialect=db.engine.dialect))
+        db.session.execute(db.text(create_sql.replace('CREATE TABLE issue ', 'CREATE TABLE issue_new ', 1)))
+        columns = ', '.join(column.name for column in Issue.__table__.columns)
+        db.session.execute(db.text(f"INSERT INTO issue_new ({columns}) SELECT {columns} FROM issue"))
+        # Dropping a table fires no delete triggers, so the derived tables are untouched
+        db.session.execute(db.text("DROP TABLE issue"))
+        db.session.execute(db.text("ALTER TABLE issue_new RENAME TO issue"))
+        for statement in schema_sql:
+            db.session.execute(db.text(statement))
+
+    # Deleted ids (tombstones) are skipped too, so sync clients never see one come back
+    last_id = db.session.execute(db.text("""
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'issue'), 0),
+                   COALESCE((SELECT MAX(id) FROM issue), 0),
+                   COALESCE((SELECT MAX(id) FROM issue_archive), 0),
+                   COALESCE((SELECT MAX(issue_id) FROM issue_tombstone), 0))
+    """)).scalar()
+    db.session.execute(db.text("DELETE FROM sqlite_sequence WHERE name = 'issue'"))
+    db.session.execute(db.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('issue', :seq)"), {'seq': last_id})
+
+MIGRATIONS = [
+    (1, 'R*Tree spatial index for map queries', install_spatial_index),
+    (2, 'Trigger-maintained issue counters', install_issue_counters),
+    (3, 'Composite indexes for issue list and filter queries', lambda: create_issue_indexes(
+        'ix_issue_created_at_id', 'ix_issue_status_created_at',
+        'ix_issue_category_created_at', 'ix_issue_category_severity_created_at'
+    )),
+    (4, 'Reference-counted content-addressed photo blobs', install_photo_blobs),
+    (5, 'FTS5 full-text index over issue text', install_search_index),
+    (6, 'Near-duplicate links and MinHash signatures', add_duplicate_links),
+    (7, 'Change tracking for delta sync and ETags', add_change_tracking),
+    (8, 'Daily rollups for trends and resolution times', install_trend_rollups),
+    (9, 'Region versions for heatmap tile invalidation', install_heatmap_regions),
+    (10, 'Archive table for old resolved issues', add_issue_archive),
+    (11, 'District boundaries and per-issue districts', add_issue_districts),
+    (12, 'Chunked upload extensions and chunk write locks', add_upload_locks),
+    (13, 'Never reuse issue ids (AUTOINCREMENT)', add_issue_autoincrement),
+    (14, 'Space-time R*Tree of duplicate candidates', install_duplicate_detection),
+]
+
+def get_schema_version():
+    """Return the number of the last migration applied to the database"""
+    return db.session.execute(db.text("PRAGMA user_version")).scalar()
+
+def get_pending_migrations():
+    """Return the migrations that have not been applied yet, in order"""
+    version = get_schema_version()
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+def run_migrations():
+    """Apply pending migrations, each in its own transaction, returning those applied"""
+    applied = []
+    for version, description, migrate in get_pending_migrations():
+        try:
+            migrate()
+            # PRAGMA does not accept bound parameters; version is a trusted int
+            db.session.execute(db.text(f"PRAGMA user_version = {int(version)}"))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append((version, description))
+    return applied
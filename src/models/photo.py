@@ -0,0 +1,292 @@
+import os
+import time
+import atexit
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from src.models.user import db
+from src.models.archive import NOT_ARCHIVED
+
+logger = logging.getLogger(__name__)
+
+class PhotoBlob(db.Model):
+    """A stored photo file and the number of issues referencing it.
+
+    Photos are content-addressed: the file name is the SHA-256 of the bytes,
+    so the same image uploaded twice is stored once. Triggers on the issue
+    table keep ref_count in sync with Issue.photo_filename.
+    """
+    __tablename__ = 'photo_blob'
+
+    filename = db.Column(db.String(255), primary_key=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PhotoBlob {self.filename}: {self.ref_count} refs>'
+
+PHOTO_BLOB_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS photo_blob_insert AFTER INSERT ON issue
+    WHEN new.photo_filename IS NOT NULL
+    BEGIN
+        INSERT INTO photo_blob (filename, ref_count, created_at)
+        VALUES (new.photo_filename, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (filename) DO UPDATE SET ref_count = ref_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS photo_blob_update AFTER UPDATE OF photo_filename ON issue
+    WHEN old.photo_filename IS NOT new.photo_filename
+    BEGIN
+        UPDATE photo_blob SET ref_count = ref_count - 1 WHERE filename = old.photo_filename;
+        INSERT INTO photo_blob (filename, ref_count, created_at)
+        SELECT new.photo_filename, 1, CURRENT_TIMESTAMP WHERE new.photo_filename IS NOT NULL
+        ON CONFLICT (filename) DO UPDATE SET ref_count = ref_count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS photo_blob_delete AFTER DELETE ON issue
+    WHEN old.photo_filename IS NOT NULL AND {NOT_ARCHIVED}
+    BEGIN
+        UPDATE photo_blob SET ref_count = ref_count - 1 WHERE filename = old.photo_filename;
+    END
+    """
+]
+
+# Incomplete uploads are written here before being moved into the sharded layout
+TEMP_DIR = 'tmp'
+CHUNK_SIZE = 64 * 1024
+# Unreferenced files younger than this may belong to an upload still in flight
+ORPHAN_GRACE_SECONDS = 3600
+# Blobs released per transaction by release_photos()
+RELEASE_BATCH_SIZE = 500
+
+# Resized JPEG variants (longest side in pixels), stored under variants/<size>/
+VARIANTS_DIR = 'variants'
+PHOTO_VARIANTS = {'thumb': 320, 'medium': 1280}
+VARIANT_QUALITY = 82
+DEFAULT_VARIANT_WORKERS = 2
+
+_variant_executor = None
+_pending_variants = set()
+_variant_lock = threading.Lock()
+
+def install_photo_blobs():
+    """Create the reference-count triggers and count the existing photo references"""
+    PhotoBlob.__table__.create(bind=db.session.connection(), checkfirst=True)
+    for statement in PHOTO_BLOB_DDL:
+        db.session.execute(db.text(statement))
+
+    db.session.execute(db.text("DELETE FROM photo_blob"))
+    db.session.execute(db.text("""
+        INSERT INTO photo_blob (filename, ref_count, created_at)
+        SELECT photo_filename, COUNT(*), CURRENT_TIMESTAMP FROM issue
+        WHERE photo_filename IS NOT NULL
+        GROUP BY photo_filename
+    """))
+
+def blob_filename(digest, ext):
+    """Return the sharded relative path for a content hash, e.g. ab/cd/abcd....jpg"""
+    name = f"{digest}.{ext}" if ext else digest
+    return f"{digest[:2]}/{digest[2:4]}/{name}"
+
+def write_temp_photo(stream, upload_folder):
+    """Stream an upload to a temporary file while hashing it, returning (digest, temp_path)"""
+    temp_dir = os.path.join(upload_folder, TEMP_DIR)
+    os.makedirs(temp_dir, exist_ok=True)
+
+    sha256 = hashlib.sha256()
+    temp_path = os.path.join(temp_dir, f"{os.getpid()}_{time.time_ns()}.part")
+    try:
+        with open(temp_path, 'wb') as temp_file:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                temp_file.write(chunk)
+    except BaseException:
+        # A client disconnecting mid-upload must not leave a partial file behind
+        os.remove(temp_path)
+        raise
+
+    return sha256.hexdigest(), temp_path
+
+def place_photo(temp_path, filename, upload_folder):
+    """Move a hashed temp file to its blob path, or drop it if the blob already exists.
+
+    Call this after the issue row referencing the blob has been flushed: SQLite
+    then holds the write lock, so release_photo() cannot remove the blob between
+    the existence check and the commit.
+    """
+    final_path = os.path.join(upload_folder, filename)
+    if os.path.exists(final_path):
+        os.remove(temp_path)
+        return False
+
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(temp_path, final_path)
+    return True
+
+def release_photo(filename, upload_folder):
+    """Delete a blob, its file and its variants if no issue references it any more"""
+    result = db.session.execute(
+        db.text("DELETE FROM photo_blob WHERE filename = :filename AND ref_count <= 0"),
+        {'filename': filename}
+    )
+    # The files are removed while the DELETE holds the write lock
+    if result.rowcount:
+        remove_blob_files(filename, upload_folder)
+    db.session.commit()
+    return bool(result.rowcount)
+
+def remove_blob_files(filename, upload_folder):
+    """Remove a blob's file and its variants"""
+    paths = [os.path.join(upload_folder, filename)]
+    paths += [os.path.join(upload_folder, variant_filename(filename, size)) for size in PHOTO_VARIANTS]
+    for file_path in paths:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+def release_photos(filenames, upload_folder, batch_size=RELEASE_BATCH_SIZE):
+    """Batched release_photo(): remove the unreferenced blobs among filenames, returning how many"""
+    filenames = sorted(set(filenames))
+    released = 0
+    for start in range(0, len(filenames), batch_size):
+        removed = db.session.execute(
+            db.delete(PhotoBlob)
+            .where(PhotoBlob.filename.in_(filenames[start:start + batch_size]), PhotoBlob.ref_count <= 0)
+            .returning(PhotoBlob.filename)
+        ).scalars().all()
+        for filename in removed:
+            remove_blob_files(filename, upload_folder)
+        db.session.commit()
+        released += len(removed)
+    return released
+
+def release_photos_later(app, filenames):
+    """Release photos from a background thread, so bulk deletes do not wait for the files.
+
+    Blobs left behind by a failed pass keep ref_count 0 and are reclaimed by gc-photos.
+    """
+    def run():
+        with app.app_context():
+            try:
+                release_photos(filenames, app.config['UPLOAD_FOLDER'])
+            except Exception as e:
+                logger.warning("Releasing %d photos failed: %s", len(filenames), e)
+            finally:
+                db.session.remove()
+
+    thread = threading.Thread(target=run, name='photo-release', daemon=True)
+    thread.start()
+    return thread
+
+def variant_filename(filename, size):
+    """Return the relative path of a resized variant of a stored photo"""
+    return f"{VARIANTS_DIR}/{size}/{os.path.splitext(filename)[0]}.jpg"
+
+def render_variants(source_path, targets):
+    """Write resized JPEG variants of a photo; runs in a worker process.
+
+    targets is a list of (max_side, target_path) pairs. Files are written under
+    a temporary name and renamed, so concurrent renders of the same variant are safe.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        # Apply the EXIF orientation so phone photos are not rotated
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        for max_side, target_path in targets:
+            variant = image.copy()
+            variant.thumbnail((max_side, max_side))
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            temp_path = f"{target_path}.{os.getpid()}.part"
+            variant.save(temp_path, 'JPEG', quality=VARIANT_QUALITY, optimize=True)
+            os.replace(temp_path, target_path)
+
+    return len(targets)
+
+def get_variant_executor(max_workers=None):
+    """Return the process pool that renders photo variants, creating it on first use"""
+    global _variant_executor
+    with _variant_lock:
+        if _variant_executor is None:
+            # Spawned workers do not inherit the server's threads or open database handles
+            _variant_executor = ProcessPoolExecutor(
+                max_workers=max_workers or DEFAULT_VARIANT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            atexit.register(_variant_executor.shutdown, wait=False)
+    return _variant_executor
+
+def get_missing_variants(filename, upload_folder):
+    """Return the (max_side, target_path) pairs of variants not rendered yet"""
+    targets = []
+    for size, max_side in PHOTO_VARIANTS.items():
+        target_path = os.path.join(upload_folder, variant_filename(filename, size))
+        if not os.path.exists(target_path):
+            targets.append((max_side, target_path))
+    return targets
+
+def schedule_variants(filename, upload_folder, max_workers=None):
+    """Render missing variants of a photo in the process pool, off the request path"""
+    targets = get_missing_variants(filename, upload_folder)
+    if not targets:
+        return None
+
+    with _variant_lock:
+        if filename in _pending_variants:
+            return None
+        _pending_variants.add(filename)
+
+    future = get_variant_executor(max_workers).submit(
+        render_variants, os.path.join(upload_folder, filename), targets
+    )
+
+    def done(future):
+        with _variant_lock:
+            _pending_variants.discard(filename)
+        if future.exception():
+            logger.warning("Rendering variants of %s failed: %s", filename, future.exception())
+
+    future.add_done_callback(done)
+    return future
+
+def collect_garbage(upload_folder, dry_run=False, keep=frozenset()):
+    """Reclaim unreferenced blobs and orphaned files, returning (blobs, files) removed.
+
+    Files whose relative path is in keep (chunked uploads in progress) are left alone.
+    """
+    released = 0
+    unreferenced = db.session.execute(
+        db.text("SELECT filename FROM photo_blob WHERE ref_count <= 0")
+    ).scalars().all()
+    for filename in unreferenced:
+        if dry_run or release_photo(filename, upload_folder):
+            released += 1
+
+    known = set(db.session.execute(db.text("SELECT filename FROM photo_blob")).scalars())
+    known_variants = {
+        variant_filename(filename, size) for filename in known for size in PHOTO_VARIANTS
+    }
+    cutoff = time.time() - ORPHAN_GRACE_SECONDS
+    removed = 0
+    for root, dirs, files in os.walk(upload_folder):
+        for name in files:
+            file_path = os.path.join(root, name)
+            filename = os.path.relpath(file_path, upload_folder).replace(os.sep, '/')
+            if filename in known or filename in known_variants or filename in keep or os.path.getmtime(file_path) > cutoff:
+                continue
+            if not dry_run:
+                os.remove(file_path)
+            removed += 1
+
+    return released, removed
@@ -0,0 +1,94 @@
+import re
+from html import escape
+from sqlalchemy import column, table
+from src.models.user import db
+
+# FTS5 index over the searchable issue text. It is an external-content table:
+# the text lives only in the issue table, triggers keep the index in sync.
+issue_fts = table(
+    'issue_fts',
+    column('rowid'),
+    column('title'),
+    column('description'),
+    column('address'),
+    column('admin_notes')
+)
+
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS issue_fts USING fts5(
+        title, description, address, admin_notes,
+        content='issue', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_fts_insert AFTER INSERT ON issue
+    BEGIN
+        INSERT INTO issue_fts (rowid, title, description, address, admin_notes)
+        VALUES (new.id, new.title, new.description, new.address, new.admin_notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_fts_update AFTER UPDATE OF title, description, address, admin_notes ON issue
+    BEGIN
+        INSERT INTO issue_fts (issue_fts, rowid, title, description, address, admin_notes)
+        VALUES ('delete', old.id, old.title, old.description, old.address, old.admin_notes);
+        INSERT INTO issue_fts (rowid, title, description, address, admin_notes)
+        VALUES (new.id, new.title, new.description, new.address, new.admin_notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_fts_delete AFTER DELETE ON issue
+    BEGIN
+        INSERT INTO issue_fts (issue_fts, rowid, title, description, address, admin_notes)
+        VALUES ('delete', old.id, old.title, old.description, old.address, old.admin_notes);
+    END
+    """
+]
+
+# bm25() column weights: title, description, address, admin_notes
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0, 2.0)
+SNIPPET_TOKENS = 16
+# Control characters mark the matches so the snippet can be HTML-escaped safely
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+def install_search_index():
+    """Create the full-text index and its triggers, indexing existing issues"""
+    for statement in SEARCH_INDEX_DDL:
+        db.session.execute(db.text(statement))
+    rebuild_search_index(commit=False)
+
+def rebuild_search_index(commit=True):
+    """Re-index every issue from the issue table"""
+    db.session.execute(db.text("INSERT INTO issue_fts (issue_fts) VALUES ('rebuild')"))
+    if commit:
+        db.session.commit()
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query: all words must match, the last one as a prefix.
+
+    Every word is quoted so user input can never be parsed as FTS5 syntax.
+    """
+    words = [word for word in re.split(r'\s+', text.replace('"', ' ')) if word]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def search_rank():
+    """bm25 relevance of the current match (lower is more relevant)"""
+    return db.func.bm25(db.literal_column('issue_fts'), *SEARCH_WEIGHTS)
+
+def search_snippet():
+    """Snippet of the best matching column with the matches delimited by control characters"""
+    return db.func.snippet(
+        db.literal_column('issue_fts'), -1, _MATCH_START, _MATCH_END, '…', SNIPPET_TOKENS
+    )
+
+def highlight(snippet):
+    """HTML-escape a snippet and wrap the matched words in <mark> tags"""
+    if snippet is None:
+        return None
+    return escape(snippet).replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
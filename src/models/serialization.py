@@ -0,0 +1,40 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the standard library json module is used without it
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson.
+
+    Output matches the default provider's compact form: keys are sorted, and
+    datetimes and values orjson cannot encode go through the same default() hook.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Options such as indent are only understood by the standard library
+            return super().dumps(obj, **kwargs)
+        return self._dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps(obj) + b'\n', mimetype=self.mimetype)
+
+    def _dumps(self, obj):
+        return orjson.dumps(
+            obj, default=self.default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+def install_json_provider(app):
+    """Serialize responses with orjson when it is installed and FAST_JSON is on"""
+    if orjson is not None and app.config.get('FAST_JSON', True):
+        app.json = OrjsonProvider(app)
+    return app.json
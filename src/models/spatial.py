@@ -0,0 +1,66 @@
+from sqlalchemy import column, table
+from src.models.user import db
+
+# R*Tree virtual table holding one zero-area box per geotagged issue.
+# It is not part of the ORM metadata: SQLite creates it through the DDL below
+# and triggers on the issue table keep it in sync, including for bulk writes.
+issue_rtree = table(
+    'issue_rtree',
+    column('id'),
+    column('min_lat'),
+    column('max_lat'),
+    column('min_lng'),
+    column('max_lng')
+)
+
+SPATIAL_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS issue_rtree
+    USING rtree(id, min_lat, max_lat, min_lng, max_lng)
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_rtree_insert AFTER INSERT ON issue
+    WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL
+    BEGIN
+        INSERT INTO issue_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_rtree_update AFTER UPDATE OF latitude, longitude ON issue
+    BEGIN
+        DELETE FROM issue_rtree WHERE id = old.id;
+        INSERT INTO issue_rtree
+        SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_rtree_delete AFTER DELETE ON issue
+    BEGIN
+        DELETE FROM issue_rtree WHERE id = old.id;
+    END
+    """
+]
+
+def install_spatial_index():
+    """Create the spatial index and its triggers, populating it on first install"""
+    existing = db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'issue_rtree'"
+    )).first()
+
+    for statement in SPATIAL_INDEX_DDL:
+        db.session.execute(db.text(statement))
+
+    if not existing:
+        rebuild_spatial_index(commit=False)
+
+def rebuild_spatial_index(commit=True):
+    """Recompute the spatial index from the issue table"""
+    db.session.execute(db.text("DELETE FROM issue_rtree"))
+    db.session.execute(db.text("""
+        INSERT INTO issue_rtree
+        SELECT id, latitude, latitude, longitude, longitude FROM issue
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+    """))
+    if commit:
+        db.session.commit()
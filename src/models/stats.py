@@ -0,0 +1,172 @@
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.archive import NOT_ARCHIVED, all_issues_sql
+
+class IssueCounter(db.Model):
+    """Number of issues per (category, severity, status) combination.
+
+    Triggers on the issue table maintain the counts inside the writing
+    transaction, so reading the statistics never scans the issue table.
+    """
+    __tablename__ = 'issue_counter'
+
+    category = db.Column(db.String(50), primary_key=True)
+    severity = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<IssueCounter {self.category}/{self.severity}/{self.status}: {self.count}>'
+
+ISSUE_COUNTER_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_counter_insert AFTER INSERT ON issue
+    BEGIN
+        INSERT INTO issue_counter (category, severity, status, count)
+        VALUES (new.category, new.severity, new.status, 1)
+        ON CONFLICT (category, severity, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_counter_update AFTER UPDATE OF category, severity, status ON issue
+    WHEN old.category IS NOT new.category OR old.severity IS NOT new.severity OR old.status IS NOT new.status
+    BEGIN
+        UPDATE issue_counter SET count = count - 1
+        WHERE category = old.category AND severity = old.severity AND status = old.status;
+        INSERT INTO issue_counter (category, severity, status, count)
+        VALUES (new.category, new.severity, new.status, 1)
+        ON CONFLICT (category, severity, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_counter_delete AFTER DELETE ON issue
+    WHEN {NOT_ARCHIVED}
+    BEGIN
+        UPDATE issue_counter SET count = count - 1
+        WHERE category = old.category AND severity = old.severity AND status = old.status;
+    END
+    """
+]
+
+def install_issue_counters():
+    """Create the counter triggers, computing the counters on first install"""
+    existing = db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'issue_counter_insert'"
+    )).first()
+
+    for statement in ISSUE_COUNTER_DDL:
+        db.session.execute(db.text(statement))
+
+    if not existing:
+        rebuild_issue_counters(commit=False)
+
+def rebuild_issue_counters(commit=True):
+    """Recompute the counters from scratch with a single grouped aggregation"""
+    db.session.execute(db.text("DELETE FROM issue_counter"))
+    db.session.execute(db.text(f"""
+        INSERT INTO issue_counter (category, severity, status, count)
+        SELECT category, severity, status, COUNT(*) FROM ({all_issues_sql('category', 'severity', 'status')})
+        GROUP BY category, severity, status
+    """))
+    if commit:
+        db.session.commit()
+
+class IssueDistrictCounter(db.Model):
+    """Number of issues per (district, status); '' counts the issues outside every district"""
+    __tablename__ = 'issue_district_counter'
+
+    district = db.Column(db.String(100), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<IssueDistrictCounter {self.district}/{self.status}: {self.count}>'
+
+DISTRICT_COUNTER_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_district_counter_insert AFTER INSERT ON issue
+    BEGIN
+        INSERT INTO issue_district_counter (district, status, count)
+        VALUES (COALESCE(new.district, ''), new.status, 1)
+        ON CONFLICT (district, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issue_district_counter_update AFTER UPDATE OF district, status ON issue
+    WHEN old.district IS NOT new.district OR old.status IS NOT new.status
+    BEGIN
+        UPDATE issue_district_counter SET count = count - 1
+        WHERE district = COALESCE(old.district, '') AND status = old.status;
+        INSERT INTO issue_district_counter (district, status, count)
+        VALUES (COALESCE(new.district, ''), new.status, 1)
+        ON CONFLICT (district, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_district_counter_delete AFTER DELETE ON issue
+    WHEN {NOT_ARCHIVED}
+    BEGIN
+        UPDATE issue_district_counter SET count = count - 1
+        WHERE district = COALESCE(old.district, '') AND status = old.status;
+    END
+    """
+]
+
+def install_district_counters():
+    """Create the district counter triggers and compute the counters"""
+    for statement in DISTRICT_COUNTER_DDL:
+        db.session.execute(db.text(statement))
+    rebuild_district_counters(commit=False)
+
+def rebuild_district_counters(commit=True):
+    """Recompute the district counters with a single grouped aggregation over live and archived issues"""
+    db.session.execute(db.text("DELETE FROM issue_district_counter"))
+    db.session.execute(db.text(f"""
+        INSERT INTO issue_district_counter (district, status, count)
+        SELECT COALESCE(district, ''), status, COUNT(*) FROM ({all_issues_sql('district', 'status')})
+        GROUP BY COALESCE(district, ''), status
+    """))
+    if commit:
+        db.session.commit()
+
+def get_district_counts():
+    """Return ({district: {'total', 'status_counts'}}, number of issues outside every district)"""
+    districts = {}
+    unassigned = 0
+    for counter in IssueDistrictCounter.query.filter(IssueDistrictCounter.count > 0).order_by(IssueDistrictCounter.district):
+        if not counter.district:
+            unassigned += counter.count
+            continue
+        counts = districts.setdefault(counter.district, {
+            'total': 0, 'status_counts': dict.fromkeys(Issue.get_statuses(), 0)
+        })
+        counts['total'] += counter.count
+        if counter.status in counts['status_counts']:
+            counts['status_counts'][counter.status] += counter.count
+    return districts, unassigned
+
+def get_issue_counts():
+    """Return the total and per-status/category/severity/district counts from the counters"""
+    status_counts = dict.fromkeys(Issue.get_statuses(), 0)
+    category_counts = dict.fromkeys(Issue.get_categories(), 0)
+    severity_counts = dict.fromkeys(Issue.get_severities(), 0)
+    total = 0
+
+    for counter in IssueCounter.query.filter(IssueCounter.count > 0):
+        total += counter.count
+        if counter.status in status_counts:
+            status_counts[counter.status] += counter.count
+        if counter.category in category_counts:
+            category_counts[counter.category] += counter.count
+        if counter.severity in severity_counts:
+            severity_counts[counter.severity] += counter.count
+
+    district_counts, unassigned_count = get_district_counts()
+    return {
+        'total_issues': total,
+        'status_counts': status_counts,
+        'category_counts': category_counts,
+        'severity_counts': severity_counts,
+        'district_counts': district_counts,
+        'unassigned_count': unassigned_count
+    }
@@ -0,0 +1,289 @@
+from datetime import date, timedelta
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.changes import SQL_NOW
+from src.models.archive import NOT_ARCHIVED, all_issues_sql
+
+class IssueDailyRollup(db.Model):
+    """Issue activity per (day, category, severity, status), maintained by triggers.
+
+    created counts the issues created on the day that are now in the status.
+    entered is the net number of issues that moved into the status on the day;
+    summed over all days up to D it gives the backlog in that status at the end of D.
+    """
+    __tablename__ = 'issue_daily_rollup'
+
+    day = db.Column(db.String(10), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    severity = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    created = db.Column(db.Integer, nullable=False, default=0)
+    entered = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<IssueDailyRollup {self.day} {self.category}/{self.severity}/{self.status}>'
+
+class IssueResolutionRollup(db.Model):
+    """Histogram of created-to-resolved times per (resolution day, category, severity)"""
+    __tablename__ = 'issue_resolution_rollup'
+
+    day = db.Column(db.String(10), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    severity = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_seconds = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<IssueResolutionRollup {self.day} {self.category}/{self.severity} #{self.bucket}>'
+
+# Upper bounds (hours) of the resolution time buckets; the last bucket is open-ended.
+# Medians are interpolated inside a bucket, so they are approximate.
+RESOLUTION_BUCKET_HOURS = (1, 2, 4, 8, 12, 24, 48, 72, 120, 168, 336, 504, 720, 1440, 2160, 4320, 8760)
+MAX_TREND_DAYS = 3660
+
+def _resolution_seconds(ref):
+    return f"max(0, (julianday({ref}.resolved_at) - julianday({ref}.created_at)) * 86400)"
+
+def _resolution_bucket(ref):
+    seconds = _resolution_seconds(ref)
+    cases = ' '.join(f"WHEN {seconds} <= {hours * 3600} THEN {index}"
+                     for index, hours in enumerate(RESOLUTION_BUCKET_HOURS))
+    return f"CASE {cases} ELSE {len(RESOLUTION_BUCKET_HOURS)} END"
+
+def _add_daily(day, ref, status, created, entered, condition='1'):
+    """SQL adding created/entered to the daily rollup row of a trigger row ('new' or 'old')"""
+    # INSERT ... SELECT needs a WHERE clause before ON CONFLICT to parse unambiguously
+    return f"""
+        INSERT INTO issue_daily_rollup (day, category, severity, status, created, entered)
+        SELECT {day}, {ref}.category, {ref}.severity, {status}, {created}, {entered} WHERE {condition}
+        ON CONFLICT (day, category, severity, status) DO UPDATE
+        SET created = created + excluded.created, entered = entered + excluded.entered;"""
+
+def _add_resolution(ref, sign):
+    return f"""
+        INSERT INTO issue_resolution_rollup (day, category, severity, bucket, count, total_seconds)
+        SELECT date({ref}.resolved_at), {ref}.category, {ref}.severity, {_resolution_bucket(ref)},
+               {sign}, {sign} * {_resolution_seconds(ref)}
+        WHERE {ref}.status = 'resolved' AND {ref}.resolved_at IS NOT NULL
+        ON CONFLICT (day, category, severity, bucket) DO UPDATE
+        SET count = count + excluded.count, total_seconds = total_seconds + excluded.total_seconds;"""
+
+# A resolved issue with a resolution time was reported on its creation day and
+# resolved on its resolution day; any other issue is taken to have entered its
+# current status when it was created (imports carry no status history).
+_RESOLVED_PATH = "new.status = 'resolved' AND new.resolved_at IS NOT NULL"
+_TRANSITION_DAY = f"date(coalesce(new.updated_at, {SQL_NOW}))"
+_CHANGED_KEY = ("old.category IS NOT new.category OR old.severity IS NOT new.severity "
+                "OR old.status IS NOT new.status")
+
+TRENDS_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_rollup_insert AFTER INSERT ON issue
+    BEGIN
+        {_add_daily('date(new.created_at)', 'new', 'new.status', 1, 0)}
+        {_add_daily('date(new.created_at)', 'new', f"CASE WHEN {_RESOLVED_PATH} THEN 'reported' ELSE new.status END", 0, 1)}
+        {_add_daily('date(new.resolved_at)', 'new', "'reported'", 0, -1, _RESOLVED_PATH)}
+        {_add_daily('date(new.resolved_at)', 'new', "'resolved'", 0, 1, _RESOLVED_PATH)}
+        {_add_resolution('new', 1)}
+    END
+    """,
+    # Status changes are recorded on the day they are made (updated_at); the
+    # created counts move with the issue to its new key
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_rollup_update
+    AFTER UPDATE OF category, severity, status, created_at, resolved_at ON issue
+    WHEN {_CHANGED_KEY} OR old.created_at IS NOT new.created_at OR old.resolved_at IS NOT new.resolved_at
+    BEGIN
+        {_add_daily('date(old.created_at)', 'old', 'old.status', -1, 0,
+                    f'{_CHANGED_KEY} OR old.created_at IS NOT new.created_at')}
+        {_add_daily('date(new.created_at)', 'new', 'new.status', 1, 0,
+                    f'{_CHANGED_KEY} OR old.created_at IS NOT new.created_at')}
+        {_add_daily(_TRANSITION_DAY, 'old', 'old.status', 0, -1, _CHANGED_KEY)}
+        {_add_daily(_TRANSITION_DAY, 'new', 'new.status', 0, 1, _CHANGED_KEY)}
+        {_add_resolution('old', -1)}
+        {_add_resolution('new', 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS issue_rollup_delete AFTER DELETE ON issue
+    WHEN {NOT_ARCHIVED}
+    BEGIN
+        {_add_daily('date(old.created_at)', 'old', 'old.status', -1, 0)}
+        {_add_daily(f'date({SQL_NOW})', 'old', 'old.status', 0, -1)}
+        {_add_resolution('old', -1)}
+    END
+    """
+]
+
+def install_trend_rollups():
+    """Create the rollup tables and triggers, backfilling them on first install"""
+    existing = db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'issue_rollup_insert'"
+    )).first()
+
+    connection = db.session.connection()
+    IssueDailyRollup.__table__.create(bind=connection, checkfirst=True)
+    IssueResolutionRollup.__table__.create(bind=connection, checkfirst=True)
+    for statement in TRENDS_DDL:
+        db.session.execute(db.text(statement))
+
+    if not existing:
+        rebuild_trend_rollups(commit=False)
+
+def rebuild_trend_rollups(commit=True):
+    """Recompute the rollups from the live and archived issues with grouped aggregations.
+
+    Status history is not stored, so the backlog is rebuilt as the insert
+    trigger would have recorded the current rows (see issue_rollup_insert).
+    """
+    db.session.execute(db.text("DELETE FROM issue_daily_rollup"))
+    db.session.execute(db.text("DELETE FROM issue_resolution_rollup"))
+    resolved_path = _RESOLVED_PATH.replace('new.', '')
+    issues = f"WITH issues AS ({all_issues_sql('category', 'severity', 'status', 'created_at', 'resolved_at')})"
+    db.session.execute(db.text(f"""
+        INSERT INTO issue_daily_rollup (day, category, severity, status, created, entered)
+        {issues}
+        SELECT day, category, severity, status, SUM(created), SUM(entered) FROM (
+            SELECT date(created_at) AS day, category, severity, status, 1 AS created, 0 AS entered FROM issues
+            UNION ALL
+            SELECT date(created_at), category, severity,
+                   CASE WHEN {resolved_path} THEN 'reported' ELSE status END, 0, 1 FROM issues
+            UNION ALL
+            SELECT date(resolved_at), category, severity, 'reported', 0, -1 FROM issues WHERE {resolved_path}
+            UNION ALL
+            SELECT date(resolved_at), category, severity, 'resolved', 0, 1 FROM issues WHERE {resolved_path}
+        )
+        GROUP BY day, category, severity, status
+    """))
+    db.session.execute(db.text(f"""
+        INSERT INTO issue_resolution_rollup (day, category, severity, bucket, count, total_seconds)
+        {issues}
+        SELECT date(resolved_at), category, severity, bucket, COUNT(*), SUM(seconds) FROM (
+            SELECT resolved_at, category, severity,
+                   {_resolution_bucket('issues')} AS bucket, {_resolution_seconds('issues')} AS seconds
+            FROM issues WHERE {resolved_path}
+        )
+        GROUP BY date(resolved_at), category, severity, bucket
+    """))
+    if commit:
+        db.session.commit()
+
+def period_start(day, interval):
+    """Return the first day of the day or ISO week (Monday) containing day"""
+    return day - timedelta(days=day.weekday()) if interval == 'week' else day
+
+def period_column(column, interval):
+    """SQL expression of the period (day, or the Monday of its week) a day column falls in"""
+    return db.func.date(column, 'weekday 0', '-6 days') if interval == 'week' else column
+
+def bucket_median(buckets):
+    """Approximate the median from {bucket: (count, total_seconds)}, in seconds"""
+    total = sum(count for count, _ in buckets.values())
+    if total <= 0:
+        return None
+
+    middle = total / 2
+    seen = 0
+    for index in sorted(buckets):
+        count, total_seconds = buckets[index]
+        if count <= 0:
+            continue
+        if seen + count >= middle:
+            if index >= len(RESOLUTION_BUCKET_HOURS):
+                # Open-ended bucket: its mean is the best estimate available
+                return total_seconds / count
+            lower = RESOLUTION_BUCKET_HOURS[index - 1] * 3600 if index else 0
+            upper = RESOLUTION_BUCKET_HOURS[index] * 3600
+            return lower + (upper - lower) * (middle - seen) / count
+        seen += count
+    return None
+
+def get_trends(start, end, interval='day', categories=None, severities=None):
+    """Return new reports, backlog and resolution times per day or week between two dates"""
+    def filtered(model, query):
+        if categories:
+            query = query.filter(model.category.in_(categories))
+        if severities:
+            query = query.filter(model.severity.in_(severities))
+        return query
+
+    first = period_start(start, interval)
+    step = timedelta(days=7 if interval == 'week' else 1)
+    periods = {}
+    day = first
+    while day <= end:
+        periods[day] = {
+            'period': day.isoformat(),
+            'new_reports': dict.fromkeys(Issue.get_categories(), 0),
+            'backlog': dict.fromkeys([status for status in Issue.get_statuses() if status != 'resolved'], 0),
+            'resolved': 0,
+        }
+        day += step
+
+    # Backlog carried into the range, then the daily changes within it
+    backlog = dict.fromkeys(Issue.get_statuses(), 0)
+    carried = filtered(IssueDailyRollup, db.session.query(
+        IssueDailyRollup.status, db.func.sum(IssueDailyRollup.entered)
+    ).filter(IssueDailyRollup.day < first.isoformat())).group_by(IssueDailyRollup.status)
+    for status, entered in carried:
+        backlog[status] = backlog.get(status, 0) + (entered or 0)
+
+    # Aggregated per period in SQL, so a weekly range returns a seventh of the rows
+    period = period_column(IssueDailyRollup.day, interval)
+    rows = filtered(IssueDailyRollup, db.session.query(
+        period, IssueDailyRollup.category, IssueDailyRollup.status,
+        db.func.sum(IssueDailyRollup.created), db.func.sum(IssueDailyRollup.entered)
+    ).filter(IssueDailyRollup.day.between(first.isoformat(), end.isoformat()))) \
+        .group_by(period, IssueDailyRollup.category, IssueDailyRollup.status)
+
+    changes = {}
+    for day, category, status, created, entered in rows:
+        key = date.fromisoformat(day)
+        if category in periods[key]['new_reports']:
+            periods[key]['new_reports'][category] += created
+        changes.setdefault(key, {}).setdefault(status, 0)
+        changes[key][status] += entered
+
+    for key, period in periods.items():
+        for status, entered in changes.get(key, {}).items():
+            backlog[status] = backlog.get(status, 0) + entered
+        period['new_reports']['total'] = sum(period['new_reports'].values())
+        period['backlog'] = {status: backlog.get(status, 0) for status in period['backlog']}
+        period['backlog']['open'] = sum(period['backlog'].values())
+
+    # Resolution time histograms per period, and for the whole range
+    histograms = {}
+    overall = {}
+    period = period_column(IssueResolutionRollup.day, interval)
+    rows = filtered(IssueResolutionRollup, db.session.query(
+        period, IssueResolutionRollup.bucket,
+        db.func.sum(IssueResolutionRollup.count), db.func.sum(IssueResolutionRollup.total_seconds)
+    ).filter(IssueResolutionRollup.day.between(first.isoformat(), end.isoformat()))) \
+        .group_by(period, IssueResolutionRollup.bucket)
+    for day, bucket, count, total_seconds in rows:
+        key = date.fromisoformat(day)
+        for histogram in (histograms.setdefault(key, {}), overall):
+            previous_count, previous_seconds = histogram.get(bucket, (0, 0.0))
+            histogram[bucket] = (previous_count + count, previous_seconds + total_seconds)
+
+    def resolution_summary(histogram):
+        count = sum(count for count, _ in histogram.values())
+        total_seconds = sum(seconds for _, seconds in histogram.values())
+        median = bucket_median(histogram)
+        return {
+            'resolved': count,
+            'median_resolution_hours': round(median / 3600, 1) if median is not None else None,
+            'mean_resolution_hours': round(total_seconds / count / 3600, 1) if count > 0 else None,
+        }
+
+    for key, period in periods.items():
+        period.update(resolution_summary(histograms.get(key, {})))
+
+    return {
+        'interval': interval,
+        'start': first.isoformat(),
+        'end': end.isoformat(),
+        'periods': list(periods.values()),
+        'summary': resolution_summary(overall),
+    }
@@ -0,0 +1,213 @@
+import os
+import re
+import secrets
+import hashlib
+from datetime import datetime, timedelta
+from werkzeug.exceptions import ClientDisconnected
+from src.models.user import db
+from src.models.photo import TEMP_DIR, CHUNK_SIZE, blob_filename, place_photo
+
+class PhotoUpload(db.Model):
+    """A photo uploaded in chunks, resumable from the last acknowledged offset.
+
+    Chunks are appended to a temp file under tmp/uploads/. Once the checksum is
+    verified photo_filename holds the blob path, and the file moves into the blob
+    store when the upload is attached to its issue.
+    """
+    __tablename__ = 'photo_upload'
+
+    # Unguessable: holding the id is what allows appending to the upload and attaching it
+    id = db.Column(db.String(32), primary_key=True)
+    original_name = db.Column(db.String(255), nullable=False)
+    # Lowercased extension of the name the client sent; secure_filename() drops
+    # it along with the rest of a non-ASCII name
+    extension = db.Column(db.String(10), nullable=True)
+    size = db.Column(db.Integer, nullable=False)
+    received = db.Column(db.Integer, nullable=False, default=0)
+    sha256 = db.Column(db.String(64), nullable=True)
+    photo_filename = db.Column(db.String(255), nullable=True)
+    # Set when an issue was created with the upload before it finished
+    issue_id = db.Column(db.Integer, nullable=True)
+    # Held by the request writing a chunk, so two requests never write the temp file at once
+    lock_token = db.Column(db.String(32), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<PhotoUpload {self.id}: {self.received}/{self.size}>'
+
+    @property
+    def complete(self):
+        return self.photo_filename is not None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.original_name,
+            'size': self.size,
+            'offset': self.received,
+            'complete': self.complete,
+            'issue_id': self.issue_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+UPLOADS_DIR = f'{TEMP_DIR}/uploads'
+DEFAULT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_PHOTO_SIZE = 16 * 1024 * 1024
+# Unfinished or unattached uploads untouched for this long are removed by gc-photos
+DEFAULT_UPLOAD_EXPIRY_HOURS = 24
+# A chunk lock older than this belongs to a request that died; another request may take it
+UPLOAD_LOCK_SECONDS = 300
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+def upload_path(upload_folder, upload_id):
+    """Return the temp file receiving the chunks of an upload"""
+    return os.path.join(upload_folder, UPLOADS_DIR, f'{upload_id}.part')
+
+def start_upload(original_name, extension, size, sha256, upload_folder):
+    """Create an upload and its empty temp file; the caller commits"""
+    upload = PhotoUpload(id=secrets.token_hex(16), original_name=original_name, extension=extension.lower(),
+                         size=size, sha256=sha256)
+    path = upload_path(upload_folder, upload.id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    db.session.add(upload)
+    return upload
+
+def write_chunk(path, offset, stream, length):
+    """Write up to length bytes from stream at offset, returning the bytes written.
+
+    Anything past offset is dropped first: those are bytes of an earlier attempt
+    that were never acknowledged. A client that disconnects mid-chunk keeps what
+    arrived, so it can resume from there.
+    """
+    written = 0
+    with open(path, 'r+b') as part_file:
+        part_file.seek(offset)
+        part_file.truncate()
+        try:
+            while written < length:
+                data = stream.read(min(CHUNK_SIZE, length - written))
+                if not data:
+                    break
+                part_file.write(data)
+                written += len(data)
+        except ClientDisconnected:
+            pass
+    return written
+
+def lock_upload(upload_id, offset):
+    """Take the chunk lock of an upload still at offset, returning its token or None if that failed.
+
+    Compare-and-set in one UPDATE: of two requests sending the chunk at the same
+    offset, only one gets to write the temp file.
+    """
+    now = datetime.utcnow()
+    token = secrets.token_hex(16)
+    result = db.session.execute(
+        db.update(PhotoUpload)
+        .where(PhotoUpload.id == upload_id, PhotoUpload.received == offset, PhotoUpload.photo_filename.is_(None),
+               db.or_(PhotoUpload.lock_token.is_(None),
+                      PhotoUpload.locked_at < now - timedelta(seconds=UPLOAD_LOCK_SECONDS)))
+        .values(lock_token=token, locked_at=now)
+    )
+    db.session.commit()
+    return token if result.rowcount == 1 else None
+
+def unlock_upload(upload_id, token):
+    """Release a chunk lock without moving the offset"""
+    db.session.execute(
+        db.update(PhotoUpload).where(PhotoUpload.id == upload_id, PhotoUpload.lock_token == token)
+        .values(lock_token=None, locked_at=None)
+    )
+    db.session.commit()
+
+def acknowledge_chunk(upload_id, token, offset, written):
+    """Move an upload's offset past a written chunk and release the lock, returning False if the lock was lost"""
+    result = db.session.execute(
+        db.update(PhotoUpload)
+        .where(PhotoUpload.id == upload_id, PhotoUpload.lock_token == token, PhotoUpload.received == offset,
+               PhotoUpload.photo_filename.is_(None))
+        .values(received=offset + written, lock_token=None, locked_at=None, updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as part_file:
+        for data in iter(lambda: part_file.read(CHUNK_SIZE), b''):
+            sha256.update(data)
+    return sha256.hexdigest()
+
+def complete_upload(upload_id, photo_filename):
+    """Mark a verified upload complete, returning the upload (re-read) or None if it already was.
+
+    The UPDATE comes first so the transaction holds the write lock before the
+    upload is read again: an issue bound to it concurrently is seen here.
+    """
+    result = db.session.execute(
+        db.update(PhotoUpload)
+        .where(PhotoUpload.id == upload_id, PhotoUpload.photo_filename.is_(None))
+        .values(photo_filename=photo_filename, updated_at=datetime.utcnow())
+    )
+    if result.rowcount != 1:
+        return None
+    return db.session.get(PhotoUpload, upload_id, populate_existing=True)
+
+def attach_upload(upload, issue, upload_folder):
+    """Give an issue the photo of a completed upload and move the file into the blob store.
+
+    Runs inside the issue's write transaction: the issue row must be flushed
+    before place_photo() (see there). The upload itself is consumed.
+    """
+    issue.photo_filename = upload.photo_filename
+    issue.photo_original_name = upload.original_name
+    issue.updated_at = datetime.utcnow()
+    db.session.flush()
+    temp_path = upload_path(upload_folder, upload.id)
+    # A retried write job finds the file already moved by its first attempt
+    if os.path.exists(temp_path):
+        place_photo(temp_path, upload.photo_filename, upload_folder)
+    db.session.delete(upload)
+
+def verified_filename(upload, digest):
+    """Return the blob path for an upload's verified content hash"""
+    return blob_filename(digest, upload.extension)
+
+def expire_uploads(upload_folder, max_age_hours=DEFAULT_UPLOAD_EXPIRY_HOURS, dry_run=False):
+    """Remove uploads untouched for max_age_hours with their temp files, returning the number removed"""
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    expired = PhotoUpload.query.filter(PhotoUpload.updated_at < cutoff).all()
+    if dry_run:
+        return len(expired)
+
+    for upload in expired:
+        db.session.delete(upload)
+    db.session.commit()
+    for upload in expired:
+        path = upload_path(upload_folder, upload.id)
+        if os.path.exists(path):
+            os.remove(path)
+    return len(expired)
+
+def backfill_upload_extensions():
+    """Fill in the extension of uploads started before it had a column.
+
+    Uploads whose stored name has none (secure_filename() dropped it) can never
+    be finalized and are removed; gc-photos reclaims their temp files.
+    """
+    rows = db.session.execute(
+        db.select(PhotoUpload.id, PhotoUpload.original_name).where(PhotoUpload.extension.is_(None))
+    ).all()
+    for upload_id, original_name in rows:
+        if '.' in original_name:
+            db.session.execute(db.update(PhotoUpload).where(PhotoUpload.id == upload_id)
+                               .values(extension=original_name.rsplit('.', 1)[1].lower()))
+        else:
+            db.session.execute(db.delete(PhotoUpload).where(PhotoUpload.id == upload_id))
+
+def active_upload_files():
+    """Return the relative temp file paths of the uploads still in the table"""
+    return {f'{UPLOADS_DIR}/{upload_id}.part' for upload_id in db.session.execute(db.select(PhotoUpload.id)).scalars()}
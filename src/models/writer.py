@@ -0,0 +1,118 @@
+import queue
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+from flask import current_app
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_COMMIT_MAX_BATCH = 100
+# Seconds to wait for queued writes to be committed when the process exits
+SHUTDOWN_TIMEOUT = 10
+
+_writer_lock = threading.Lock()
+
+class GroupCommitWriter:
+    """Single thread committing queued write jobs, many per transaction.
+
+    SQLite has one write lock, so requests that each commit on their own take
+    turns on it and pay one commit each. Here every job waiting in the queue
+    when the writer becomes free goes into the same transaction (group commit).
+    A job is a callable run with the writer's session; its return value is the
+    result of the Future returned by submit(), set once the batch is committed.
+    """
+
+    def __init__(self, app, max_batch=DEFAULT_GROUP_COMMIT_MAX_BATCH):
+        self.app = app
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='group-commit-writer', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def submit(self, job):
+        """Queue a write job, returning a Future for its result"""
+        future = Future()
+        self.queue.put((job, future))
+        return future
+
+    def stop(self):
+        """Commit the jobs already queued and stop the writer thread"""
+        self.queue.put(None)
+        self.thread.join(SHUTDOWN_TIMEOUT)
+
+    def _next_batch(self):
+        """Block for the next job, then take whatever else is already waiting"""
+        item = self.queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        while len(batch) < self.max_batch:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Leave the stop marker for the next round
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                batch = [(job, future) for job, future in batch if future.set_running_or_notify_cancel()]
+                if batch:
+                    self._commit_batch(batch)
+                db.session.remove()
+
+    def _commit_batch(self, batch):
+        """Run the jobs in one transaction, retrying them one by one if it fails"""
+        try:
+            results = [job() for job, _ in batch]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Isolate the failing job so the others still commit
+            logger.debug("Group commit of %d jobs failed, retrying individually: %s", len(batch), e)
+            for item in batch:
+                self._commit_batch([item])
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+def get_writer(app):
+    """Return the application's group-commit writer, starting it on first use"""
+    with _writer_lock:
+        writer = app.extensions.get('group_commit_writer')
+        if writer is None:
+            writer = GroupCommitWriter(app, app.config.get('GROUP_COMMIT_MAX_BATCH', DEFAULT_GROUP_COMMIT_MAX_BATCH))
+            app.extensions['group_commit_writer'] = writer
+    return writer
+
+def run_write(job):
+    """Run a write job and commit it, through the group-commit writer if GROUP_COMMIT is on.
+
+    Jobs may be run more than once (a failed batch is retried job by job), so
+    they must create their objects inside the job and not depend on request state.
+    With group commit the request's session is closed first: its pooled connection
+    would otherwise stay checked out while waiting, and enough waiting requests
+    would leave the writer without a connection.
+    """
+    app = current_app._get_current_object()
+    if not app.config.get('GROUP_COMMIT'):
+        result = job()
+        db.session.commit()
+        return result
+    db.session.close()
+    return get_writer(app).submit(job).result()
@@ -1,9 +1,95 @@
+import time
+import threading
 from datetime import datetime
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, current_app, g, jsonify, request, session
 from src.models.user import User, db
 
 auth_bp = Blueprint('auth', __name__)
 
+# Admin requests are authorized from the signed session: login stores the user's
+# id, username and is_admin flag with the time they were read from the database
+# (verified_at). The claim is trusted for PRINCIPAL_CACHE_TTL seconds, then
+# re-checked against the user row and re-signed. Behind it sits an in-process
+# cache of user rows: user id -> (loaded_at, user dict or None).
+#
+# Both are per client or per process, so a changed or deleted user keeps its old
+# rights in other worker processes for up to PRINCIPAL_CACHE_TTL seconds. The
+# worker making the change stops trusting older claims and cache entries at once.
+DEFAULT_PRINCIPAL_CACHE_TTL = 10
+MAX_CACHED_PRINCIPALS = 1024
+
+_principals = {}
+# user id (None: every user) -> time of the last change made through this process
+_invalidated = {}
+_principals_lock = threading.Lock()
+
+def get_principal_ttl():
+    return current_app.config.get('PRINCIPAL_CACHE_TTL', DEFAULT_PRINCIPAL_CACHE_TTL)
+
+def _load_principal(user_id):
+    """Return (loaded_at, user dict or None), from the cache while the entry is fresh"""
+    now = time.time()
+    ttl = get_principal_ttl()
+    entry = _principals.get(user_id)
+    if entry and now - entry[0] < ttl:
+        return entry
+
+    user = User.query.get(user_id)
+    entry = (now, user.to_dict() if user else None)
+
+    with _principals_lock:
+        if len(_principals) >= MAX_CACHED_PRINCIPALS:
+            # Drop expired entries first, then the oldest insertions
+            for key in [key for key, (loaded_at, _) in _principals.items() if now - loaded_at >= ttl]:
+                del _principals[key]
+            while len(_principals) >= MAX_CACHED_PRINCIPALS:
+                del _principals[next(iter(_principals))]
+        _principals[user_id] = entry
+
+    return entry
+
+def get_principal(user_id):
+    """Return the cached user dict for user_id, loading it on a miss (None if deleted)"""
+    return _load_principal(user_id)[1]
+
+def get_session_principal():
+    """Return the principal of the session's signed claim, re-checking the user row once it is stale.
+
+    A fresh claim needs no database round trip; it is a dict with the user's
+    id, username and is_admin flag. Returns None without a session or once the
+    user has been deleted.
+    """
+    user_id = session.get('user_id')
+    if user_id is None:
+        return None
+
+    verified_at = session.get('verified_at', 0)
+    invalidated_at = max(_invalidated.get(user_id, 0), _invalidated.get(None, 0))
+    if time.time() - verified_at < get_principal_ttl() and verified_at > invalidated_at:
+        return {'id': user_id, 'username': session.get('username'), 'is_admin': session.get('is_admin', False)}
+
+    loaded_at, principal = _load_principal(user_id)
+    if principal is None:
+        session.clear()
+        return None
+    # Stamped with the read time of the row, so the claim never outlives it by more than the TTL
+    session.update(username=principal['username'], is_admin=principal['is_admin'], verified_at=loaded_at)
+    return principal
+
+def invalidate_principal(user_id=None):
+    """Drop a cached principal and distrust older session claims after the user changed, or all of them"""
+    now = time.time()
+    ttl = get_principal_ttl()
+    with _principals_lock:
+        if user_id is None:
+            _principals.clear()
+        else:
+            _principals.pop(user_id, None)
+        # Claims older than the TTL are re-checked anyway
+        for key in [key for key, changed_at in _invalidated.items() if now - changed_at >= ttl]:
+            del _invalidated[key]
+        _invalidated[user_id] = now
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """Admin login endpoint"""
@@ -19,11 +105,13 @@ def login():
             # Update last login
             user.last_login = datetime.utcnow()
             db.session.commit()
+            invalidate_principal(user.id)
             
-            # Store user info in session
+            # Store user info in session; the signed claim authorizes admin requests until it is stale
             session['user_id'] = user.id
             session['username'] = user.username
             session['is_admin'] = user.is_admin
+            session['verified_at'] = time.time()
             
             return jsonify({
                 'message': 'Login successful',
@@ -49,11 +137,11 @@ def check_auth():
     """Check if user is authenticated"""
     try:
         if 'user_id' in session:
-            user = User.query.get(session['user_id'])
-            if user:
+            principal = get_principal(session['user_id'])
+            if principal:
                 return jsonify({
                     'authenticated': True,
-                    'user': user.to_dict()
+                    'user': principal
                 })
         
         return jsonify({'authenticated': False}), 401
@@ -101,10 +189,12 @@ def require_auth(f):
         if 'user_id' not in session:
             return jsonify({'error': 'Authentication required'}), 401
         
-        user = User.query.get(session['user_id'])
-        if not user or not user.is_admin:
+        principal = get_session_principal()
+        if not principal or not principal['is_admin']:
             return jsonify({'error': 'Admin access required'}), 403
         
+        # Handlers read the authenticated user (id, username, is_admin) from g instead of querying it again
+        g.principal = principal
         return f(*args, **kwargs)
     
     return decorated_function
@@ -1,61 +1,576 @@
 import os
-import hashlib
-import uuid
-from datetime import datetime
-from flask import Blueprint, jsonify, request, current_app, send_from_directory
+import io
+import csv
+import json
+import heapq
+import base64
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, jsonify, make_response, request, current_app, send_from_directory, stream_with_context
 from werkzeug.utils import secure_filename
 from src.models.user import db
 from src.models.issue import Issue
+from src.models.archive import ArchivedIssue
+from src.models.spatial import issue_rtree
+from src.models.stats import get_issue_counts
+from src.models.trends import get_trends, MAX_TREND_DAYS
+from src.models.heatmap import (
+    MAX_HEATMAP_ZOOM, compute_tile, get_heatmap_cache, tile_bounds, tile_fingerprint, tile_payload
+)
+from src.models.search import issue_fts, build_match_query, search_rank, search_snippet, highlight
+from src.models.ingest import ingest_issues, read_csv_records, read_ndjson_records
+from src.models.duplicates import IssueSignature, minhash, find_duplicate
+from src.models.writer import run_write
+from src.models.changes import IssueTombstone, get_issue_version
+from src.models.upload import PhotoUpload, attach_upload
+from src.models.districts import District, get_district_index
+from src.models.bulk import MAX_BULK_ISSUES, BULK_FIELDS, apply_bulk_update, apply_bulk_delete
+from src.models.compression import gzip_stream
+from src.models.engine import read_snapshot
+from src.models.events import get_broadcaster, publish_issue_event, publish_issue_events, issue_event_data
+from src.routes.auth import require_auth
+from src.models.photo import (
+    PHOTO_VARIANTS, blob_filename, write_temp_photo, place_photo, release_photo, release_photos_later,
+    variant_filename, schedule_variants
+)
 
 issue_bp = Blueprint('issue', __name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+MAX_PAGE_SIZE = 500
+
+# Map viewport queries return individual points from this zoom level upwards
+CLUSTER_MAX_ZOOM = 15
+CLUSTER_CELLS_PER_TILE = 4
+MAX_MAP_POINTS = 1000
+MAP_POINT_FIELDS = 'id,title,summary,category,severity,status,latitude,longitude,created_at'
+
+EXPORT_BATCH_SIZE = 1000
+CSV_EXPORT_FIELDS = [header for header, _ in Issue.get_csv_columns()]
+
+# Event streams send a comment line this often so proxies keep idle connections open
+EVENT_HEARTBEAT_SECONDS = 15
+EVENT_RETRY_MILLISECONDS = 5000
+
+# Writes stamp updated_at before they commit, so a change may become visible
+# slightly after a later one. Sync cursors never move past this many seconds
+# ago; changes inside the window are sent again on the next poll.
+CHANGES_SETTLE_SECONDS = 2
+
+# Periods returned by /issues/trends when no start date is given
+DEFAULT_TREND_PERIODS = 30
 
 def allowed_file(filename):
     """Check if the file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def generate_hashed_filename(original_filename):
-    """Generate a hashed filename to avoid duplicates and conflicts"""
-    # Get file extension
-    ext = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
-    
-    # Generate hash based on timestamp and random UUID
-    timestamp = str(datetime.utcnow().timestamp())
-    random_id = str(uuid.uuid4())
-    hash_input = f"{timestamp}_{random_id}_{original_filename}"
-    
-    # Create SHA256 hash
-    file_hash = hashlib.sha256(hash_input.encode()).hexdigest()[:16]
-    
-    return f"{file_hash}.{ext}" if ext else file_hash
+def apply_issue_filters(query, args, model=Issue):
+    """Apply the category/status/severity/district/date filters shared by the list endpoints"""
+    category = args.get('category')
+    status = args.get('status')
+    severity = args.get('severity')
+    district = args.get('district')
+    created_from = parse_date_param(args.get('created_from'))
+    created_to = parse_date_param(args.get('created_to'), end_of_day=True)
+
+    if category and category in Issue.get_categories():
+        query = query.filter(model.category == category)
+
+    if status and status in Issue.get_statuses():
+        query = query.filter(model.status == status)
+
+    if severity and severity in Issue.get_severities():
+        query = query.filter(model.severity == severity)
+
+    if district:
+        query = query.filter(model.district == district)
+
+    if created_from:
+        query = query.filter(model.created_at >= created_from)
+
+    if created_to:
+        query = query.filter(model.created_at <= created_to)
+
+    return query
+
+def parse_bulk_selection(data):
+    """Return (ids, selection) for a bulk request body with either an ids list or a filter object.
+
+    Unlike the list endpoints, invalid filter values are rejected rather than
+    ignored, so a typo cannot widen the selection to every issue.
+    """
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if (ids is None) == (filters is None):
+        raise ValueError('give either ids or filter')
+
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or \
+                not all(isinstance(issue_id, int) and not isinstance(issue_id, bool) for issue_id in ids):
+            raise ValueError('ids must be a non-empty list of integers')
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BULK_ISSUES:
+            raise ValueError(f'at most {MAX_BULK_ISSUES} ids per request')
+        return ids, ids
+
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError('filter must be a non-empty object')
+    choices = {
+        'category': Issue.get_categories(),
+        'status': Issue.get_statuses(),
+        'severity': Issue.get_severities(),
+        'district': None,
+        'created_from': None,
+        'created_to': None,
+    }
+    for key, value in filters.items():
+        if key not in choices or not isinstance(value, str):
+            raise ValueError(f'unknown filter {key}; use {", ".join(choices)}')
+        if choices[key] is not None and value not in choices[key]:
+            raise ValueError(f'invalid {key}: {value}')
+
+    selection = apply_issue_filters(db.select(Issue.id), filters)
+    matched = db.session.execute(db.select(db.func.count()).select_from(selection.subquery())).scalar()
+    if matched > MAX_BULK_ISSUES:
+        raise ValueError(f'filter matches {matched} issues; at most {MAX_BULK_ISSUES} per request')
+    return None, selection
+
+def parse_flag(value):
+    """Parse a boolean query parameter such as ?gzip=1"""
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+def parse_date_param(value, end_of_day=False):
+    """Parse an ISO date or datetime query parameter, raising ValueError if malformed"""
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+
+    # A bare date as the upper bound includes the whole day
+    if end_of_day and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return parsed
+
+def parse_fields(fields_param):
+    """Parse a comma separated ?fields= value, returning None if any field is unknown"""
+    if not fields_param:
+        return [field for field in Issue.get_list_fields() if field != 'summary']
+
+    fields = []
+    for field in fields_param.split(','):
+        field = field.strip()
+        if field not in Issue.get_list_fields():
+            return None
+        if field not in fields:
+            fields.append(field)
+
+    # The id is needed to address the issue in follow-up requests
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def parse_bbox(bbox_param):
+    """Parse a west,south,east,north bounding box, returning None if it is invalid"""
+    try:
+        west, south, east, north = (float(value) for value in bbox_param.split(','))
+    except (AttributeError, ValueError):
+        return None
+
+    if not (-180 <= west <= east <= 180 and -90 <= south <= north <= 90):
+        return None
+    return west, south, east, north
+
+def encode_cursor(created_at, issue_id):
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    raw = f"{created_at.isoformat()}|{issue_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, returning None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, issue_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(issue_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def encode_offset_cursor(offset):
+    """Encode a result offset as an opaque cursor for relevance-ordered pages"""
+    return base64.urlsafe_b64encode(f"#{offset}".encode()).decode().rstrip('=')
+
+def decode_offset_cursor(cursor):
+    """Decode a cursor produced by encode_offset_cursor, returning None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        offset = int(raw[1:]) if raw.startswith('#') else -1
+        return offset if offset >= 0 else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def encode_changes_cursor(updated_at, issue_id, deleted_at):
+    """Encode a delta sync position: the last (updated_at, id) and tombstone time sent"""
+    raw = f"{updated_at.isoformat()}|{issue_id}|{deleted_at.isoformat()}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_changes_cursor(cursor):
+    """Decode a cursor produced by encode_changes_cursor, returning None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        updated_at, issue_id, deleted_at = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(updated_at), int(issue_id), datetime.fromisoformat(deleted_at)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def not_modified(etag):
+    """Return a 304 response if the client already holds this version, otherwise None"""
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+def versioned(response, etag):
+    """Tag a response with its ETag; clients must revalidate before reusing it"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def sync_cursor():
+    """Return a /issues/changes cursor for changes from now on, minus the settle window"""
+    settled = datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+    return encode_changes_cursor(settled, 0, settled)
 
 @issue_bp.route('/issues', methods=['GET'])
 def get_issues():
-    """Get all issues with optional filtering"""
+    """Get issues with optional filtering, keyset pagination and field projection"""
     try:
-        # Get query parameters for filtering
-        category = request.args.get('category')
-        status = request.args.get('status')
-        severity = request.args.get('severity')
-        
-        # Build query
-        query = Issue.query
-        
-        if category and category in Issue.get_categories():
-            query = query.filter(Issue.category == category)
-        
-        if status and status in Issue.get_statuses():
-            query = query.filter(Issue.status == status)
-            
-        if severity and severity in Issue.get_severities():
-            query = query.filter(Issue.severity == severity)
-        
-        # Order by creation date (newest first)
-        issues = query.order_by(Issue.created_at.desc()).all()
-        
-        return jsonify([issue.to_dict() for issue in issues])
+        # Any write to the issue table changes the version, so an unchanged
+        # dataset is answered with a 304 before running the query
+        etag = f"issues-{get_issue_version()}"
+        response = not_modified(etag)
+        if response:
+            return response
+
+        fields = parse_fields(request.args.get('fields'))
+        if fields is None:
+            return jsonify({'error': 'Invalid fields parameter'}), 400
+
+        limit = request.args.get('limit', type=int)
+        if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+        # Taken before the query, so a client syncing from it misses no change
+        changes_cursor = sync_cursor()
+
+        match = build_match_query(request.args.get('q', ''))
+        if match:
+            response = make_response(search_issues(match, fields, limit))
+            if response.status_code != 200:
+                return response
+            response.headers['X-Sync-Cursor'] = changes_cursor
+            return versioned(response, etag)
+
+        cursor = None
+        if request.args.get('cursor'):
+            cursor = decode_cursor(request.args['cursor'])
+            if cursor is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
+
+        def list_query(model):
+            # Core select of plain tuples whose values are already in their JSON form:
+            # no ORM objects are built and no datetime is converted per row
+            columns = [Issue.json_column(field, model.__table__) for field in fields]
+            # The typed keyset columns order the rows and build the next cursor
+            columns += [model.created_at.label('cursor_created_at'), model.id.label('cursor_id')]
+
+            # Build query
+            query = apply_issue_filters(db.select(*columns), request.args, model)
+
+            if cursor:
+                cursor_created_at, cursor_id = cursor
+                query = query.filter(db.or_(
+                    model.created_at < cursor_created_at,
+                    db.and_(model.created_at == cursor_created_at, model.id < cursor_id)
+                ))
+            return query
+
+        query = list_query(Issue)
+        if parse_flag(request.args.get('include_archived')):
+            # SQLite merges the two index-ordered scans instead of sorting the union
+            query = db.union_all(query, list_query(ArchivedIssue))
+
+        # Order by creation date (newest first), id breaks ties for stable pages
+        query = query.order_by(db.desc('cursor_created_at'), db.desc('cursor_id'))
+
+        if limit is None:
+            # Unpaged lists can be large: stream them in batches
+            result = db.session.connection().execution_options(yield_per=EXPORT_BATCH_SIZE).execute(query)
+            response = Response(stream_with_context(iter_json_rows(result, fields)), mimetype='application/json')
+            response.headers['X-Sync-Cursor'] = changes_cursor
+            return versioned(response, etag)
+
+        # Fetch one extra row to find out whether another page exists
+        rows = db.session.connection().execute(query.limit(limit + 1)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(rows[limit - 1].cursor_created_at, rows[limit - 1].cursor_id)
+            rows = rows[:limit]
+
+        response = jsonify([dict(zip(fields, row)) for row in rows])
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['X-Sync-Cursor'] = changes_cursor
+        return versioned(response, etag)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@issue_bp.route('/issues/changes', methods=['GET'])
+def get_issue_changes():
+    """Get the issues created or updated since a sync cursor and the ids of deleted ones"""
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        if fields is None:
+            return jsonify({'error': 'Invalid fields parameter'}), 400
+
+        limit = request.args.get('limit', MAX_PAGE_SIZE, type=int)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+        settled = datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+        cursor = None
+        if request.args.get('since'):
+            cursor = decode_changes_cursor(request.args['since'])
+            if cursor is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
+
+        columns = [Issue.list_column(field) for field in fields]
+        for field in ('id', 'updated_at'):
+            if field not in fields:
+                columns.append(getattr(Issue, field))
+
+        query = db.session.query(*columns)
+        if cursor:
+            since_updated_at, since_id, since_deleted_at = cursor
+            query = query.filter(db.or_(
+                Issue.updated_at > since_updated_at,
+                db.and_(Issue.updated_at == since_updated_at, Issue.id > since_id)
+            ))
+        else:
+            # A first sync sends every issue; deletions before it do not matter
+            since_updated_at, since_id, since_deleted_at = datetime.min, 0, settled
+
+        # Oldest change first, so the cursor can advance page by page
+        rows = query.order_by(Issue.updated_at, Issue.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        deleted = []
+        if cursor:
+            deleted = db.session.query(IssueTombstone.issue_id, IssueTombstone.deleted_at) \
+                .filter(IssueTombstone.deleted_at > since_deleted_at) \
+                .order_by(IssueTombstone.deleted_at).all()
+
+        next_updated_at, next_id = (rows[-1].updated_at, rows[-1].id) if rows else (since_updated_at, since_id)
+        # Hold the cursor back so late commits inside the settle window are not missed
+        if not has_more and next_updated_at > settled:
+            next_updated_at, next_id = settled, 0
+        next_deleted_at = min(deleted[-1].deleted_at, settled) if deleted else since_deleted_at
+
+        return jsonify({
+            'issues': [Issue.row_to_dict(row, fields) for row in rows],
+            'deleted': [row.issue_id for row in deleted],
+            'cursor': encode_changes_cursor(next_updated_at, next_id, next_deleted_at),
+            'has_more': has_more
+        })
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def iter_json_rows(result, fields):
+    """Yield a JSON array of row objects, serializing EXPORT_BATCH_SIZE rows at a time"""
+    dumps = current_app.json.dumps
+    opening = '['
+    for rows in result.partitions():
+        # Each batch is dumped as an array; its brackets are replaced by separators
+        yield opening + dumps([dict(zip(fields, row)) for row in rows])[1:-1]
+        opening = ','
+    yield '[]' if opening == '[' else ']'
+
+def search_issues(match, fields, limit):
+    """Full-text branch of get_issues: results ranked by relevance with highlighted snippets"""
+    # Relevance order has no stable keyset, so search pages are addressed by offset
+    offset = 0
+    if request.args.get('cursor'):
+        offset = decode_offset_cursor(request.args['cursor'])
+        if offset is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    columns = [Issue.list_column(field) for field in fields]
+    query = db.session.query(*columns, search_snippet().label('snippet')) \
+        .select_from(issue_fts) \
+        .join(Issue, Issue.id == issue_fts.c.rowid) \
+        .filter(db.literal_column('issue_fts').op('MATCH')(match))
+    query = apply_issue_filters(query, request.args).order_by(search_rank(), Issue.id)
+
+    if limit is None:
+        rows = query.all()
+        next_cursor = None
+    else:
+        rows = query.offset(offset).limit(limit + 1).all()
+        next_cursor = encode_offset_cursor(offset + limit) if len(rows) > limit else None
+        rows = rows[:limit]
+
+    results = []
+    for row in rows:
+        result = Issue.row_to_dict(row, fields)
+        result['snippet'] = highlight(row.snippet)
+        results.append(result)
+
+    response = jsonify(results)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def parse_choices(value, choices):
+    """Parse a comma separated filter into a set, returning None if a value is unknown"""
+    values = {item.strip() for item in value.split(',') if item.strip()}
+    return values if values <= set(choices) else None
+
+def format_event(event_id, event):
+    """Format an issue event as a Server-Sent Events message"""
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+@issue_bp.route('/issues/events', methods=['GET'])
+def stream_issue_events():
+    """Stream issue created/updated/deleted events as Server-Sent Events"""
+    try:
+        categories = parse_choices(request.args.get('category', ''), Issue.get_categories())
+        severities = parse_choices(request.args.get('severity', ''), Issue.get_severities())
+        if categories is None or severities is None:
+            return jsonify({'error': 'Invalid category or severity filter'}), 400
+
+        # Browsers send Last-Event-ID when they reconnect
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        last_event_id = int(last_event_id) if last_event_id else None
+
+        broadcaster = get_broadcaster(current_app._get_current_object())
+        # Subscribe before replaying so no event falls between the two
+        subscriber = broadcaster.subscribe(categories, severities)
+        try:
+            replayed = broadcaster.replay(last_event_id) if last_event_id is not None else []
+        except Exception:
+            broadcaster.unsubscribe(subscriber)
+            raise
+        # An open stream must not keep a pooled database connection
+        db.session.close()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    def generate():
+        yield f"retry: {EVENT_RETRY_MILLISECONDS}\n\n"
+        if replayed is None:
+            # The missed events are gone: the client must reload its data
+            yield "event: reset\ndata: {}\n\n"
+        seen = last_event_id or 0
+        for event_id, event in replayed or []:
+            seen = event_id
+            if subscriber.matches(event):
+                yield format_event(event_id, event)
+
+        while True:
+            events = subscriber.wait(EVENT_HEARTBEAT_SECONDS)
+            if subscriber.overflowed:
+                yield "event: reset\ndata: {}\n\n"
+                return
+            if not events:
+                yield ": keepalive\n\n"
+            for event_id, event in events:
+                # Skip events already sent as part of the replay
+                if event_id > seen:
+                    seen = event_id
+                    yield format_event(event_id, event)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    # Runs when the client disconnects, even if the stream never started
+    response.call_on_close(lambda: broadcaster.unsubscribe(subscriber))
+    return response
+
+@issue_bp.route('/issues/map', methods=['GET'])
+def get_issues_map():
+    """Get the issues inside a map viewport, clustered below CLUSTER_MAX_ZOOM"""
+    try:
+        bbox = parse_bbox(request.args.get('bbox'))
+        if bbox is None:
+            return jsonify({'error': 'bbox must be west,south,east,north'}), 400
+
+        zoom = request.args.get('zoom', type=int)
+        if zoom is None or not 0 <= zoom <= 22:
+            return jsonify({'error': 'zoom must be between 0 and 22'}), 400
+
+        west, south, east, north = bbox
+        in_viewport = [
+            issue_rtree.c.min_lat <= north, issue_rtree.c.max_lat >= south,
+            issue_rtree.c.min_lng <= east, issue_rtree.c.max_lng >= west,
+            # The R*Tree stores 32-bit floats, so re-check the exact coordinates
+            Issue.latitude.between(south, north), Issue.longitude.between(west, east)
+        ]
+
+        def viewport_query(*columns):
+            query = db.session.query(*columns).select_from(Issue) \
+                .join(issue_rtree, issue_rtree.c.id == Issue.id) \
+                .filter(*in_viewport)
+            return apply_issue_filters(query, request.args)
+
+        if zoom >= CLUSTER_MAX_ZOOM:
+            fields = parse_fields(MAP_POINT_FIELDS)
+            rows = viewport_query(*[Issue.list_column(field) for field in fields]) \
+                .limit(MAX_MAP_POINTS + 1).all()
+            # Too many points to draw individually: fall back to clusters
+            if len(rows) <= MAX_MAP_POINTS:
+                return jsonify({
+                    'zoom': zoom,
+                    'clusters': [],
+                    'points': [Issue.row_to_dict(row, fields) for row in rows]
+                })
+
+        # Grid cells are aligned to the world origin so clusters stay put while panning
+        cell_size = 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+        cell_y = db.cast((Issue.latitude + 90) / cell_size, db.Integer)
+        cell_x = db.cast((Issue.longitude + 180) / cell_size, db.Integer)
+        severity_columns = [
+            db.func.sum(db.case((Issue.severity == severity, 1), else_=0))
+            for severity in Issue.get_severities()
+        ]
+        rows = viewport_query(
+            db.func.count(Issue.id),
+            db.func.avg(Issue.latitude),
+            db.func.avg(Issue.longitude),
+            *severity_columns
+        ).group_by(cell_y, cell_x).all()
+
+        clusters = []
+        for count, latitude, longitude, *severity_counts in rows:
+            clusters.append({
+                'count': count,
+                'latitude': latitude,
+                'longitude': longitude,
+                'severity_counts': dict(zip(Issue.get_severities(), severity_counts))
+            })
+
+        return jsonify({'zoom': zoom, 'clusters': clusters, 'points': []})
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -66,65 +581,190 @@ def create_issue():
         # Handle multipart form data
         data = request.form.to_dict()
         
-        # Validate required fields
-        required_fields = ['title', 'description', 'category', 'severity']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        # Validate category and severity
-        if data['category'] not in Issue.get_categories():
-            return jsonify({'error': 'Invalid category'}), 400
-            
-        if data['severity'] not in Issue.get_severities():
-            return jsonify({'error': 'Invalid severity'}), 400
+        # Validate required fields, category and severity
+        error = Issue.validate_submission(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        # Parse coordinates before any upload is written to disk
+        latitude = float(data['latitude']) if data.get('latitude') else None
+        longitude = float(data['longitude']) if data.get('longitude') else None
         
         # Handle photo upload
         photo_filename = None
         photo_original_name = None
+        temp_path = None
+        upload_folder = current_app.config['UPLOAD_FOLDER']
         
-        if 'photo' in request.files:
-            file = request.files['photo']
-            if file and file.filename != '' and allowed_file(file.filename):
-                # Generate hashed filename
-                photo_filename = generate_hashed_filename(file.filename)
-                photo_original_name = secure_filename(file.filename)
-                
-                # Save file
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], photo_filename)
-                file.save(file_path)
-        
-        # Create issue
-        issue = Issue(
-            title=data['title'],
-            description=data['description'],
-            category=data['category'],
-            severity=data['severity'],
-            latitude=float(data['latitude']) if data.get('latitude') else None,
-            longitude=float(data['longitude']) if data.get('longitude') else None,
-            address=data.get('address'),
-            photo_filename=photo_filename,
-            photo_original_name=photo_original_name,
-            reporter_name=data.get('reporter_name'),
-            reporter_email=data.get('reporter_email'),
-            reporter_phone=data.get('reporter_phone')
-        )
-        
-        db.session.add(issue)
-        db.session.commit()
+        # From here on a temp photo may exist; every exit removes it unless write() placed it
+        try:
+            if 'photo' in request.files:
+                file = request.files['photo']
+                if file and file.filename != '' and allowed_file(file.filename):
+                    # Hash the bytes while streaming them to a temp file;
+                    # identical photos map to the same content-addressed blob
+                    digest, temp_path = write_temp_photo(file.stream, upload_folder)
+                    photo_filename = blob_filename(digest, file.filename.rsplit('.', 1)[1].lower())
+                    photo_original_name = secure_filename(file.filename)
+
+            # Or a chunked upload started with POST /uploads; it may still be in progress
+            upload_id = data.get('photo_upload')
+            if upload_id:
+                upload = db.session.get(PhotoUpload, upload_id)
+                if temp_path:
+                    return jsonify({'error': 'Send either a photo or a photo_upload, not both'}), 400
+                if upload is None or upload.issue_id is not None:
+                    return jsonify({'error': 'Unknown or already attached photo_upload'}), 400
+
+            # Link re-reports of a nearby open issue to it instead of listing them twice
+            signature = minhash(data['title'], data['description'])
+            duplicate = find_duplicate(latitude, longitude, data['category'], signature, current_app.config)
+            district = get_district_index(current_app).lookup(latitude, longitude)
+
+            def write():
+                nonlocal temp_path
+                # Create issue
+                issue = Issue(
+                    title=data['title'],
+                    description=data['description'],
+                    category=data['category'],
+                    severity=data['severity'],
+                    latitude=latitude,
+                    longitude=longitude,
+                    address=data.get('address'),
+                    district=district,
+                    photo_filename=photo_filename,
+                    photo_original_name=photo_original_name,
+                    reporter_name=data.get('reporter_name'),
+                    reporter_email=data.get('reporter_email'),
+                    reporter_phone=data.get('reporter_phone'),
+                    duplicate_of_id=duplicate[0] if duplicate else None
+                )
+                db.session.add(issue)
+                db.session.flush()
+                db.session.add(IssueSignature(issue_id=issue.id, signature=signature))
+                if temp_path:
+                    place_photo(temp_path, photo_filename, upload_folder)
+                    temp_path = None
+                if upload_id:
+                    # Read after the flush, under the write lock: a finalize either
+                    # completed the upload already or will find issue_id set
+                    upload = db.session.get(PhotoUpload, upload_id, populate_existing=True)
+                    if upload is None or upload.issue_id is not None:
+                        raise ValueError('photo_upload was attached to another issue')
+                    if upload.complete:
+                        attach_upload(upload, issue, upload_folder)
+                    else:
+                        upload.issue_id = issue.id
+                return issue.to_dict()
+
+            # Committed on its own, or batched with other submissions when GROUP_COMMIT is on
+            issue_data = run_write(write)
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        # Thumbnails are rendered by a process pool, not in this request
+        if issue_data['photo_filename']:
+            schedule_variants(issue_data['photo_filename'], upload_folder, current_app.config.get('PHOTO_VARIANT_WORKERS'))
+
+        publish_issue_event('created', issue_event_data(issue_data))
         
-        return jsonify(issue.to_dict()), 201
+        return jsonify(issue_data), 201
         
     except ValueError as e:
         return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@issue_bp.route('/issues/bulk', methods=['POST'])
+@require_auth
+def bulk_create_issues():
+    """Import many issues from CSV or NDJSON in the export format (admin functionality)"""
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            stream = upload.stream
+            export_format = request.args.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+        else:
+            stream = request.stream
+            export_format = request.args.get('format') or {
+                'text/csv': 'csv',
+                'application/x-ndjson': 'ndjson',
+                'application/json': 'ndjson'
+            }.get(request.mimetype)
+
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+
+        # The body is parsed while it streams in rather than loaded whole
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        reader = read_csv_records if export_format == 'csv' else read_ndjson_records
+        result = ingest_issues(reader(text_stream))
+        if result['inserted']:
+            publish_issue_event('imported', {'inserted': result['inserted']})
+
+        return jsonify(result)
+
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Import must be UTF-8 encoded'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@issue_bp.route('/issues/bulk', methods=['PATCH'])
+@require_auth
+def bulk_update_issues():
+    """Change the status, severity or admin notes of many issues at once (admin functionality)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        changes = {field: data[field] for field in BULK_FIELDS if field in data}
+        if not changes:
+            return jsonify({'error': f'Nothing to update; give {", ".join(BULK_FIELDS)}'}), 400
+        if 'status' in changes and changes['status'] not in Issue.get_statuses():
+            return jsonify({'error': 'Invalid status'}), 400
+        if 'severity' in changes and changes['severity'] not in Issue.get_severities():
+            return jsonify({'error': 'Invalid severity'}), 400
+        if 'admin_notes' in changes and not isinstance(changes['admin_notes'], (str, type(None))):
+            return jsonify({'error': 'admin_notes must be a string'}), 400
+
+        ids, selection = parse_bulk_selection(data)
+        # One set-based UPDATE instead of a fetch and commit per issue
+        results, events = run_write(lambda: apply_bulk_update(ids, selection, changes))
+        publish_issue_events('updated', events)
+
+        return jsonify({'updated': len(events), 'results': results})
+
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@issue_bp.route('/issues/bulk', methods=['DELETE'])
+@require_auth
+def bulk_delete_issues():
+    """Delete many issues at once; their photo files are released in the background (admin functionality)"""
+    try:
+        ids, selection = parse_bulk_selection(request.get_json(silent=True) or {})
+        results, events, photos = run_write(lambda: apply_bulk_delete(ids, selection))
+        publish_issue_events('deleted', events)
+
+        # Photos are shared between issues; files go with their last reference
+        if photos:
+            release_photos_later(current_app._get_current_object(), photos)
+
+        return jsonify({'deleted': len(events), 'results': results})
+
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @issue_bp.route('/issues/<int:issue_id>', methods=['GET'])
 def get_issue(issue_id):
     """Get a specific issue by ID"""
     try:
-        issue = Issue.query.get_or_404(issue_id)
+        # Old resolved issues may have been moved to the archive
+        issue = Issue.query.get(issue_id) or ArchivedIssue.query.get_or_404(issue_id)
         return jsonify(issue.to_dict())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -133,25 +773,30 @@ def get_issue(issue_id):
 def update_issue(issue_id):
     """Update an issue (admin functionality)"""
     try:
-        issue = Issue.query.get_or_404(issue_id)
         data = request.json
+
+        def write():
+            issue = Issue.query.get_or_404(issue_id)
+            
+            # Update allowed fields
+            if 'status' in data and data['status'] in Issue.get_statuses():
+                issue.status = data['status']
+                if data['status'] == 'resolved':
+                    issue.resolved_at = datetime.utcnow()
+            
+            if 'admin_notes' in data:
+                issue.admin_notes = data['admin_notes']
+            
+            if 'severity' in data and data['severity'] in Issue.get_severities():
+                issue.severity = data['severity']
+            
+            issue.updated_at = datetime.utcnow()
+            db.session.flush()
+            return issue.to_dict()
         
-        # Update allowed fields
-        if 'status' in data and data['status'] in Issue.get_statuses():
-            issue.status = data['status']
-            if data['status'] == 'resolved':
-                issue.resolved_at = datetime.utcnow()
-        
-        if 'admin_notes' in data:
-            issue.admin_notes = data['admin_notes']
-        
-        if 'severity' in data and data['severity'] in Issue.get_severities():
-            issue.severity = data['severity']
-        
-        issue.updated_at = datetime.utcnow()
-        db.session.commit()
-        
-        return jsonify(issue.to_dict())
+        issue_data = run_write(write)
+        publish_issue_event('updated', issue_event_data(issue_data))
+        return jsonify(issue_data)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -161,15 +806,16 @@ def delete_issue(issue_id):
     """Delete an issue (admin functionality)"""
     try:
         issue = Issue.query.get_or_404(issue_id)
-        
-        # Delete associated photo file if it exists
-        if issue.photo_filename:
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], issue.photo_filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        photo_filename = issue.photo_filename
+        event_data = issue_event_data(issue.to_dict())
         
         db.session.delete(issue)
         db.session.commit()
+        publish_issue_event('deleted', event_data)
+        
+        # Photos are shared between issues; the file goes with its last reference
+        if photo_filename:
+            release_photo(photo_filename, current_app.config['UPLOAD_FOLDER'])
         
         return '', 204
         
@@ -178,53 +824,160 @@ def delete_issue(issue_id):
 
 @issue_bp.route('/issues/<int:issue_id>/photo', methods=['GET'])
 def get_issue_photo(issue_id):
-    """Get the photo for a specific issue"""
+    """Get the photo for a specific issue, optionally a resized variant (?size=thumb|medium)"""
     try:
-        issue = Issue.query.get_or_404(issue_id)
+        size = request.args.get('size')
+        if size and size not in PHOTO_VARIANTS:
+            return jsonify({'error': f'size must be one of: {", ".join(PHOTO_VARIANTS)}'}), 400
+
+        issue = Issue.query.get(issue_id) or ArchivedIssue.query.get_or_404(issue_id)
         
         if not issue.photo_filename:
             return jsonify({'error': 'No photo available for this issue'}), 404
+
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        if size:
+            variant = variant_filename(issue.photo_filename, size)
+            if os.path.exists(os.path.join(upload_folder, variant)):
+                return send_from_directory(upload_folder, variant)
+            # Not rendered yet: serve the original this time and render it in the background
+            schedule_variants(issue.photo_filename, upload_folder, current_app.config.get('PHOTO_VARIANT_WORKERS'))
         
-        return send_from_directory(current_app.config['UPLOAD_FOLDER'], issue.photo_filename)
+        return send_from_directory(upload_folder, issue.photo_filename)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @issue_bp.route('/issues/export/csv', methods=['GET'])
 def export_issues_csv():
-    """Export all issues as CSV"""
+    """Stream issues as CSV, optionally filtered and gzip-compressed"""
+    return export_issues('csv')
+
+@issue_bp.route('/issues/export/ndjson', methods=['GET'])
+def export_issues_ndjson():
+    """Stream issues as newline-delimited JSON, optionally filtered and gzip-compressed"""
+    return export_issues('ndjson')
+
+def export_issues(export_format):
+    """Build a streaming export response; rows are fetched in batches of EXPORT_BATCH_SIZE"""
     try:
-        import csv
-        import io
-        
-        # Get all issues
-        issues = Issue.query.order_by(Issue.created_at.desc()).all()
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=[
-            'ID', 'Title', 'Description', 'Category', 'Severity', 'Status',
-            'Latitude', 'Longitude', 'Address', 'Photo', 'Created Date',
-            'Updated Date', 'Reporter Name', 'Reporter Email', 'Reporter Phone',
-            'Admin Notes', 'Resolved Date'
-        ])
-        
-        writer.writeheader()
-        for issue in issues:
-            writer.writerow(issue.to_csv_dict())
-        
-        # Prepare response
-        output.seek(0)
-        csv_data = output.getvalue()
-        output.close()
-        
-        from flask import Response
+        live, archived = (
+            apply_issue_filters(model.query, request.args, model)
+            .order_by(model.created_at.desc(), model.id.desc()).yield_per(EXPORT_BATCH_SIZE)
+            for model in (Issue, ArchivedIssue)
+        )
+        # Archived issues are exported with the live ones, in one newest-first order
+        issues = heapq.merge(live, archived, key=lambda issue: (issue.created_at, issue.id), reverse=True)
+
+        chunks = iter_export_chunks(issues, export_format)
+        mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        filename = f'issues_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{export_format}'
+
+        if parse_flag(request.args.get('gzip')):
+            chunks = gzip_stream(chunks)
+            mimetype = 'application/gzip'
+            filename += '.gz'
+
         return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': f'attachment; filename=issues_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
-        
+
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def iter_export_chunks(issues, export_format):
+    """Yield the export body in chunks of EXPORT_BATCH_SIZE rows"""
+    buffer = io.StringIO()
+    writer = None
+    if export_format == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=CSV_EXPORT_FIELDS)
+        writer.writeheader()
+
+    for count, issue in enumerate(issues, 1):
+        if writer:
+            writer.writerow(issue.to_csv_dict())
+        else:
+            buffer.write(json.dumps(issue.to_dict()) + '\n')
+
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+@issue_bp.route('/issues/trends', methods=['GET'])
+def get_issue_trends():
+    """Get new reports, backlog and resolution times per day or week from the rollups"""
+    try:
+        interval = request.args.get('interval', 'day')
+        if interval not in ('day', 'week'):
+            return jsonify({'error': 'interval must be day or week'}), 400
+
+        end = (parse_date_param(request.args.get('end')) or datetime.utcnow()).date()
+        start = parse_date_param(request.args.get('start'))
+        start = start.date() if start else end - timedelta(days=DEFAULT_TREND_PERIODS * (7 if interval == 'week' else 1) - 1)
+        if start > end or (end - start).days > MAX_TREND_DAYS:
+            return jsonify({'error': f'start must be before end and at most {MAX_TREND_DAYS} days earlier'}), 400
+
+        categories = parse_choices(request.args.get('category', ''), Issue.get_categories())
+        severities = parse_choices(request.args.get('severity', ''), Issue.get_severities())
+        if categories is None or severities is None:
+            return jsonify({'error': 'Invalid category or severity filter'}), 400
+
+        # Without an explicit end the range moves with the date, so the day is part of the version
+        etag = f"trends-{get_issue_version()}-{end.isoformat()}"
+        response = not_modified(etag)
+        if response:
+            return response
+
+        return versioned(jsonify(get_trends(start, end, interval, categories, severities)), etag)
+
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@issue_bp.route('/issues/heatmap/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def get_heatmap_tile(z, x, y):
+    """Get the issue density of a Web Mercator tile as a sparse grid"""
+    try:
+        if z > MAX_HEATMAP_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            return jsonify({'error': f'Tile out of range; zoom must be at most {MAX_HEATMAP_ZOOM}'}), 400
+
+        weight = request.args.get('weight', 'count')
+        if weight not in ('count', 'severity'):
+            return jsonify({'error': 'weight must be count or severity'}), 400
+
+        categories = parse_choices(request.args.get('category', ''), Issue.get_categories())
+        statuses = parse_choices(request.args.get('status', ''), Issue.get_statuses())
+        if categories is None or statuses is None:
+            return jsonify({'error': 'Invalid category or status filter'}), 400
+
+        # The fingerprint and the tile are read from one snapshot, so a cached tile
+        # holds exactly the writes up to its version
+        with read_snapshot(db.session):
+            fingerprint = tile_fingerprint(*tile_bounds(z, x, y))
+            etag = f"heatmap-{fingerprint}"
+            response = not_modified(etag)
+            if response:
+                return response
+
+            cache = get_heatmap_cache(current_app)
+            key = (z, x, y, weight, frozenset(categories), frozenset(statuses))
+            payload = cache.get(key, fingerprint)
+            if payload is None:
+                payload = tile_payload(z, x, y, weight, compute_tile(z, x, y, weight, categories, statuses))
+                cache.put(key, fingerprint, payload)
+
+        return versioned(jsonify(payload), etag)
+
+    except ValueError as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -232,33 +985,40 @@ def export_issues_csv():
 def get_issue_stats():
     """Get statistics about issues"""
     try:
-        total_issues = Issue.query.count()
-        
-        # Count by status
-        status_counts = {}
-        for status in Issue.get_statuses():
-            status_counts[status] = Issue.query.filter(Issue.status == status).count()
-        
-        # Count by category
-        category_counts = {}
-        for category in Issue.get_categories():
-            category_counts[category] = Issue.query.filter(Issue.category == category).count()
-        
-        # Count by severity
-        severity_counts = {}
-        for severity in Issue.get_severities():
-            severity_counts[severity] = Issue.query.filter(Issue.severity == severity).count()
-        
-        return jsonify({
-            'total_issues': total_issues,
-            'status_counts': status_counts,
-            'category_counts': category_counts,
-            'severity_counts': severity_counts
-        })
+        etag = f"stats-{get_issue_version()}"
+        response = not_modified(etag)
+        if response:
+            return response
+
+        # Served from the trigger-maintained counters, independent of table size
+        return versioned(jsonify(get_issue_counts()), etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@issue_bp.route('/issues/extent', methods=['GET'])
+def get_issue_extent():
+    """Get the bounding box of the geotagged issues, for the map's initial view"""
+    try:
+        etag = f"extent-{get_issue_version()}"
+        response = not_modified(etag)
+        if response:
+            return response
+
+        # Aggregated over the R*Tree rather than the issue table: narrower rows
+        west, south, east, north = db.session.query(
+            db.func.min(issue_rtree.c.min_lng), db.func.min(issue_rtree.c.min_lat),
+            db.func.max(issue_rtree.c.max_lng), db.func.max(issue_rtree.c.max_lat)
+        ).one()
+        return versioned(jsonify({
+            'bounds': None if west is None else [west, south, east, north],
+            'center': list(current_app.config['MAP_DEFAULT_CENTER']),
+            'zoom': current_app.config['MAP_DEFAULT_ZOOM']
+        }), etag)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @issue_bp.route('/issues/categories', methods=['GET'])
 def get_categories():
     """Get available categories"""
@@ -274,3 +1034,13 @@ def get_statuses():
     """Get available statuses"""
     return jsonify(Issue.get_statuses())
 
+
+@issue_bp.route('/issues/districts', methods=['GET'])
+def get_districts():
+    """Get the loaded district boundaries: names and bounding boxes"""
+    try:
+        districts = District.query.order_by(District.name).all()
+        return jsonify([district.to_dict() for district in districts])
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
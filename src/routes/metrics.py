@@ -0,0 +1,12 @@
+from flask import Blueprint, current_app
+from src.routes.auth import require_auth
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@require_auth
+def get_metrics():
+    """Request and SQL metrics in the Prometheus text format (admin only)"""
+    registry = current_app.extensions.get('metrics')
+    body = registry.render() if registry else ''
+    return current_app.response_class(body, mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,189 @@
+import os
+from flask import Blueprint, jsonify, request, current_app
+from werkzeug.utils import secure_filename
+from src.models.user import db
+from src.models.issue import Issue
+from src.models.writer import run_write
+from src.models.photo import schedule_variants
+from src.models.events import publish_issue_event, issue_event_data
+from src.models.upload import (
+    PhotoUpload, DEFAULT_MAX_PHOTO_SIZE, DEFAULT_UPLOAD_CHUNK_SIZE, SHA256_PATTERN,
+    start_upload, upload_path, write_chunk, lock_upload, unlock_upload, acknowledge_chunk, file_sha256,
+    complete_upload, attach_upload, verified_filename
+)
+from src.routes.issue import allowed_file
+
+upload_bp = Blueprint('upload', __name__)
+
+def upload_response(upload, status=200, **extra):
+    """JSON state of an upload; the offset is also sent as an Upload-Offset header"""
+    response = jsonify({**upload.to_dict(), **extra})
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(upload.received)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@upload_bp.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a chunked photo upload: {filename, size, sha256 (optional until finalize)}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = data.get('filename') or ''
+        if not allowed_file(filename):
+            return jsonify({'error': 'filename must end in an allowed image extension'}), 400
+
+        max_size = current_app.config.get('MAX_PHOTO_SIZE', DEFAULT_MAX_PHOTO_SIZE)
+        size = data.get('size')
+        if not isinstance(size, int) or isinstance(size, bool) or not 0 < size <= max_size:
+            return jsonify({'error': f'size must be between 1 and {max_size} bytes'}), 400
+
+        sha256 = (data.get('sha256') or '').lower() or None
+        if sha256 and not SHA256_PATTERN.match(sha256):
+            return jsonify({'error': 'sha256 must be 64 hex characters'}), 400
+
+        # The extension comes from the name allowed_file() checked: secure_filename()
+        # drops it along with the rest of a non-ASCII name
+        extension = filename.rsplit('.', 1)[1]
+        upload = start_upload(secure_filename(filename), extension, size, sha256, current_app.config['UPLOAD_FOLDER'])
+        db.session.commit()
+        return upload_response(
+            upload, 201, chunk_size=current_app.config.get('UPLOAD_CHUNK_SIZE', DEFAULT_UPLOAD_CHUNK_SIZE)
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@upload_bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Get the state of an upload; a client resumes from its offset"""
+    try:
+        upload = db.session.get(PhotoUpload, upload_id)
+        if upload is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        return upload_response(upload)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@upload_bp.route('/uploads/<upload_id>', methods=['PATCH'])
+def append_upload_chunk(upload_id):
+    """Append the raw request body to an upload at the position given by the Upload-Offset header"""
+    try:
+        upload = db.session.get(PhotoUpload, upload_id)
+        if upload is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        if upload.complete:
+            return upload_response(upload, 409, error='Upload already finalized')
+
+        offset = request.headers.get('Upload-Offset', type=int)
+        if offset is None:
+            return jsonify({'error': 'Upload-Offset header required'}), 400
+        if offset != upload.received:
+            return upload_response(upload, 409, error='Upload-Offset does not match; resume from offset')
+
+        length = request.content_length
+        if length is None:
+            return jsonify({'error': 'Content-Length header required'}), 411
+        if offset + length > upload.size:
+            return upload_response(upload, 413, error='Chunk goes past the declared size')
+
+        token = lock_upload(upload_id, offset)
+        if token is None:
+            db.session.expire_all()
+            upload = db.session.get(PhotoUpload, upload_id)
+            if upload is None:
+                return jsonify({'error': 'Upload not found'}), 404
+            return upload_response(upload, 409, error='Another chunk is being written; resume from offset')
+
+        # Slow clients must not hold a pooled connection while their chunk arrives;
+        # the body is streamed straight into the temp file, never spooled
+        db.session.close()
+        path = upload_path(current_app.config['UPLOAD_FOLDER'], upload_id)
+        try:
+            written = write_chunk(path, offset, request.stream, length)
+        except Exception:
+            unlock_upload(upload_id, token)
+            raise
+
+        if not acknowledge_chunk(upload_id, token, offset, written):
+            upload = db.session.get(PhotoUpload, upload_id)
+            if upload is None:
+                return jsonify({'error': 'Upload not found'}), 404
+            return upload_response(upload, 409, error='Upload changed while the chunk was sent; resume from offset')
+
+        return upload_response(db.session.get(PhotoUpload, upload_id))
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@upload_bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """Verify a fully received upload against its SHA-256 and attach it to its issue, if it has one"""
+    try:
+        upload = db.session.get(PhotoUpload, upload_id)
+        if upload is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        if upload.complete:
+            return upload_response(upload)
+
+        data = request.get_json(silent=True) or {}
+        sha256 = (data.get('sha256') or upload.sha256 or '').lower()
+        if not SHA256_PATTERN.match(sha256):
+            return jsonify({'error': 'sha256 checksum required (64 hex characters)'}), 400
+        if upload.received != upload.size:
+            return upload_response(upload, 409, error='Upload incomplete; resume from offset')
+
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        digest = file_sha256(upload_path(upload_folder, upload_id))
+        if digest != sha256:
+            # The corrupted range is unknown, so the upload starts over
+            upload.received = 0
+            db.session.commit()
+            return upload_response(upload, 400, error='Checksum mismatch; upload again from offset 0')
+
+        photo_filename = verified_filename(upload, digest)
+        upload_data = {**upload.to_dict(), 'complete': True}
+
+        def write():
+            completed = complete_upload(upload_id, photo_filename)
+            if completed is None or completed.issue_id is None:
+                return None
+            issue = db.session.get(Issue, completed.issue_id)
+            if issue is None:
+                # Deleted meanwhile; the finished upload expires unattached
+                return None
+            attach_upload(completed, issue, upload_folder)
+            return issue.to_dict()
+
+        issue_data = run_write(write)
+        if issue_data is None:
+            return jsonify(upload_data)
+
+        schedule_variants(photo_filename, upload_folder, current_app.config.get('PHOTO_VARIANT_WORKERS'))
+        publish_issue_event('updated', issue_event_data(issue_data))
+        return jsonify({**upload_data, 'issue_id': issue_data['id'], 'issue': issue_data})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@upload_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def cancel_upload(upload_id):
+    """Abandon an upload and remove its temp file"""
+    try:
+        upload = db.session.get(PhotoUpload, upload_id)
+        if upload is None:
+            return jsonify({'error': 'Upload not found'}), 404
+
+        db.session.delete(upload)
+        db.session.commit()
+        path = upload_path(current_app.config['UPLOAD_FOLDER'], upload_id)
+        if os.path.exists(path):
+            os.remove(path)
+        return '', 204
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
+from src.routes.auth import invalidate_principal
 
 user_bp = Blueprint('user', __name__)
 
@@ -12,7 +13,10 @@ def get_users():
 def create_user():
     
     data = request.json
+    if not data.get('password'):
+        return jsonify({'error': 'Missing required field: password'}), 400
     user = User(username=data['username'], email=data['email'])
+    user.set_password(data['password'])
     db.session.add(user)
     db.session.commit()
     return jsonify(user.to_dict()), 201
@@ -29,6 +33,7 @@ def update_user(user_id):
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    invalidate_principal(user_id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -36,4 +41,5 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_principal(user_id)
     return '', 204